@@ -22,6 +22,7 @@
 from arcade.utils import *
 from arcade.draw_commands import *
 from arcade.buffered_draw_commands import *
+from arcade.polyline import *
 from arcade.geometry import *
 from arcade.physics_engines import *
 from arcade.emitter import *
@@ -30,6 +31,13 @@
 from arcade.sound import *
 from arcade.sprite import *
 from arcade.sprite_list import *
+from arcade.texture_atlas import *
+from arcade.sdf_shapes import *
+from arcade.instanced_batch import *
+from arcade.point_batch import *
+from arcade.line_batch import *
+from arcade.grid_renderer import *
+from arcade.texture_batch import *
 from arcade.version import *
 from arcade.window_commands import *
 from arcade.joysticks import *
@@ -38,3 +46,5 @@
 from arcade.text import draw_text
 from arcade.text import create_text
 from arcade.text import render_text
+from arcade.text import TextCache
+from arcade.text import measure_text
@@ -8,6 +8,7 @@
 from arcade.window_commands import set_viewport
 from arcade.window_commands import get_viewport
 from arcade.window_commands import set_window
+from arcade.window_commands import flush_batched_draws
 
 import pyglet
 import pyglet.gl as gl
@@ -43,12 +44,14 @@ def __init__(self, width: float = 800, height: float = 600,
             config = pyglet.gl.Config(major_version=3,
                                       minor_version=3,
                                       double_buffer=True,
+                                      depth_size=24,
                                       sample_buffers=1,
                                       samples=4)
         else:
             config = pyglet.gl.Config(major_version=3,
                                       minor_version=3,
-                                      double_buffer=True)
+                                      double_buffer=True,
+                                      depth_size=24)
 
         super().__init__(width=width, height=height, caption=title,
                          resizable=resizable, config=config)
@@ -349,6 +352,11 @@ def get_viewport(self) -> (float, float, float, float):
         """ Get the viewport. (What coordinates we can see.) """
         return get_viewport()
 
+    def flip(self):
+        """ Draw what is waiting in the immediate mode batches, then swap buffers. """
+        flush_batched_draws()
+        super().flip()
+
     def test(self, frames=10):
         """
         Used by unit test cases. Runs the event loop a few times and stops.
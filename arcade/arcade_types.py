@@ -5,9 +5,12 @@
 from typing import List
 from typing import Union
 
+import numpy as np
+
 RGB = Union[Tuple[int, int, int], List[int]]
 RGBA = Union[Tuple[int, int, int, int], List[int]]
 Color = Union[RGB, RGBA]
 Point = Union[Tuple[float, float], List[float]]
 Vector = Point
-PointList = Union[Tuple[Point, ...], List[Point]]
+# Arrays have a shape of (N, 2)
+PointList = Union[Tuple[Point, ...], List[Point], np.ndarray]
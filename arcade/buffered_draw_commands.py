@@ -6,8 +6,9 @@
 the graphics card for much faster render times.
 """
 
+import bisect
 import math
-import itertools
+import functools
 from collections import defaultdict
 import pyglet.gl as gl
 import numpy as np
@@ -20,10 +21,23 @@
 from arcade.draw_commands import rotate_point
 from arcade.arcade_types import PointList
 from arcade.draw_commands import get_four_byte_color
-from arcade.draw_commands import get_projection
+from arcade.draw_commands import get_four_byte_colors
+from arcade.draw_commands import get_ellipse_points
+from arcade.polyline import LINE_CAP_BUTT
+from arcade.polyline import LINE_JOIN_MITER
+from arcade.polyline import tessellate_line_strip
+from arcade.polyline import tessellate_lines
+from arcade.window_commands import flush_batched_draws
 from arcade import shader
 
 
+# Vertices of the shapes made by the create_* functions
+VERTEX_DATA_TYPE = np.dtype([('vertex', '2f4'), ('color', '4B')])
+
+# Per vertex transform of the shapes in a ShapeElementList
+TRANSFORM_DATA_TYPE = np.dtype([('offset', '2f4'), ('pivot', '2f4'), ('angle', 'f4')])
+
+
 class VertexBuffer:
     """
     This class represents a `vertex buffer object`_ for internal library use. Clients
@@ -54,25 +68,30 @@ class Shape:
     def __init__(self):
         self.vao = None
         self.vbo = None
+        # Copy of the vertices in the vbo, a VERTEX_DATA_TYPE array
+        self.data = None
         self.program = None
         self.mode = None
         self.line_width = 1
+        # Number of vertices, or indices, to draw. All of them if None.
+        self.vertices = None
 
     def draw(self):
-        # program['Projection'].write(get_projection().tobytes())
+        flush_batched_draws()
 
         with self.vao:
-            gl.glLineWidth(self.line_width)
+            state = shader.context_state()
+            state.line_width(self.line_width)
 
-            gl.glEnable(gl.GL_BLEND)
-            gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
-            gl.glEnable(gl.GL_LINE_SMOOTH)
-            gl.glHint(gl.GL_LINE_SMOOTH_HINT, gl.GL_NICEST)
-            gl.glHint(gl.GL_POLYGON_SMOOTH_HINT, gl.GL_NICEST)
-            gl.glEnable(gl.GL_PRIMITIVE_RESTART)
-            gl.glPrimitiveRestartIndex(2 ** 32 - 1)
+            state.enable(gl.GL_BLEND)
+            state.blend_func(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+            state.enable(gl.GL_LINE_SMOOTH)
+            state.hint(gl.GL_LINE_SMOOTH_HINT, gl.GL_NICEST)
+            state.hint(gl.GL_POLYGON_SMOOTH_HINT, gl.GL_NICEST)
+            state.enable(gl.GL_PRIMITIVE_RESTART)
+            state.primitive_restart_index(2 ** 32 - 1)
 
-            self.vao.render(mode=self.mode)
+            self.vao.render(mode=self.mode, vertices=self.vertices)
 
 
 def create_line(start_x: float, start_y: float, end_x: float, end_y: float,
@@ -96,7 +115,10 @@ def create_line(start_x: float, start_y: float, end_x: float, end_y: float,
     program = shader.program(
         vertex_shader='''
             #version 330
-            uniform mat4 Projection;
+            layout (std140) uniform Globals {
+                mat4 Projection;
+                float Time;
+            };
             in vec2 in_vert;
             in vec4 in_color;
             out vec4 v_color;
@@ -115,8 +137,7 @@ def create_line(start_x: float, start_y: float, end_x: float, end_y: float,
         ''',
     )
 
-    buffer_type = np.dtype([('vertex', '2f4'), ('color', '4B')])
-    data = np.zeros(2, dtype=buffer_type)
+    data = np.zeros(2, dtype=VERTEX_DATA_TYPE)
     data['vertex'] = (start_x, start_y), (end_x, end_y)
     data['color'] = get_four_byte_color(color)
 
@@ -131,12 +152,11 @@ def create_line(start_x: float, start_y: float, end_x: float, end_y: float,
     ]
 
     vao = shader.vertex_array(program, vao_content)
-    with vao:
-        program['Projection'] = get_projection().flatten()
 
     shape = Shape()
     shape.vao = vao
     shape.vbo = vbo
+    shape.data = data
     shape.program = program
     shape.mode = gl.GL_LINE_STRIP
     shape.line_width = line_width
@@ -153,8 +173,11 @@ def create_line_generic_with_colors(point_list: PointList,
     just changing the OpenGL type for the line drawing.
 
     Args:
-        point_list:
-        color_list:
+        point_list: List of points, or an array of shape (N, 2). An array
+         with the ``VERTEX_DATA_TYPE`` type already holds the colors too,
+         and is sent to the graphics card as it is.
+        color_list: One color for each point, or an array of shape (N, 3)
+         or (N, 4). Not used with a ``VERTEX_DATA_TYPE`` array.
         shape_mode:
         line_width:
 
@@ -163,7 +186,10 @@ def create_line_generic_with_colors(point_list: PointList,
     program = shader.program(
         vertex_shader='''
             #version 330
-            uniform mat4 Projection;
+            layout (std140) uniform Globals {
+                mat4 Projection;
+                float Time;
+            };
             in vec2 in_vert;
             in vec4 in_color;
             out vec4 v_color;
@@ -182,12 +208,14 @@ def create_line_generic_with_colors(point_list: PointList,
         ''',
     )
 
-    buffer_type = np.dtype([('vertex', '2f4'), ('color', '4B')])
-    data = np.zeros(len(point_list), dtype=buffer_type)
-    data['vertex'] = point_list
-    data['color'] = [get_four_byte_color(color) for color in color_list]
+    if isinstance(point_list, np.ndarray) and point_list.dtype == VERTEX_DATA_TYPE:
+        data = point_list
+    else:
+        data = np.zeros(len(point_list), dtype=VERTEX_DATA_TYPE)
+        data['vertex'] = point_list
+        data['color'] = get_four_byte_colors(color_list, len(point_list))
 
-    vbo = shader.buffer(data.tobytes())
+    vbo = shader.buffer(data)
     vao_content = [
         shader.BufferDescription(
             vbo,
@@ -198,12 +226,11 @@ def create_line_generic_with_colors(point_list: PointList,
     ]
 
     vao = shader.vertex_array(program, vao_content)
-    with vao:
-        program['Projection'] = get_projection().flatten()
 
     shape = Shape()
     shape.vao = vao
     shape.vbo = vbo
+    shape.data = data
     shape.program = program
     shape.mode = shape_mode
     shape.line_width = line_width
@@ -218,7 +245,7 @@ def create_line_generic(point_list: PointList,
     This function is used by ``create_line_strip`` and ``create_line_loop``,
     just changing the OpenGL type for the line drawing.
     """
-    colors = [get_four_byte_color(color)] * len(point_list)
+    colors = get_four_byte_colors(color, len(point_list))
     shape = create_line_generic_with_colors(
         point_list,
         colors,
@@ -229,7 +256,8 @@ def create_line_generic(point_list: PointList,
 
 
 def create_line_strip(point_list: PointList,
-                      color: Color, line_width: float = 1):
+                      color: Color, line_width: float = 1,
+                      join: str = LINE_JOIN_MITER, cap: str = LINE_CAP_BUTT):
     """
     Create a multi-point line to be rendered later. This works faster than draw_line because
     the vertexes are only loaded to the graphics card once, rather than each frame.
@@ -238,11 +266,17 @@ def create_line_strip(point_list: PointList,
         point_list:
         color:
         line_width:
+        join: How segments of wide lines are joined.
+        cap: How the ends of wide lines look.
 
     Returns:
 
     """
-    return create_line_generic(point_list, color, gl.GL_LINE_STRIP, line_width)
+    if line_width == 1:
+        return create_line_generic(point_list, color, gl.GL_LINE_STRIP, line_width)
+
+    triangle_point_list = tessellate_line_strip(point_list, line_width, join, cap)
+    return create_line_generic(triangle_point_list, color, gl.GL_TRIANGLES)
 
 
 def create_line_loop(point_list: PointList,
@@ -264,7 +298,8 @@ def create_line_loop(point_list: PointList,
 
 
 def create_lines(point_list: PointList,
-                 color: Color, line_width: float = 1):
+                 color: Color, line_width: float = 1,
+                 cap: str = LINE_CAP_BUTT):
     """
     Create a multi-point line loop to be rendered later. This works faster than draw_line because
     the vertexes are only loaded to the graphics card once, rather than each frame.
@@ -273,11 +308,16 @@ def create_lines(point_list: PointList,
         point_list:
         color:
         line_width:
+        cap: How the ends of wide lines look.
 
     Returns:
 
     """
-    return create_line_generic(point_list, color, gl.GL_LINES, line_width)
+    if line_width == 1:
+        return create_line_generic(point_list, color, gl.GL_LINES, line_width)
+
+    triangle_point_list = tessellate_lines(point_list, line_width, cap)
+    return create_line_generic(triangle_point_list, color, gl.GL_TRIANGLES)
 
 
 def create_lines_with_colors(point_list: PointList,
@@ -305,14 +345,26 @@ def create_polygon(point_list: PointList,
     # To fill the polygon, we start by one vertex, and we chain triangle strips
     # alternating with vertices to the left and vertices to the right of the
     # initial vertex.
-    half = len(point_list) // 2
-    interleaved = itertools.chain.from_iterable(
-        itertools.zip_longest(point_list[:half], reversed(point_list[half:]))
-    )
-    point_list = [p for p in interleaved if p is not None]
+    point_list = np.asarray(point_list)[_get_strip_order(len(point_list))]
     return create_line_generic(point_list, color, gl.GL_TRIANGLE_STRIP, border_width)
 
 
+@functools.lru_cache(maxsize=64)
+def _get_strip_order(count: int) -> np.ndarray:
+    """
+    Return the order to take the points of a convex outline in to fill it
+    with a triangle strip: the first, the last, the second, the one before
+    the last, and so on.
+    """
+    half = count // 2
+    order = np.empty(count, dtype=np.int32)
+    order[0:2 * half:2] = np.arange(half)
+    order[1:2 * half:2] = np.arange(count - 1, count - half - 1, -1)
+    if count % 2:
+        order[-1] = half
+    return order
+
+
 def create_rectangle_filled(center_x: float, center_y: float, width: float,
                             height: float, color: Color,
                             tilt_angle: float = 0) -> Shape:
@@ -522,29 +574,13 @@ def create_ellipse(center_x: float, center_y: float,
     Note: This can't be unit tested on Appveyor because its support for OpenGL is
     poor.
     """
-    # Create an array with the vertex point_list
-    point_list = []
-
-    for segment in range(num_segments):
-        theta = 2.0 * 3.1415926 * segment / num_segments
-
-        x = width * math.cos(theta) + center_x
-        y = height * math.sin(theta) + center_y
-
-        if tilt_angle:
-            x, y = rotate_point(x, y, center_x, center_y, tilt_angle)
-
-        point_list.append((x, y))
+    point_list = get_ellipse_points(center_x, center_y, width, height, tilt_angle, num_segments)
 
     if filled:
-        half = len(point_list) // 2
-        interleaved = itertools.chain.from_iterable(
-            itertools.zip_longest(point_list[:half], reversed(point_list[half:]))
-        )
-        point_list = [p for p in interleaved if p is not None]
+        point_list = point_list[_get_strip_order(num_segments)]
         shape_mode = gl.GL_TRIANGLE_STRIP
     else:
-        point_list.append(point_list[0])
+        point_list = np.concatenate((point_list, point_list[:1]))
         shape_mode = gl.GL_LINE_STRIP
 
     return create_line_generic(point_list, color, shape_mode, border_width)
@@ -571,24 +607,71 @@ def create_ellipse_filled_with_colors(center_x: float, center_y: float,
 
     """
 
-    # Create an array with the vertex data
-    # Create an array with the vertex point_list
-    point_list = [(center_x, center_y)]
+    # The center, then around the edge back to the first point
+    edge = get_ellipse_points(center_x, center_y, width, height, tilt_angle, num_segments)
+    point_list = np.concatenate(([(center_x, center_y)], edge, edge[:1]))
 
-    for segment in range(num_segments):
-        theta = 2.0 * 3.1415926 * segment / num_segments
+    color_list = [inside_color] + [outside_color] * (num_segments + 1)
+    return create_line_generic_with_colors(point_list, color_list, gl.GL_TRIANGLE_FAN)
 
-        x = width * math.cos(theta) + center_x
-        y = height * math.sin(theta) + center_y
 
-        if tilt_angle:
-            x, y = rotate_point(x, y, center_x, center_y, tilt_angle)
+_VERTEX_SIZE = VERTEX_DATA_TYPE.itemsize
+_TRANSFORM_SIZE = TRANSFORM_DATA_TYPE.itemsize
+_IDENTITY_TRANSFORM = np.zeros(1, dtype=TRANSFORM_DATA_TYPE)
+_RESTART_INDEX = 2 ** 32 - 1
 
-        point_list.append((x, y))
-    point_list.append(point_list[1])
 
-    color_list = [inside_color] + [outside_color] * (num_segments + 1)
-    return create_line_generic_with_colors(point_list, color_list, gl.GL_TRIANGLE_FAN)
+class RangeAllocator:
+    """
+    Hands out ranges of a buffer, and reuses the ranges given back.
+
+    Free ranges are kept sorted, and merged with their neighbours. When none
+    is big enough, the range is taken from the end, and ``capacity`` grows to
+    make room for it, so the owner knows to grow its buffer.
+    """
+    def __init__(self, capacity: int = 0):
+        self.capacity = capacity
+        # Nothing at or after this is in use
+        self.end = 0
+        self.free_ranges = []
+
+    def allocate(self, size: int) -> int:
+        """
+        Return the start of a range of ``size`` units that is not in use.
+        """
+        for index, (start, free_size) in enumerate(self.free_ranges):
+            if free_size >= size:
+                if free_size == size:
+                    del self.free_ranges[index]
+                else:
+                    self.free_ranges[index] = (start + size, free_size - size)
+                return start
+
+        start = self.end
+        self.end += size
+        if self.end > self.capacity:
+            self.capacity = max(self.capacity * 2, self.end)
+        return start
+
+    def free(self, start: int, size: int):
+        """
+        Give back a range returned by ``allocate``.
+        """
+        index = bisect.bisect(self.free_ranges, (start, size))
+        if index < len(self.free_ranges) and self.free_ranges[index][0] == start + size:
+            size += self.free_ranges.pop(index)[1]
+        if index > 0:
+            previous_start, previous_size = self.free_ranges[index - 1]
+            if previous_start + previous_size == start:
+                start = previous_start
+                size += previous_size
+                index -= 1
+                del self.free_ranges[index]
+
+        if start + size == self.end:
+            self.end = start
+        else:
+            self.free_ranges.insert(index, (start, size))
 
 
 T = TypeVar('T', bound=Shape)
@@ -600,6 +683,12 @@ class ShapeElementList(Generic[T]):
     move and draw them as one. Do this when you want to create a more complex object
     out of simpler primitives. This also speeds rendering as all objects are drawn
     in one operation.
+
+    Single shapes can be moved and rotated with ``set_shape_transform``, and
+    changed with ``update_shape``, without rebuilding the list.
+
+    Shapes with the same mode and line width are drawn in the order they
+    were added.
     """
     def __init__(self):
         """
@@ -615,22 +704,34 @@ def __init__(self):
         self.program = shader.program(
             vertex_shader='''
                 #version 330
-                uniform mat4 Projection;
+                layout (std140) uniform Globals {
+                    mat4 Projection;
+                    float Time;
+                };
                 uniform vec2 Position;
                 uniform float Angle;
 
                 in vec2 in_vert;
                 in vec4 in_color;
 
+                // Transform of the shape the vertex belongs to
+                in vec2 in_offset;
+                in vec2 in_pivot;
+                in float in_angle;
+
                 out vec4 v_color;
-                void main() {
-                    float angle = radians(Angle);
-                    mat2 rotate = mat2(
+
+                mat2 rotation(float angle) {
+                    return mat2(
                         cos(angle), sin(angle),
                         -sin(angle), cos(angle)
                     );
-                   gl_Position = Projection * vec4(Position + (rotate * in_vert), 0.0, 1.0);
-                   v_color = in_color;
+                }
+
+                void main() {
+                    vec2 vert = in_pivot + rotation(in_angle) * (in_vert - in_pivot) + in_offset;
+                    gl_Position = Projection * vec4(Position + (rotation(radians(Angle)) * vert), 0.0, 1.0);
+                    v_color = in_color;
                 }
             ''',
             fragment_shader='''
@@ -642,79 +743,134 @@ def __init__(self):
                 }
             ''',
         )
-        # Could do much better using just one vbo and glDrawElementsBaseVertex
+        # The vertices of all the shapes are copied into one buffer. Shapes
+        # drawn with the same mode and line width are a batch, with an index
+        # buffer pointing at their vertices. A second buffer holds the
+        # transform of each vertex's shape.
+        self.vbo = None
+        self.transform_vbo = None
+        self._vertices = RangeAllocator()
+        self._vertex_ranges = {}
+        self._transforms = {}
         self.batches = defaultdict(_Batch)
-        self.dirties = set()
 
     def append(self, item: T):
         """
         Add a new shape to the list.
         """
         self.shape_list.append(item)
+
+        count = item.vao.num_vertices
+        start = self._allocate_vertices(item, count)
+        self.vbo.copy(item.vbo, count * _VERTEX_SIZE, offset=start * _VERTEX_SIZE)
+
         group = (item.mode, item.line_width)
-        self.batches[group].items.append(item)
-        self.dirties.add(group)
+        self.batches[group].add(item, start, count)
 
     def remove(self, item: T):
         """
         Remove a specific shape from the list.
         """
         self.shape_list.remove(item)
+
+        start, count = self._vertex_ranges.pop(item)
+        self._vertices.free(start, count)
+        self._transforms.pop(item, None)
+
         group = (item.mode, item.line_width)
-        self.batches[group].items.remove(item)
-        self.dirties.add(group)
-
-    def _refresh_shape(self, group):
-        # Create a buffer large enough to hold all the shapes buffers
-        batch = self.batches[group]
-        total_vbo_bytes = sum(s.vbo.size for s in batch.items)
-        vbo = shader.Buffer.create_with_size(total_vbo_bytes)
-        offset = 0
-        gl.glBindBuffer(gl.GL_COPY_WRITE_BUFFER, vbo.buffer_id)
-        # Copy all the shapes buffer in our own vbo
-        for shape in batch.items:
-            gl.glBindBuffer(gl.GL_COPY_READ_BUFFER, shape.vbo.buffer_id)
-            gl.glCopyBufferSubData(
-                gl.GL_COPY_READ_BUFFER,
-                gl.GL_COPY_WRITE_BUFFER,
-                gl.GLintptr(0),
-                gl.GLintptr(offset),
-                shape.vbo.size)
-            offset += shape.vbo.size
-
-        # Create an index buffer objet. It should count starting from 0. We need to
-        # use a reset_idx to indicate that a new shape will start.
-        reset_idx = 2 ** 32 - 1
-        indices = []
-        counter = itertools.count()
-        for shape in batch.items:
-            indices.extend(itertools.islice(counter, shape.vao.num_vertices))
-            indices.append(reset_idx)
-        del indices[-1]
-        indices = np.array(indices)
-        ibo = shader.Buffer(indices.astype('i4').tobytes())
+        self.batches[group].remove(item)
 
-        vao_content = [
-            shader.BufferDescription(
-                vbo,
-                '2f 4B',
-                ('in_vert', 'in_color'),
-                normalized=['in_color']
-            )
-        ]
-        vao = shader.vertex_array(self.program, vao_content, ibo)
-        with self.program:
-            self.program['Projection'] = get_projection().flatten()
-            self.program['Position'] = [self.center_x, self.center_y]
-            self.program['Angle'] = self.angle
-
-        batch.shape.vao = vao
-        batch.shape.vbo = vbo
-        batch.shape.ibo = ibo
-        batch.shape.program = self.program
-        mode, line_width = group
-        batch.shape.mode = mode
-        batch.shape.line_width = line_width
+    def set_shape_transform(self, item: T, offset_x: float = 0, offset_y: float = 0,
+                            angle: float = 0, pivot_x: float = 0, pivot_y: float = 0):
+        """
+        Move and rotate one shape of the list. This is done before the list
+        itself is moved and rotated.
+
+        :param item: Shape in the list.
+        :param offset_x: Amount to move the shape on the x axis.
+        :param offset_y: Amount to move the shape on the y axis.
+        :param angle: Angle in degrees to rotate the shape.
+        :param pivot_x: x coordinate of the point the shape rotates around.
+        :param pivot_y: y coordinate of the point the shape rotates around.
+        """
+        start, count = self._vertex_ranges[item]
+        transform = np.array([((offset_x, offset_y), (pivot_x, pivot_y), math.radians(angle))],
+                             dtype=TRANSFORM_DATA_TYPE)
+        self._transforms[item] = transform
+        self.transform_vbo.write(np.tile(transform, count), start * _TRANSFORM_SIZE)
+
+    def update_shape(self, item: T, points: PointList = None, colors: Iterable[Color] = None):
+        """
+        Change the points or colors of a shape in the list. Only the vertices
+        of that shape are sent to the graphics card again.
+
+        The shape is given a new ``data`` array, so an array taken from it
+        before isn't changed. Other lists holding the shape are not changed.
+
+        :param item: Shape in the list.
+        :param points: New points of the shape, or None to keep them.
+        :param colors: New colors, one for each point, or None to keep them.
+         Needed if the number of points changes.
+        """
+        if item.data is not None:
+            data = item.data.copy()
+        else:
+            data = np.frombuffer(item.vbo.read(item.vbo.size), dtype=VERTEX_DATA_TYPE).copy()
+        if points is not None and len(points) != len(data):
+            if colors is None:
+                raise ValueError("Colors are needed when the number of points changes.")
+            data = np.zeros(len(points), dtype=VERTEX_DATA_TYPE)
+        if points is not None:
+            data['vertex'] = points
+        if colors is not None:
+            data['color'] = get_four_byte_colors(colors, len(data))
+        item.data = data
+
+        start, count = self._vertex_ranges[item]
+        if len(data) == count:
+            item.vbo.write(data)
+        else:
+            item.vbo = shader.buffer(data)
+            vao_content = [
+                shader.BufferDescription(
+                    item.vbo,
+                    '2f 4B',
+                    ('in_vert', 'in_color'),
+                    normalized=['in_color']
+                )
+            ]
+            item.vao = shader.vertex_array(item.program, vao_content)
+
+            # Move the shape to vertices of the new size
+            self._vertices.free(start, count)
+            count = len(data)
+            start = self._allocate_vertices(item, count)
+            self.batches[(item.mode, item.line_width)].move(item, start, count)
+
+        self.vbo.write(data, start * _VERTEX_SIZE)
+
+    def _allocate_vertices(self, item: T, count: int) -> int:
+        start = self._vertices.allocate(count)
+        if self.vbo is None or self.vbo.size < self._vertices.capacity * _VERTEX_SIZE:
+            self._grow_vbo()
+        self._vertex_ranges[item] = start, count
+
+        transform = self._transforms.get(item, _IDENTITY_TRANSFORM)
+        self.transform_vbo.write(np.tile(transform, count), start * _TRANSFORM_SIZE)
+        return start
+
+    def _grow_vbo(self):
+        capacity = self._vertices.capacity
+        vbo = shader.Buffer.create_with_size(capacity * _VERTEX_SIZE, usage='dynamic')
+        transform_vbo = shader.Buffer.create_with_size(capacity * _TRANSFORM_SIZE, usage='dynamic')
+        if self.vbo is not None:
+            vbo.copy(self.vbo, self.vbo.size)
+            transform_vbo.copy(self.transform_vbo, self.transform_vbo.size)
+        self.vbo = vbo
+        self.transform_vbo = transform_vbo
+        # Vertex arrays are made again for the new buffers when drawn
+        for batch in self.batches.values():
+            batch.shape.vao = None
 
     def move(self, change_x: float, change_y: float):
         """
@@ -740,10 +896,17 @@ def draw(self):
         """
         Draw everything in the list.
         """
-        for group in self.dirties:
-            self._refresh_shape(group)
-        self.dirties.clear()
-        for batch in self.batches.values():
+        # Other shape element lists share the program, so set our uniforms
+        # before drawing
+        with self.program:
+            self.program['Position'] = [self._center_x, self._center_y]
+            self.program['Angle'] = self._angle
+        for group, batch in self.batches.items():
+            if batch.end == 0:
+                continue
+            if batch.shape.vao is None:
+                batch.create_vao(self.program, self.vbo, self.transform_vbo, group)
+            batch.shape.vertices = batch.end
             batch.shape.draw()
 
     def _get_center_x(self) -> float:
@@ -753,8 +916,6 @@ def _get_center_x(self) -> float:
     def _set_center_x(self, value: float):
         """Set the center x coordinate of the ShapeElementList."""
         self._center_x = value
-        with self.program:
-            self.program['Position'] = [self._center_x, self._center_y]
 
     center_x = property(_get_center_x, _set_center_x)
 
@@ -765,8 +926,6 @@ def _get_center_y(self) -> float:
     def _set_center_y(self, value: float):
         """Set the center y coordinate of the ShapeElementList."""
         self._center_y = value
-        with self.program:
-            self.program['Position'] = [self._center_x, self._center_y]
 
     center_y = property(_get_center_y, _set_center_y)
 
@@ -777,13 +936,114 @@ def _get_angle(self) -> float:
     def _set_angle(self, value: float):
         """Set the angle of the ShapeElementList in degrees."""
         self._angle = value
-        with self.program:
-            self.program['Angle'] = self._angle
 
     angle = property(_get_angle, _set_angle)
 
 
+def _get_shape_indices(vertex_start: int, vertex_count: int) -> np.ndarray:
+    """ Indices of a shape's vertices, and a restart index to end its primitive. """
+    indices = np.arange(vertex_start, vertex_start + vertex_count + 1, dtype=np.uint32)
+    indices[-1] = _RESTART_INDEX
+    return indices
+
+
 class _Batch(Generic[T]):
+    """
+    Shapes of a ``ShapeElementList`` drawn with the same mode and line width,
+    and their ranges in the batch's index buffer.
+
+    Shapes are drawn in the order they were added, so new ranges are always
+    taken from the end. Removed shapes leave restart indices behind, and the
+    indices are written again without the gaps when the gaps are over half
+    of them.
+    """
     def __init__(self):
         self.shape = Shape()
         self.items = []
+        self.ibo = None
+        # Number of indices to draw, gaps included
+        self.end = 0
+        self._gaps = 0
+        # Index range and first vertex of each shape
+        self._index_ranges = {}
+
+    def add(self, item: T, vertex_start: int, vertex_count: int):
+        self.items.append(item)
+
+        # A restart index after each shape starts a new primitive
+        count = vertex_count + 1
+        start = self.end
+        self._reserve(start + count)
+        self._write(item, start, vertex_start, vertex_count)
+        self.end = start + count
+
+    def move(self, item: T, vertex_start: int, vertex_count: int):
+        """ Point a shape at its new vertices, keeping its place in the draw order. """
+        start, count, _ = self._index_ranges[item]
+        if vertex_count + 1 == count:
+            self._write(item, start, vertex_start, vertex_count)
+        else:
+            self._index_ranges[item] = start, vertex_count + 1, vertex_start
+            self._compact()
+
+    def remove(self, item: T):
+        self.items.remove(item)
+
+        start, count, _ = self._index_ranges.pop(item)
+        if start + count == self.end:
+            self.end = start
+        else:
+            # Ranges after it are still drawn, so fill the gap with restart indices
+            self.ibo.write(np.full(count, _RESTART_INDEX, dtype=np.uint32), start * 4)
+            self._gaps += count
+        if self._gaps * 2 > self.end:
+            self._compact()
+
+    def _write(self, item: T, start: int, vertex_start: int, vertex_count: int):
+        self.ibo.write(_get_shape_indices(vertex_start, vertex_count), start * 4)
+        self._index_ranges[item] = start, vertex_count + 1, vertex_start
+
+    def _compact(self):
+        parts = []
+        start = 0
+        for item in self.items:
+            _, count, vertex_start = self._index_ranges[item]
+            parts.append(_get_shape_indices(vertex_start, count - 1))
+            self._index_ranges[item] = start, count, vertex_start
+            start += count
+        self.end = start
+        self._gaps = 0
+        if parts:
+            self._reserve(self.end)
+            self.ibo.write(np.concatenate(parts))
+
+    def _reserve(self, size: int):
+        if self.ibo is not None and self.ibo.size >= size * 4:
+            return
+        capacity = size if self.ibo is None else max(size, self.ibo.size // 4 * 2)
+        ibo = shader.Buffer.create_with_size(capacity * 4, usage='dynamic')
+        if self.ibo is not None:
+            ibo.copy(self.ibo, self.ibo.size)
+        self.ibo = ibo
+        self.shape.vao = None
+
+    def create_vao(self, program: shader.Program, vbo: shader.Buffer,
+                   transform_vbo: shader.Buffer, group):
+        vao_content = [
+            shader.BufferDescription(
+                vbo,
+                '2f 4B',
+                ('in_vert', 'in_color'),
+                normalized=['in_color']
+            ),
+            shader.BufferDescription(
+                transform_vbo,
+                '2f 2f 1f',
+                ('in_offset', 'in_pivot', 'in_angle')
+            )
+        ]
+        self.shape.vao = shader.vertex_array(program, vao_content, self.ibo)
+        self.shape.vbo = vbo
+        self.shape.ibo = self.ibo
+        self.shape.program = program
+        self.shape.mode, self.shape.line_width = group
@@ -2,12 +2,14 @@
 This module contains commands for basic graphics drawing commands.
 (Drawing primitives.)
 
-Many of these commands are slow, because they load everything to the
-graphics card each time a shape is drawn. For faster drawing, see the
+These commands are batched: shapes are collected and sent to the graphics
+card together, before anything else is drawn or when the frame is finished.
+They still compute every shape again each frame. For faster drawing, see the
 Buffered Draw Commands.
 """
 # pylint: disable=too-many-arguments, too-many-locals, too-few-public-methods
 
+import functools
 import math
 import PIL.Image
 import PIL.ImageOps
@@ -18,18 +20,26 @@
 
 from typing import List
 
-from arcade.window_commands import get_projection
 from arcade.window_commands import get_window
+from arcade.window_commands import flush_batched_draws
+from arcade.window_commands import set_pending_batch
 from arcade.arcade_types import Color
 from arcade.arcade_types import PointList
 from arcade import shader
-from arcade.earclip import earclip
+from arcade.earclip import triangulate
+from arcade.polyline import LINE_CAP_BUTT
+from arcade.polyline import LINE_JOIN_MITER
+from arcade.polyline import tessellate_line_strip
+from arcade.polyline import tessellate_lines
 from arcade.utils import *
 
 
 line_vertex_shader = '''
     #version 330
-    uniform mat4 Projection;
+    layout (std140) uniform Globals {
+        mat4 Projection;
+        float Time;
+    };
     in vec2 in_vert;
     in vec4 in_color;
     out vec4 v_color;
@@ -69,6 +79,36 @@ def get_four_byte_color(color: Color) -> Color:
         raise ValueError("This isn't a 3 or 4 byte color")
 
 
+def get_four_byte_colors(colors, count: int = None) -> np.ndarray:
+    """
+    Get colors as an array of shape (N, 4) with a uint8 type. An array that
+    already is one is returned as it is.
+
+    Args:
+        colors: One color, a list of colors, or an array of shape (N, 3)
+         or (N, 4).
+        count: Number of times to repeat a single color.
+
+    Returns:
+        return: Array of RGBA colors.
+    """
+    if isinstance(colors, np.ndarray) and colors.ndim == 2:
+        if colors.shape[1] == 4:
+            return np.ascontiguousarray(colors, dtype=np.uint8)
+        elif colors.shape[1] == 3:
+            four_byte_colors = np.full((len(colors), 4), 255, dtype=np.uint8)
+            four_byte_colors[:, :3] = colors
+            return four_byte_colors
+        else:
+            raise ValueError("This isn't an array of 3 or 4 byte colors")
+
+    if len(colors) in (3, 4) and not hasattr(colors[0], '__len__'):
+        color = np.array(get_four_byte_color(colors), dtype=np.uint8)
+        return np.tile(color, (1 if count is None else count, 1))
+
+    return np.array([get_four_byte_color(color) for color in colors], dtype=np.uint8)
+
+
 def get_four_float_color(color: Color) -> (float, float, float, float):
     """
     Given a 3 or 4 RGB/RGBA color where each color goes 0-255, this
@@ -152,6 +192,8 @@ def draw(self, center_x: float, center_y: float, width: float,
              alpha: float=1, transparent: bool=True,
              repeat_count_x=1, repeat_count_y=1):
         """
+        Draw the texture. It is added to the immediate mode texture batch, and
+        drawn together with the textures drawn after it.
 
         Args:
             center_x:
@@ -170,6 +212,14 @@ def draw(self, center_x: float, center_y: float, width: float,
 
         from arcade.sprite import Sprite
         from arcade.sprite_list import SpriteList
+        from arcade.texture_batch import get_texture_batch
+
+        try:
+            get_texture_batch().add(self, center_x, center_y, width, height, angle)
+            return
+        except ValueError:
+            # Too big for the atlas, so draw it on its own
+            pass
 
         if self._sprite is None:
             self._sprite = Sprite()
@@ -455,36 +505,16 @@ def draw_arc_filled(center_x: float, center_y: float,
         :start_angle: start angle of the arc in degrees.
         :end_angle: end angle of the arc in degrees.
         :tilt_angle: angle the arc is tilted.
+        :num_segments: Not used any more. The edge of the arc is
+         worked out for each pixel, so it is smooth at any size.
     Returns:
         None
     Raises:
         None
     """
-    unrotated_point_list = [[0, 0]]
-
-    start_segment = int(start_angle / 360 * num_segments)
-    end_segment = int(end_angle / 360 * num_segments)
-
-    for segment in range(start_segment, end_segment + 1):
-        theta = 2.0 * 3.1415926 * segment / num_segments
-
-        x = width * math.cos(theta)
-        y = height * math.sin(theta)
-
-        unrotated_point_list.append((x, y))
-
-    if tilt_angle == 0:
-        uncentered_point_list = unrotated_point_list
-    else:
-        uncentered_point_list = []
-        for point in unrotated_point_list:
-            uncentered_point_list.append(rotate_point(point[0], point[1], 0, 0, tilt_angle))
-
-    point_list = []
-    for point in uncentered_point_list:
-        point_list.append((point[0] + center_x, point[1] + center_y))
-
-    _generic_draw_line_strip(point_list, color, gl.GL_TRIANGLE_FAN)
+    from arcade.sdf_shapes import get_sdf_shape_batch
+    get_sdf_shape_batch().append_arc(center_x, center_y, width, height, color,
+                                     start_angle, end_angle, tilt_angle=tilt_angle)
 
 
 def draw_arc_outline(center_x: float, center_y: float, width: float,
@@ -506,45 +536,16 @@ def draw_arc_outline(center_x: float, center_y: float, width: float,
         :end_angle: end angle of the arc in degrees.
         :border_width: width of line in pixels.
         :angle: angle the arc is tilted.
+        :num_segments: Not used any more. The edge of the arc is
+         worked out for each pixel, so it is smooth at any size.
     Returns:
         None
     Raises:
         None
     """
-    unrotated_point_list = []
-
-    start_segment = int(start_angle / 360 * num_segments)
-    end_segment = int(end_angle / 360 * num_segments)
-
-    inside_width = width - border_width / 2
-    outside_width = width + border_width / 2
-    inside_height = height - border_width / 2
-    outside_height = height + border_width / 2
-
-    for segment in range(start_segment, end_segment + 1):
-        theta = 2.0 * math.pi * segment / num_segments
-
-        x1 = inside_width * math.cos(theta)
-        y1 = inside_height * math.sin(theta)
-
-        x2 = outside_width * math.cos(theta)
-        y2 = outside_height * math.sin(theta)
-
-        unrotated_point_list.append((x1, y1))
-        unrotated_point_list.append((x2, y2))
-
-    if tilt_angle == 0:
-        uncentered_point_list = unrotated_point_list
-    else:
-        uncentered_point_list = []
-        for point in unrotated_point_list:
-            uncentered_point_list.append(rotate_point(point[0], point[1], 0, 0, tilt_angle))
-
-    point_list = []
-    for point in uncentered_point_list:
-        point_list.append((point[0] + center_x, point[1] + center_y))
-
-    _generic_draw_line_strip(point_list, color, gl.GL_TRIANGLE_STRIP)
+    from arcade.sdf_shapes import get_sdf_shape_batch
+    get_sdf_shape_batch().append_arc(center_x, center_y, width, height, color,
+                                     start_angle, end_angle, border_width, tilt_angle)
 
 
 # --- END ARC FUNCTIONS # # #
@@ -625,8 +626,6 @@ def draw_circle_filled(center_x: float, center_y: float, radius: float,
         :radius: width of the circle.
         :color: color, specified in a list of 3 or 4 bytes in RGB or
          RGBA format.
-        :num_segments (int): float of triangle segments that make up this
-         circle. Higher is better quality, but slower render time.
     Returns:
         None
     Raises:
@@ -649,8 +648,6 @@ def draw_circle_outline(center_x: float, center_y: float, radius: float,
         :color: color, specified in a list of 3 or 4 bytes in RGB or
          RGBA format.
         :border_width: Width of the circle outline in pixels.
-        :num_segments: float of triangle segments that make up this
-         circle. Higher is better quality, but slower render time.
     Returns:
         None
     Raises:
@@ -667,6 +664,46 @@ def draw_circle_outline(center_x: float, center_y: float, radius: float,
 
 # --- BEGIN ELLIPSE FUNCTIONS # # #
 
+@functools.lru_cache(maxsize=64)
+def get_unit_circle(num_segments: int) -> np.ndarray:
+    """
+    Return points evenly spaced around a circle with a radius of 1, starting
+    at angle 0. The table is only worked out once for each number of segments.
+
+    :param num_segments: Number of points.
+    :return: Read-only array of shape (num_segments, 2).
+    """
+    theta = np.arange(num_segments) * (2 * math.pi / num_segments)
+    points = np.column_stack((np.cos(theta), np.sin(theta)))
+    points.setflags(write=False)
+    return points
+
+
+@functools.lru_cache(maxsize=256)
+def get_ellipse_points(center_x: float, center_y: float, width: float, height: float,
+                       tilt_angle: float = 0, num_segments: int = 32) -> np.ndarray:
+    """
+    Return the points around an ellipse. Recently used ellipses are kept, so
+    asking for the same one again doesn't work it out again.
+
+    :param center_x: x position of the center.
+    :param center_y: y position of the center.
+    :param width: Horizontal radius of the ellipse.
+    :param height: Vertical radius of the ellipse.
+    :param tilt_angle: Angle in degrees to tilt the ellipse.
+    :param num_segments: Number of points.
+    :return: Read-only array of shape (num_segments, 2).
+    """
+    points = get_unit_circle(num_segments) * (width, height)
+    if tilt_angle:
+        angle = math.radians(tilt_angle)
+        cos, sin = math.cos(angle), math.sin(angle)
+        points = points @ np.array([[cos, sin], [-sin, cos]])
+    points = points + (center_x, center_y)
+    points.setflags(write=False)
+    return points
+
+
 def draw_ellipse_filled(center_x: float, center_y: float,
                         width: float, height: float, color: Color,
                         tilt_angle: float = 0, num_segments: int = 128):
@@ -681,36 +718,16 @@ def draw_ellipse_filled(center_x: float, center_y: float,
         :color: color, specified in a list of 3 or 4 bytes in RGB or
          RGBA format.
         :angle: Angle in degrees to tilt the ellipse.
-        :num_segments: float of triangle segments that make up this
-         circle. Higher is better quality, but slower render time.
+        :num_segments: Not used any more. The edge of the ellipse is
+         worked out for each pixel, so it is smooth at any size.
     Returns:
         None
     Raises:
         None
     """
-
-    unrotated_point_list = []
-
-    for segment in range(num_segments):
-        theta = 2.0 * 3.1415926 * segment / num_segments
-
-        x = width * math.cos(theta)
-        y = height * math.sin(theta)
-
-        unrotated_point_list.append((x, y))
-
-    if tilt_angle == 0:
-        uncentered_point_list = unrotated_point_list
-    else:
-        uncentered_point_list = []
-        for point in unrotated_point_list:
-            uncentered_point_list.append(rotate_point(point[0], point[1], 0, 0, tilt_angle))
-
-    point_list = []
-    for point in uncentered_point_list:
-        point_list.append((point[0] + center_x, point[1] + center_y))
-
-    _generic_draw_line_strip(point_list, color, gl.GL_TRIANGLE_FAN)
+    from arcade.sdf_shapes import get_sdf_shape_batch
+    get_sdf_shape_batch().append_ellipse(center_x, center_y, width, height, color,
+                                         tilt_angle=tilt_angle)
 
 
 def draw_ellipse_outline(center_x: float, center_y: float, width: float,
@@ -729,76 +746,154 @@ def draw_ellipse_outline(center_x: float, center_y: float, width: float,
          RGBA format.
         :border_width: Width of the circle outline in pixels.
         :tilt_angle: Angle in degrees to tilt the ellipse.
+        :num_segments: Not used any more. The edge of the ellipse is
+         worked out for each pixel, so it is smooth at any size.
     Returns:
         None
     Raises:
         None
     """
+    from arcade.sdf_shapes import get_sdf_shape_batch
+    get_sdf_shape_batch().append_ellipse(center_x, center_y, width, height, color,
+                                         border_width, tilt_angle)
 
-    if border_width == 1:
-        unrotated_point_list = []
-
-        for segment in range(num_segments):
-            theta = 2.0 * 3.1415926 * segment / num_segments
+# --- END ELLIPSE FUNCTIONS # # #
 
-            x = width * math.cos(theta)
-            y = height * math.sin(theta)
 
-            unrotated_point_list.append((x, y))
+# --- BEGIN LINE FUNCTIONS # # #
 
-        if tilt_angle == 0:
-            uncentered_point_list = unrotated_point_list
+@functools.lru_cache(maxsize=256)
+def _get_primitive_indices(mode: int, count: int) -> np.ndarray:
+    """
+    Return the indices that turn ``count`` vertices drawn with ``mode`` into
+    a list of separate triangles or lines.
+    """
+    if mode == gl.GL_TRIANGLE_STRIP:
+        return (np.arange(count - 2)[:, None] + (0, 1, 2)).ravel()
+    if mode == gl.GL_TRIANGLE_FAN:
+        indices = np.zeros((count - 2, 3), dtype=np.int64)
+        indices[:, 1] = np.arange(1, count - 1)
+        indices[:, 2] = np.arange(2, count)
+        return indices.ravel()
+    if mode == gl.GL_LINE_STRIP:
+        return (np.arange(count - 1)[:, None] + (0, 1)).ravel()
+    if mode == gl.GL_LINE_LOOP:
+        return (np.arange(count)[:, None] + (0, 1)).ravel() % count
+    return np.arange(count)
+
+
+_TRIANGLE_MODES = (gl.GL_TRIANGLES, gl.GL_TRIANGLE_STRIP, gl.GL_TRIANGLE_FAN)
+_LINE_MODES = (gl.GL_LINES, gl.GL_LINE_STRIP, gl.GL_LINE_LOOP)
+
+
+class _PrimitiveBatch:
+    """
+    Command buffer for the immediate mode draw commands.
+
+    Each primitive is turned into separate triangles or lines and appended,
+    with its color on every vertex. Consecutive primitives of the same kind
+    are drawn together in one call when the batch is flushed.
+    """
+    vertex_type = np.dtype([('vertex', '2f4'), ('color', '4B')])
+
+    def __init__(self, capacity: int = 4096):
+        # Kept apart while adding, which is cheaper than writing into the
+        # fields of a structured array, and interleaved when flushed
+        self.vertices = np.zeros((capacity, 2), dtype=np.float32)
+        self.colors = np.zeros((capacity, 4), dtype=np.uint8)
+        self.count = 0
+        self.mode = gl.GL_TRIANGLES
+
+        self.program = None
+        self.stream = None
+        self._vaos = []
+
+    def add(self, point_list: PointList, color: Color, mode: int):
+        points = np.asarray(point_list, dtype=np.float32).reshape(-1, 2)
+        if mode in _TRIANGLE_MODES:
+            if len(points) < 3:
+                return
+            batch_mode = gl.GL_TRIANGLES
+        elif mode in _LINE_MODES:
+            if len(points) < 2:
+                return
+            batch_mode = gl.GL_LINES
         else:
-            uncentered_point_list = []
-            for point in unrotated_point_list:
-                uncentered_point_list.append(rotate_point(point[0], point[1], 0, 0, tilt_angle))
-
-        point_list = []
-        for point in uncentered_point_list:
-            point_list.append((point[0] + center_x, point[1] + center_y))
-
-        _generic_draw_line_strip(point_list, color, gl.GL_LINE_LOOP)
-    else:
-
-        unrotated_point_list = []
-
-        start_segment = 0
-        end_segment = num_segments
-
-        inside_width = width - border_width / 2
-        outside_width = width + border_width / 2
-        inside_height = height - border_width / 2
-        outside_height = height + border_width / 2
-
-        for segment in range(start_segment, end_segment + 1):
-            theta = 2.0 * math.pi * segment / num_segments
-
-            x1 = inside_width * math.cos(theta)
-            y1 = inside_height * math.sin(theta)
-
-            x2 = outside_width * math.cos(theta)
-            y2 = outside_height * math.sin(theta)
-
-            unrotated_point_list.append((x1, y1))
-            unrotated_point_list.append((x2, y2))
-
-        if tilt_angle == 0:
-            uncentered_point_list = unrotated_point_list
+            raise ValueError(f"Can't batch primitives of mode {mode}.")
+
+        # Triangles and lines can't share a draw call, so a change of kind
+        # draws what came before
+        if batch_mode != self.mode:
+            self.flush()
+            self.mode = batch_mode
+        set_pending_batch(self)
+
+        # An array of colors has one color for each point
+        per_point_colors = isinstance(color, np.ndarray) and color.ndim == 2
+        if per_point_colors:
+            colors = get_four_byte_colors(color)
+            if len(colors) != len(points):
+                raise ValueError(f"Need one color for each of the {len(points)} points, got {len(colors)}.")
         else:
-            uncentered_point_list = []
-            for point in unrotated_point_list:
-                uncentered_point_list.append(rotate_point(point[0], point[1], 0, 0, tilt_angle))
-
-        point_list = []
-        for point in uncentered_point_list:
-            point_list.append((point[0] + center_x, point[1] + center_y))
-
-        _generic_draw_line_strip(point_list, color, gl.GL_TRIANGLE_STRIP)
-
-# --- END ELLIPSE FUNCTIONS # # #
+            colors = get_four_byte_color(color)
 
+        if mode in (gl.GL_TRIANGLES, gl.GL_LINES):
+            vertices = points
+        else:
+            indices = _get_primitive_indices(mode, len(points))
+            vertices = points[indices]
+            if per_point_colors:
+                colors = colors[indices]
+
+        end = self.count + len(vertices)
+        if end > len(self.vertices):
+            capacity = max(end, len(self.vertices) * 2)
+            self.vertices = np.resize(self.vertices, (capacity, 2))
+            self.colors = np.resize(self.colors, (capacity, 4))
+        self.vertices[self.count:end] = vertices
+        self.colors[self.count:end] = colors
+        self.count = end
+
+    def flush(self):
+        """ Draw the waiting primitives and empty the batch. """
+        if self.count == 0:
+            return
+
+        if self.program is None:
+            self.program = shader.program(
+                vertex_shader=line_vertex_shader,
+                fragment_shader=line_fragment_shader,
+            )
+
+        capacity_bytes = len(self.vertices) * self.vertex_type.itemsize
+        if self.stream is None or self.stream.size < capacity_bytes:
+            self.stream = shader.stream_buffer(capacity_bytes)
+            self._vaos = []
+            for vbo in self.stream.buffers:
+                vbo_desc = shader.BufferDescription(
+                    vbo,
+                    '2f 4B',
+                    ('in_vert', 'in_color'),
+                    normalized=['in_color']
+                )
+                self._vaos.append(shader.vertex_array(self.program, [vbo_desc]))
+
+        vertices = self.count
+        self.count = 0
+        data = np.empty(vertices, dtype=self.vertex_type)
+        data['vertex'] = self.vertices[:vertices]
+        data['color'] = self.colors[:vertices]
+        slot = self.stream.write(data)
+        vao = self._vaos[slot]
+
+        with vao:
+            vao.render(mode=self.mode, vertices=vertices)
+
+        self.stream.fence()
+
+
+_primitive_batch = _PrimitiveBatch()
 
-# --- BEGIN LINE FUNCTIONS # # #
 
 def _generic_draw_line_strip(point_list: PointList,
                              color: Color,
@@ -807,95 +902,52 @@ def _generic_draw_line_strip(point_list: PointList,
     Draw a line strip. A line strip is a set of continuously connected
     line segments.
 
+    The points are added to the immediate mode primitive batch, and drawn
+    together with the primitives drawn after them.
+
     Args:
         :point_list: List of points making up the line. Each point is
-         in a list. So it is a list of lists.
+         in a list. So it is a list of lists. Can also be an array
+         of shape (N, 2).
         :color: color, specified in a list of 3 or 4 bytes in RGB or
-         RGBA format.
-        :border_width: Width of the line in pixels.
+         RGBA format. An array of shape (N, 3) or (N, 4) gives each point
+         its own color.
+        :mode: OpenGL primitive the points make up.
     Returns:
         None
     Raises:
-        None
+        ValueError: There isn't one color for each point.
     """
-    program = shader.program(
-        vertex_shader=line_vertex_shader,
-        fragment_shader=line_fragment_shader,
-    )
-    buffer_type = np.dtype([('vertex', '2f4'), ('color', '4B')])
-    data = np.zeros(len(point_list), dtype=buffer_type)
-
-    data['vertex'] = point_list
-
-    color = get_four_byte_color(color)
-    data['color'] = color
-
-    vbo = shader.buffer(data.tobytes())
-    vbo_desc = shader.BufferDescription(
-        vbo,
-        '2f 4B',
-        ('in_vert', 'in_color'),
-        normalized=['in_color']
-    )
-
-    vao_content = [vbo_desc]
-
-    vao = shader.vertex_array(program, vao_content)
-    with vao:
-        program['Projection'] = get_projection().flatten()
-
-        vao.render(mode=mode)
+    _primitive_batch.add(point_list, color, mode)
 
 
 def draw_line_strip(point_list: PointList,
-                    color: Color, line_width: float = 1):
+                    color: Color, line_width: float = 1,
+                    join: str = LINE_JOIN_MITER, cap: str = LINE_CAP_BUTT):
     """
     Draw a multi-point line.
 
     Args:
-        point_list:
-        color:
+        point_list: List of points, or an array of shape (N, 2).
+        color: Color of the line. With a line_width of 1, an array of
+         shape (N, 3) or (N, 4) gives each point its own color.
         line_width:
+        join: How segments of wide lines are joined. LINE_JOIN_MITER,
+         LINE_JOIN_BEVEL or LINE_JOIN_ROUND.
+        cap: How the ends of wide lines look. LINE_CAP_BUTT, LINE_CAP_SQUARE
+         or LINE_CAP_ROUND.
     """
     if line_width == 1:
         _generic_draw_line_strip(point_list, color, gl.GL_LINE_STRIP)
+    elif isinstance(color, np.ndarray) and color.ndim == 2:
+        raise ValueError("A color for each point needs a line_width of 1.")
     else:
-        triangle_point_list = []
-        # This needs a lot of improvement
-        last_point = None
-        for point in point_list:
-            if last_point is not None:
-                points = _get_points_for_thick_line(last_point[0], last_point[1], point[0], point[1], line_width)
-                reordered_points = points[1], points[0], points[2], points[3]
-                triangle_point_list.extend(reordered_points)
-            last_point = point
-        _generic_draw_line_strip(triangle_point_list, color, gl.GL_TRIANGLE_STRIP)
-
-
-def _get_points_for_thick_line(start_x: float, start_y:
-                               float, end_x: float, end_y: float,
-                               line_width: float):
-    vector_x = start_x - end_x
-    vector_y = start_y - end_y
-    perpendicular_x = vector_y
-    perpendicular_y = -vector_x
-    length = math.sqrt(vector_x * vector_x + vector_y * vector_y)
-    normal_x = perpendicular_x / length
-    normal_y = perpendicular_y / length
-    r1_x = start_x + normal_x * line_width / 2
-    r1_y = start_y + normal_y * line_width / 2
-    r2_x = start_x - normal_x * line_width / 2
-    r2_y = start_y - normal_y * line_width / 2
-    r3_x = end_x + normal_x * line_width / 2
-    r3_y = end_y + normal_y * line_width / 2
-    r4_x = end_x - normal_x * line_width / 2
-    r4_y = end_y - normal_y * line_width / 2
-    points = (r1_x, r1_y), (r2_x, r2_y), (r4_x, r4_y), (r3_x, r3_y)
-    return points
+        triangle_point_list = tessellate_line_strip(point_list, line_width, join, cap)
+        _generic_draw_line_strip(triangle_point_list, color, gl.GL_TRIANGLES)
 
 
 def draw_line(start_x: float, start_y: float, end_x: float, end_y: float,
-              color: Color, line_width: float = 1):
+              color: Color, line_width: float = 1, cap: str = LINE_CAP_BUTT):
     """
     Draw a line.
 
@@ -907,22 +959,22 @@ def draw_line(start_x: float, start_y: float, end_x: float, end_y: float,
         :color: color, specified in a list of 3 or 4 bytes in RGB or
          RGBA format.
         :border_width: Width of the line in pixels.
+        :cap: How the ends of the line look. LINE_CAP_BUTT,
+         LINE_CAP_SQUARE or LINE_CAP_ROUND.
     Returns:
         None
     Raises:
-        None
+        ValueError: The cap isn't one of the LINE_CAP values.
 
     """
-
-    # points = (start_x, start_y), (end_x, end_y)
-    points = _get_points_for_thick_line(start_x, start_y, end_x, end_y, line_width)
-    triangle_point_list = points[1], points[0], points[2], points[3]
-    _generic_draw_line_strip(triangle_point_list, color, gl.GL_TRIANGLE_STRIP)
+    triangle_point_list = tessellate_lines(((start_x, start_y), (end_x, end_y)), line_width, cap)
+    _generic_draw_line_strip(triangle_point_list, color, gl.GL_TRIANGLES)
 
 
 def draw_lines(point_list: PointList,
                color: Color,
-               line_width: float=1):
+               line_width: float=1,
+               cap: str = LINE_CAP_BUTT):
     """
     Draw a set of lines.
 
@@ -934,23 +986,15 @@ def draw_lines(point_list: PointList,
         :color: color, specified in a list of 3 or 4 bytes in RGB or
          RGBA format.
         :border_width: Width of the line in pixels.
+        :cap: How the ends of the lines look. LINE_CAP_BUTT,
+         LINE_CAP_SQUARE or LINE_CAP_ROUND.
     Returns:
         None
     Raises:
         None
     """
-
-    triangle_point_list = []
-    last_point = None
-    for point in point_list:
-        if last_point is not None:
-            points = _get_points_for_thick_line(last_point[0], last_point[1], point[0], point[1], line_width)
-            reordered_points = points[1], points[0], points[2], points[0], points[2], points[3]
-            triangle_point_list.extend(reordered_points)
-            _generic_draw_line_strip(triangle_point_list, color, gl.GL_TRIANGLES)
-            last_point = None
-        else:
-            last_point = point
+    triangle_point_list = tessellate_lines(point_list, line_width, cap)
+    _generic_draw_line_strip(triangle_point_list, color, gl.GL_TRIANGLES)
 
 
 # --- BEGIN POINT FUNCTIONS # # #
@@ -974,18 +1018,6 @@ def draw_point(x: float, y: float, color: Color, size: float):
     draw_rectangle_filled(x, y, size / 2, size / 2, color)
 
 
-def _get_points_for_points(point_list, size):
-    new_point_list = []
-    hs = size / 2
-    for point in point_list:
-        x = point[0]
-        y = point[1]
-        new_point_list.append((x - hs, y - hs))
-        new_point_list.append((x + hs, y - hs))
-        new_point_list.append((x + hs, y + hs))
-    return new_point_list
-
-
 def draw_points(point_list: PointList,
                 color: Color, size: float = 1):
     """
@@ -993,17 +1025,20 @@ def draw_points(point_list: PointList,
 
     Args:
         :point_list: List of points Each point is
-         in a list. So it is a list of lists.
+         in a list. So it is a list of lists. Can also be an array
+         of shape (N, 2).
         :color: color, specified in a list of 3 or 4 bytes in RGB or
-         RGBA format.
-        :size: Size of the point in pixels.
+         RGBA format. An array of shape (N, 3) or (N, 4) gives each point
+         its own color.
+        :size: Size of the point in pixels, or an array with the size
+         of each point.
     Returns:
         None
     Raises:
         None
     """
-    new_point_list = _get_points_for_points(point_list, size)
-    _generic_draw_line_strip(new_point_list, color, gl.GL_TRIANGLES)
+    from arcade.point_batch import get_point_batch
+    get_point_batch().extend(point_list, color, size)
 
 
 # --- END POINT FUNCTIONS # # #
@@ -1012,7 +1047,7 @@ def draw_points(point_list: PointList,
 
 
 def draw_polygon_filled(point_list: PointList,
-                        color: Color):
+                        color: Color, holes: List[PointList] = None):
     """
     Draw a polygon that is filled in.
 
@@ -1021,15 +1056,15 @@ def draw_polygon_filled(point_list: PointList,
          in a list. So it is a list of lists.
         :color: color, specified in a list of 3 or 4 bytes in RGB or
          RGBA format.
+        :holes: List of point lists, one for each hole in the polygon.
     Returns:
         None
     Raises:
         None
     """
 
-    triangle_points = earclip(point_list)
-    flattened_list = [i for g in triangle_points for i in g]
-    _generic_draw_line_strip(flattened_list, color, gl.GL_TRIANGLES)
+    triangle_points = triangulate(point_list, holes)
+    _generic_draw_line_strip(triangle_points, color, gl.GL_TRIANGLES)
 
 
 def draw_polygon_outline(point_list: PointList,
@@ -1048,22 +1083,8 @@ def draw_polygon_outline(point_list: PointList,
     Raises:
         None
     """
-    new_point_list = [point for point in point_list]
-    new_point_list.append(point_list[0])
-
-    triangle_point_list = []
-    # This needs a lot of improvement
-    last_point = None
-    for point in new_point_list:
-        if last_point is not None:
-            points = _get_points_for_thick_line(last_point[0], last_point[1], point[0], point[1], line_width)
-            reordered_points = points[1], points[0], points[2], points[3]
-            triangle_point_list.extend(reordered_points)
-        last_point = point
-
-    points = _get_points_for_thick_line(new_point_list[0][0], new_point_list[0][1], new_point_list[1][0], new_point_list[1][1], line_width)
-    triangle_point_list.append(points[1])
-    _generic_draw_line_strip(triangle_point_list, color, gl.GL_TRIANGLE_STRIP)
+    triangle_point_list = tessellate_line_strip(point_list, line_width, closed=True)
+    _generic_draw_line_strip(triangle_point_list, color, gl.GL_TRIANGLES)
 
 
 def draw_triangle_filled(x1: float, y1: float,
@@ -1378,6 +1399,7 @@ def get_pixel(x: int, y: int):
     """
     Given an x, y, will return RGB color value of that point.
     """
+    flush_batched_draws()
     a = (gl.GLubyte * 3)(0)
     gl.glReadPixels(x, y, 1, 1, gl.GL_RGB, gl.GL_UNSIGNED_BYTE, a)
     red = a[0]
@@ -1397,6 +1419,7 @@ def get_image(x=0, y=0, width=None, height=None):
         image = get_image()
         image.save('screenshot.png', 'PNG')
     """
+    flush_batched_draws()
 
     # Get the dimensions
     window = get_window()
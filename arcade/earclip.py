@@ -1,11 +1,26 @@
 """
+Polygon triangulation by ear clipping, with support for holes.
 
-from: https://github.com/linuxlewis/tripy/blob/master/tripy.py
+Port of the earcut algorithm from: https://github.com/mapbox/earcut (ISC license)
+
+The polygon is kept in a doubly linked list, so clipping an ear is O(1). For
+larger polygons the vertices are also sorted along a z-order curve, so finding
+out whether a triangle is an ear only looks at the vertices near it.
 """
 
-from collections import namedtuple
+import functools
+import math
+
+import numpy as np
+
+from typing import List
+from typing import Sequence
+
+from arcade.arcade_types import PointList
+
+# Polygons with more points than this use z-order hashing
+_HASH_THRESHOLD = 80
 
-Point = namedtuple('Point', ['x', 'y'])
 
 def earclip(polygon):
     """
@@ -13,100 +28,604 @@ def earclip(polygon):
     polygon is expected to be an array of 2-tuples of the cartesian points of the polygon
     For a polygon with n points it will return n-2 triangles.
     The triangles are returned as an array of 3-tuples where each item in the tuple is a 2-tuple of the cartesian point.
+    """
+    points = [tuple(point) for point in polygon]
+    indices = earcut([coordinate for point in points for coordinate in point])
+    return [(points[indices[i]], points[indices[i + 1]], points[indices[i + 2]])
+            for i in range(0, len(indices), 3)]
+
+
+def triangulate(point_list: PointList, holes: Sequence[PointList] = None) -> np.ndarray:
+    """
+    Triangulate a polygon, which may have holes. The last 128 polygons are
+    kept with their triangles, so drawing the same polygon again is fast.
+
+    :param point_list: Points of the outline of the polygon.
+    :param holes: Outlines of holes in the polygon.
+    :return: Read-only array of shape (N * 3, 2), with the points of N triangles.
+    """
+    rings = [np.asarray(point_list, dtype=np.float64).reshape(-1, 2)]
+    if holes:
+        rings.extend(np.asarray(hole, dtype=np.float64).reshape(-1, 2) for hole in holes)
+    return _triangulate(b''.join(ring.tobytes() for ring in rings), tuple(len(ring) for ring in rings))
+
+
+@functools.lru_cache(maxsize=128)
+def _triangulate(data: bytes, ring_lengths: tuple) -> np.ndarray:
+    vertices = np.frombuffer(data, dtype=np.float64).reshape(-1, 2)
+    hole_indices = np.cumsum(ring_lengths[:-1]).tolist()
+    indices = earcut(vertices.ravel().tolist(), hole_indices)
+    triangles = vertices[np.array(indices, dtype=np.int64)]
+    triangles.setflags(write=False)
+    return triangles
+
+
+def earcut(data: List[float], hole_indices: List[int] = None, dim: int = 2) -> List[int]:
+    """
+    Triangulate a polygon given as a flat list of coordinates.
 
-    Implementation Reference:
-        - https://www.geometrictools.com/Documentation/TriangulationByEarClipping.pdf
+    :param data: Coordinates of the outline, followed by those of the holes.
+    :param hole_indices: Index of the first point of each hole.
+    :param dim: Number of coordinates per point.
+    :return: Indices of the points of the triangles, three per triangle.
     """
-    ear_vertex = []
+    has_holes = bool(hole_indices)
+    outer_length = hole_indices[0] * dim if has_holes else len(data)
+    outer_node = _linked_list(data, 0, outer_length, dim, True)
     triangles = []
 
-    polygon = [Point(*point) for point in polygon]
-
-    if _is_clockwise(polygon):
-        polygon.reverse()
-
-    point_count = len(polygon)
-    for i in range(point_count):
-        prev_index = i - 1
-        prev_point = polygon[prev_index]
-        point = polygon[i]
-        next_index = (i + 1) % point_count
-        next_point = polygon[next_index]
-
-        if _is_ear(prev_point, point, next_point, polygon):
-            ear_vertex.append(point)
-
-    while ear_vertex and point_count >= 3:
-        ear = ear_vertex.pop(0)
-        i = polygon.index(ear)
-        prev_index = i - 1
-        prev_point = polygon[prev_index]
-        next_index = (i + 1) % point_count
-        next_point = polygon[next_index]
-
-        polygon.remove(ear)
-        point_count -= 1
-        triangles.append(((prev_point.x, prev_point.y), (ear.x, ear.y), (next_point.x, next_point.y)))
-        if point_count > 3:
-            prev_prev_point = polygon[prev_index - 1]
-            next_next_index = (i + 1) % point_count
-            next_next_point = polygon[next_next_index]
-
-            groups = [
-                (prev_prev_point, prev_point, next_point, polygon),
-                (prev_point, next_point, next_next_point, polygon)
-            ]
-            for group in groups:
-                p = group[1]
-                if _is_ear(*group):
-                    if p not in ear_vertex:
-                        ear_vertex.append(p)
-                elif p in ear_vertex:
-                    ear_vertex.remove(p)
+    if outer_node is None or outer_node.next is outer_node.prev:
+        return triangles
+
+    if has_holes:
+        outer_node = _eliminate_holes(data, hole_indices, outer_node, dim)
+
+    min_x = min_y = inv_size = 0
+
+    # Hash the points of bigger polygons along a z-order curve
+    if len(data) > _HASH_THRESHOLD * dim:
+        xs = data[0:outer_length:dim]
+        ys = data[1:outer_length:dim]
+        min_x = min(xs)
+        min_y = min(ys)
+        inv_size = max(max(xs) - min_x, max(ys) - min_y)
+        inv_size = 32767 / inv_size if inv_size != 0 else 0
+
+    _earcut_linked(outer_node, triangles, dim, min_x, min_y, inv_size, 0)
     return triangles
 
 
-def _is_clockwise(polygon):
-    s = 0
-    polygon_count = len(polygon)
-    for i in range(polygon_count):
-        point = polygon[i]
-        point2 = polygon[(i + 1) % polygon_count]
-        s += (point2.x - point.x) * (point2.y + point.y)
-    return s > 0
+class _Node:
+    """ Vertex of the polygon, in the ring of vertices and in the z-order list. """
+    __slots__ = ('i', 'x', 'y', 'prev', 'next', 'z', 'prev_z', 'next_z', 'steiner')
+
+    def __init__(self, i, x, y):
+        # Index of the vertex in the coordinate list
+        self.i = i
+        self.x = x
+        self.y = y
+        self.prev = None
+        self.next = None
+        self.z = 0
+        self.prev_z = None
+        self.next_z = None
+        # Holes with a single point
+        self.steiner = False
+
+
+def _linked_list(data, start, end, dim, clockwise):
+    """ Create a ring of nodes in the given winding order. """
+    last = None
+    if clockwise == (_signed_area(data, start, end, dim) > 0):
+        for i in range(start, end, dim):
+            last = _insert_node(i, data[i], data[i + 1], last)
+    else:
+        for i in range(end - dim, start - 1, -dim):
+            last = _insert_node(i, data[i], data[i + 1], last)
+
+    if last is not None and _equals(last, last.next):
+        _remove_node(last)
+        last = last.next
+
+    return last
 
 
-def _is_convex(prev, point, next):
-    return _triangle_sum(prev.x, prev.y, point.x, point.y, next.x, next.y) < 0
+def _filter_points(start, end=None):
+    """ Remove duplicate and collinear points. """
+    if start is None:
+        return start
+    if end is None:
+        end = start
 
+    p = start
+    while True:
+        again = False
+        if not p.steiner and (_equals(p, p.next) or _area(p.prev, p, p.next) == 0):
+            _remove_node(p)
+            p = end = p.prev
+            if p is p.next:
+                break
+            again = True
+        else:
+            p = p.next
+        if not again and p is end:
+            break
 
-def _is_ear(p1, p2, p3, polygon):
-    ear = _contains_no_points(p1, p2, p3, polygon) and \
-            _is_convex(p1, p2, p3) and \
-            _triangle_area(p1.x, p1.y, p2.x, p2.y, p3.x, p3.y) > 0
-    return ear
+    return end
 
 
-def _contains_no_points(p1, p2, p3, polygon):
-    for pn in polygon:
-        if pn in (p1, p2, p3):
+def _earcut_linked(ear, triangles, dim, min_x, min_y, inv_size, pass_number):
+    """ Clip ears off the ring until it is gone. """
+    if ear is None:
+        return
+
+    if not pass_number and inv_size:
+        _index_curve(ear, min_x, min_y, inv_size)
+
+    stop = ear
+    while ear.prev is not ear.next:
+        prev = ear.prev
+        next_node = ear.next
+
+        if _is_ear_hashed(ear, min_x, min_y, inv_size) if inv_size else _is_ear(ear):
+            triangles.append(prev.i // dim)
+            triangles.append(ear.i // dim)
+            triangles.append(next_node.i // dim)
+
+            _remove_node(ear)
+
+            # Skipping the next vertex leads to fewer sliver triangles
+            ear = next_node.next
+            stop = next_node.next
             continue
-        elif _is_point_inside(pn, p1, p2, p3):
+
+        ear = next_node
+
+        # Went all the way around without finding an ear
+        if ear is stop:
+            if not pass_number:
+                # Try again after removing duplicate and collinear points
+                _earcut_linked(_filter_points(ear), triangles, dim, min_x, min_y, inv_size, 1)
+            elif pass_number == 1:
+                # Clip self intersections that stop ears from being found
+                ear = _cure_local_intersections(_filter_points(ear), triangles, dim)
+                _earcut_linked(ear, triangles, dim, min_x, min_y, inv_size, 2)
+            elif pass_number == 2:
+                # Split the polygon in two and triangulate both halves
+                _split_earcut(ear, triangles, dim, min_x, min_y, inv_size)
+            break
+
+
+def _is_ear(ear):
+    a = ear.prev
+    b = ear
+    c = ear.next
+
+    if _area(a, b, c) >= 0:
+        return False  # Reflex, can't be an ear
+
+    # No other point may be inside the ear
+    p = ear.next.next
+    while p is not ear.prev:
+        if _point_in_triangle(a.x, a.y, b.x, b.y, c.x, c.y, p.x, p.y) and _area(p.prev, p, p.next) >= 0:
+            return False
+        p = p.next
+
+    return True
+
+
+def _is_ear_hashed(ear, min_x, min_y, inv_size):
+    a = ear.prev
+    b = ear
+    c = ear.next
+
+    if _area(a, b, c) >= 0:
+        return False  # Reflex, can't be an ear
+
+    # Only points with a z-order between that of the corners of the
+    # bounding box of the triangle can be inside it
+    min_z = _z_order(min(a.x, b.x, c.x), min(a.y, b.y, c.y), min_x, min_y, inv_size)
+    max_z = _z_order(max(a.x, b.x, c.x), max(a.y, b.y, c.y), min_x, min_y, inv_size)
+
+    def blocks(p):
+        return p is not a and p is not c and \
+            _point_in_triangle(a.x, a.y, b.x, b.y, c.x, c.y, p.x, p.y) and \
+            _area(p.prev, p, p.next) >= 0
+
+    # Look in both directions along the z-order curve
+    p = ear.prev_z
+    n = ear.next_z
+    while p is not None and p.z >= min_z and n is not None and n.z <= max_z:
+        if blocks(p):
+            return False
+        p = p.prev_z
+        if blocks(n):
+            return False
+        n = n.next_z
+
+    while p is not None and p.z >= min_z:
+        if blocks(p):
+            return False
+        p = p.prev_z
+
+    while n is not None and n.z <= max_z:
+        if blocks(n):
             return False
+        n = n.next_z
+
     return True
 
 
-def _is_point_inside(p, a, b, c):
-    area = _triangle_area(a.x, a.y, b.x, b.y, c.x, c.y)
-    area1 = _triangle_area(p.x, p.y, b.x, b.y, c.x, c.y)
-    area2 = _triangle_area(p.x, p.y, a.x, a.y, c.x, c.y)
-    area3 = _triangle_area(p.x, p.y, a.x, a.y, b.x, b.y)
-    return area == sum([area1, area2, area3])
+def _cure_local_intersections(start, triangles, dim):
+    p = start
+    while True:
+        a = p.prev
+        b = p.next.next
+
+        if not _equals(a, b) and _intersects(a, p, p.next, b) and \
+                _locally_inside(a, b) and _locally_inside(b, a):
+            triangles.append(a.i // dim)
+            triangles.append(p.i // dim)
+            triangles.append(b.i // dim)
+
+            _remove_node(p)
+            _remove_node(p.next)
+
+            p = start = b
+        p = p.next
+        if p is start:
+            break
+
+    return _filter_points(p)
+
+
+def _split_earcut(start, triangles, dim, min_x, min_y, inv_size):
+    a = start
+    while True:
+        b = a.next.next
+        while b is not a.prev:
+            if a.i != b.i and _is_valid_diagonal(a, b):
+                c = _split_polygon(a, b)
+
+                a = _filter_points(a, a.next)
+                c = _filter_points(c, c.next)
+
+                _earcut_linked(a, triangles, dim, min_x, min_y, inv_size, 0)
+                _earcut_linked(c, triangles, dim, min_x, min_y, inv_size, 0)
+                return
+            b = b.next
+        a = a.next
+        if a is start:
+            break
+
+
+def _eliminate_holes(data, hole_indices, outer_node, dim):
+    """ Join the holes to the outline, from left to right. """
+    queue = []
+    for index, hole_index in enumerate(hole_indices):
+        start = hole_index * dim
+        end = hole_indices[index + 1] * dim if index < len(hole_indices) - 1 else len(data)
+        ring = _linked_list(data, start, end, dim, False)
+        if ring is None:
+            continue
+        if ring is ring.next:
+            ring.steiner = True
+        queue.append(_get_leftmost(ring))
+
+    queue.sort(key=lambda node: node.x)
+
+    for hole in queue:
+        outer_node = _eliminate_hole(hole, outer_node)
+
+    return outer_node
+
+
+def _eliminate_hole(hole, outer_node):
+    bridge = _find_hole_bridge(hole, outer_node)
+    if bridge is None:
+        return outer_node
+
+    bridge_reverse = _split_polygon(bridge, hole)
+
+    # Remove collinear points around the cuts
+    _filter_points(bridge_reverse, bridge_reverse.next)
+    return _filter_points(bridge, bridge.next)
+
+
+def _find_hole_bridge(hole, outer_node):
+    """ Find a point of the outline the hole can be joined to. """
+    p = outer_node
+    hx = hole.x
+    hy = hole.y
+    qx = -math.inf
+    m = None
+
+    # Find the segment left of the hole, crossed by a ray from the hole
+    while True:
+        if p.next.y <= hy <= p.y and p.next.y != p.y:
+            x = p.x + (hy - p.y) * (p.next.x - p.x) / (p.next.y - p.y)
+            if hx >= x > qx:
+                qx = x
+                m = p if p.x < p.next.x else p.next
+                if x == hx:
+                    return m  # The hole touches the outline
+        p = p.next
+        if p is outer_node:
+            break
+
+    if m is None:
+        return None
+
+    # Points inside the triangle of the hole point, the crossing and the
+    # segment end could block the bridge. Use the one with the smallest angle
+    # to the ray instead.
+    stop = m
+    mx = m.x
+    my = m.y
+    tan_min = math.inf
+
+    p = m
+    while True:
+        if hx >= p.x >= mx and hx != p.x and \
+                _point_in_triangle(hx if hy < my else qx, hy, mx, my, qx if hy < my else hx, hy, p.x, p.y):
+            tan = abs(hy - p.y) / (hx - p.x)
+            if _locally_inside(p, hole) and \
+                    (tan < tan_min or (tan == tan_min and (p.x > m.x or (p.x == m.x and _sector_contains_sector(m, p))))):
+                m = p
+                tan_min = tan
+        p = p.next
+        if p is stop:
+            break
+
+    return m
+
+
+def _sector_contains_sector(m, p):
+    return _area(m.prev, m, p.prev) < 0 and _area(p.next, m, m.next) < 0
+
+
+def _index_curve(start, min_x, min_y, inv_size):
+    """ Link the nodes in z-order. """
+    p = start
+    while True:
+        if p.z == 0:
+            p.z = _z_order(p.x, p.y, min_x, min_y, inv_size)
+        p.prev_z = p.prev
+        p.next_z = p.next
+        p = p.next
+        if p is start:
+            break
+
+    p.prev_z.next_z = None
+    p.prev_z = None
+
+    _sort_linked(p)
+
+
+def _sort_linked(head):
+    """ Merge sort of the z-order list. """
+    in_size = 1
+    while True:
+        p = head
+        head = None
+        tail = None
+        num_merges = 0
+
+        while p is not None:
+            num_merges += 1
+            q = p
+            p_size = 0
+            for _ in range(in_size):
+                p_size += 1
+                q = q.next_z
+                if q is None:
+                    break
+            q_size = in_size
+
+            while p_size > 0 or (q_size > 0 and q is not None):
+                if p_size != 0 and (q_size == 0 or q is None or p.z <= q.z):
+                    e = p
+                    p = p.next_z
+                    p_size -= 1
+                else:
+                    e = q
+                    q = q.next_z
+                    q_size -= 1
+
+                if tail is not None:
+                    tail.next_z = e
+                else:
+                    head = e
+
+                e.prev_z = tail
+                tail = e
+
+            p = q
+
+        tail.next_z = None
+        in_size *= 2
+        if num_merges <= 1:
+            return head
+
+
+def _z_order(x, y, min_x, min_y, inv_size):
+    """ Position of the point on a z-order curve, from its coordinates scaled to 15 bits. """
+    x = int((x - min_x) * inv_size)
+    y = int((y - min_y) * inv_size)
+
+    x = (x | (x << 8)) & 0x00FF00FF
+    x = (x | (x << 4)) & 0x0F0F0F0F
+    x = (x | (x << 2)) & 0x33333333
+    x = (x | (x << 1)) & 0x55555555
+
+    y = (y | (y << 8)) & 0x00FF00FF
+    y = (y | (y << 4)) & 0x0F0F0F0F
+    y = (y | (y << 2)) & 0x33333333
+    y = (y | (y << 1)) & 0x55555555
+
+    return x | (y << 1)
+
+
+def _get_leftmost(start):
+    p = start
+    leftmost = start
+    while True:
+        if p.x < leftmost.x or (p.x == leftmost.x and p.y < leftmost.y):
+            leftmost = p
+        p = p.next
+        if p is start:
+            break
+    return leftmost
+
+
+def _point_in_triangle(ax, ay, bx, by, cx, cy, px, py):
+    return (cx - px) * (ay - py) >= (ax - px) * (cy - py) and \
+        (ax - px) * (by - py) >= (bx - px) * (ay - py) and \
+        (bx - px) * (cy - py) >= (cx - px) * (by - py)
+
+
+def _is_valid_diagonal(a, b):
+    """ Check whether a diagonal between two points stays inside the polygon. """
+    return a.next.i != b.i and a.prev.i != b.i and not _intersects_polygon(a, b) and \
+        ((_locally_inside(a, b) and _locally_inside(b, a) and _middle_inside(a, b) and
+          (_area(a.prev, a, b.prev) != 0 or _area(a, b.prev, b) != 0)) or
+         (_equals(a, b) and _area(a.prev, a, a.next) > 0 and _area(b.prev, b, b.next) > 0))
+
+
+def _area(p, q, r):
+    """ Twice the signed area of a triangle. """
+    return (q.y - p.y) * (r.x - q.x) - (q.x - p.x) * (r.y - q.y)
+
+
+def _equals(p1, p2):
+    return p1.x == p2.x and p1.y == p2.y
+
+
+def _intersects(p1, q1, p2, q2):
+    """ Check whether two segments cross. """
+    o1 = _sign(_area(p1, q1, p2))
+    o2 = _sign(_area(p1, q1, q2))
+    o3 = _sign(_area(p2, q2, p1))
+    o4 = _sign(_area(p2, q2, q1))
+
+    if o1 != o2 and o3 != o4:
+        return True
+
+    # Collinear points on the other segment
+    if o1 == 0 and _on_segment(p1, p2, q1):
+        return True
+    if o2 == 0 and _on_segment(p1, q2, q1):
+        return True
+    if o3 == 0 and _on_segment(p2, p1, q2):
+        return True
+    if o4 == 0 and _on_segment(p2, q1, q2):
+        return True
+
+    return False
+
+
+def _on_segment(p, q, r):
+    """ For collinear points, check whether q is on the segment from p to r. """
+    return min(p.x, r.x) <= q.x <= max(p.x, r.x) and min(p.y, r.y) <= q.y <= max(p.y, r.y)
+
+
+def _sign(number):
+    if number > 0:
+        return 1
+    if number < 0:
+        return -1
+    return 0
+
+
+def _intersects_polygon(a, b):
+    p = a
+    while True:
+        if p.i != a.i and p.next.i != a.i and p.i != b.i and p.next.i != b.i and \
+                _intersects(p, p.next, a, b):
+            return True
+        p = p.next
+        if p is a:
+            break
+    return False
+
+
+def _locally_inside(a, b):
+    """ Check whether the diagonal from a to b starts inside the polygon. """
+    if _area(a.prev, a, a.next) < 0:
+        return _area(a, b, a.next) >= 0 and _area(a, a.prev, b) >= 0
+    return _area(a, b, a.prev) < 0 or _area(a, a.next, b) < 0
+
+
+def _middle_inside(a, b):
+    """ Check whether the middle of the diagonal from a to b is inside the polygon. """
+    p = a
+    inside = False
+    px = (a.x + b.x) / 2
+    py = (a.y + b.y) / 2
+    while True:
+        if ((p.y > py) != (p.next.y > py)) and p.next.y != p.y and \
+                px < (p.next.x - p.x) * (py - p.y) / (p.next.y - p.y) + p.x:
+            inside = not inside
+        p = p.next
+        if p is a:
+            break
+    return inside
+
+
+def _split_polygon(a, b):
+    """
+    Join two points with a bridge, splitting the ring in two. Returns a node
+    of the second ring.
+    """
+    a2 = _Node(a.i, a.x, a.y)
+    b2 = _Node(b.i, b.x, b.y)
+    an = a.next
+    bp = b.prev
+
+    a.next = b
+    b.prev = a
+
+    a2.next = an
+    an.prev = a2
+
+    b2.next = a2
+    a2.prev = b2
+
+    bp.next = b2
+    b2.prev = bp
+
+    return b2
+
+
+def _insert_node(i, x, y, last):
+    p = _Node(i, x, y)
+
+    if last is None:
+        p.prev = p
+        p.next = p
+    else:
+        p.next = last.next
+        p.prev = last
+        last.next.prev = p
+        last.next = p
+
+    return p
+
 
+def _remove_node(p):
+    p.next.prev = p.prev
+    p.prev.next = p.next
 
-def _triangle_area(x1, y1, x2, y2, x3, y3):
-    return abs((x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2)) / 2.0)
+    if p.prev_z is not None:
+        p.prev_z.next_z = p.next_z
+    if p.next_z is not None:
+        p.next_z.prev_z = p.prev_z
 
 
-def _triangle_sum(x1, y1, x2, y2, x3, y3):
-    return x1 * (y3 - y2) + x2 * (y1 - y3) + x3 * (y2 - y1)
\ No newline at end of file
+def _signed_area(data, start, end, dim):
+    total = 0
+    j = end - dim
+    for i in range(start, end, dim):
+        total += (data[j] - data[i]) * (data[i + 1] + data[j + 1])
+        j = i
+    return total
@@ -5,6 +5,7 @@
 from arcade.sprite import Sprite
 from arcade.sprite_list import SpriteList
 from typing import List
+from typing import Tuple
 from arcade.arcade_types import PointList
 
 PRECISION = 2
@@ -116,6 +117,9 @@ def check_for_collision_with_list(sprite1: Sprite,
     """
     Check for a collision between a sprite, and a list of sprites.
 
+    Only sprites whose ``collision_layer`` shares a bit with the
+    ``collision_mask`` of ``sprite1`` are checked.
+
     Args:
         sprite1:
         sprite_list:
@@ -128,11 +132,14 @@ def check_for_collision_with_list(sprite1: Sprite,
     if not isinstance(sprite_list, SpriteList):
         raise TypeError(f"Parameter 2 is a {type(sprite_list)} instead of expected SpriteList.")
 
+    collision_mask = sprite1.collision_mask
+
     if sprite_list.use_spatial_hash:
-        sprite_list_to_check = sprite_list.spatial_hash.get_objects_for_box(sprite1)
+        sprite_list_to_check = sprite_list.spatial_hash.get_objects_for_box(sprite1, collision_mask)
         # checks_saved = len(sprite_list) - len(sprite_list_to_check)
     else:
-        sprite_list_to_check = sprite_list
+        sprite_list_to_check = [sprite2 for sprite2 in sprite_list
+                                if sprite2.collision_layer & collision_mask]
 
     collision_list = [sprite2
                       for sprite2 in sprite_list_to_check
@@ -144,3 +151,60 @@ def check_for_collision_with_list(sprite1: Sprite,
     #         if _check_for_collision(sprite1, sprite2):
     #             collision_list.append(sprite2)
     return collision_list
+
+
+def check_for_collision_between_lists(sprite_list_1: SpriteList,
+                                      sprite_list_2: SpriteList) -> List[Tuple[Sprite, Sprite]]:
+    """
+    Check for collisions between every sprite of one list and every sprite
+    of another. Both arguments may be the same list.
+
+    A pair is only checked if the ``collision_layer`` of the second sprite
+    shares a bit with the ``collision_mask`` of the first one. If
+    ``sprite_list_2`` uses a spatial hash, it is used to find candidates.
+
+    Args:
+        sprite_list_1:
+        sprite_list_2:
+
+    Returns:
+        List of ``(sprite1, sprite2)`` tuples, one per colliding pair.
+    """
+    if not isinstance(sprite_list_1, SpriteList):
+        raise TypeError(f"Parameter 1 is a {type(sprite_list_1)} instead of expected SpriteList.")
+    if not isinstance(sprite_list_2, SpriteList):
+        raise TypeError(f"Parameter 2 is a {type(sprite_list_2)} instead of expected SpriteList.")
+
+    same_list = sprite_list_1 is sprite_list_2
+    seen_pairs = set()
+    collision_pairs = []
+
+    for sprite1 in sprite_list_1:
+        collision_mask = sprite1.collision_mask
+        if not collision_mask:
+            continue
+
+        if sprite_list_2.use_spatial_hash:
+            sprite_list_to_check = sprite_list_2.spatial_hash.get_objects_for_box(sprite1, collision_mask)
+        else:
+            sprite_list_to_check = [sprite2 for sprite2 in sprite_list_2
+                                    if sprite2.collision_layer & collision_mask]
+
+        for sprite2 in sprite_list_to_check:
+            if sprite1 is sprite2:
+                continue
+
+            # The spatial hash can return a sprite once per shared cell, and a
+            # list checked against itself would report each pair twice.
+            if same_list:
+                pair_key = frozenset((id(sprite1), id(sprite2)))
+            else:
+                pair_key = (id(sprite1), id(sprite2))
+            if pair_key in seen_pairs:
+                continue
+            seen_pairs.add(pair_key)
+
+            if _check_for_collision(sprite1, sprite2):
+                collision_pairs.append((sprite1, sprite2))
+
+    return collision_pairs
@@ -0,0 +1,271 @@
+"""
+Grids of colored cells, backed by a numpy array.
+
+The cells are stored in a texture with one pixel for each cell, and the whole
+grid is drawn as one rectangle. The fragment shader finds the cell each pixel
+is in, and leaves the margins between cells empty. Changing cells only sends
+the rows they are in to the graphics card.
+"""
+
+from typing import Iterable
+from typing import Tuple
+
+import numpy as np
+import pyglet.gl as gl
+
+from arcade.arcade_types import Color
+from arcade.draw_commands import get_four_byte_colors
+from arcade.instanced_batch import ChangedRange
+from arcade.window_commands import flush_batched_draws
+from arcade import shader
+
+GRID_VERTEX_SHADER = """
+#version 330
+layout (std140) uniform Globals {
+    mat4 Projection;
+    float Time;
+};
+
+uniform vec2 Origin;
+uniform vec2 Size;
+
+in vec2 in_vert;
+
+out vec2 v_position;
+
+void main() {
+    v_position = in_vert * Size;
+    gl_Position = Projection * vec4(Origin + v_position, 0.0, 1.0);
+}
+"""
+
+GRID_FRAGMENT_SHADER = """
+#version 330
+uniform sampler2D Cells;
+uniform sampler2D Palette;
+uniform int UsePalette;
+uniform float CellSize;
+uniform float Margin;
+
+in vec2 v_position;
+
+out vec4 f_color;
+
+void main() {
+    // Each cell has a margin on its left and bottom
+    vec2 position = v_position - Margin;
+    float step = CellSize + Margin;
+    ivec2 cell = ivec2(floor(position / step));
+    vec2 in_cell = position - vec2(cell) * step;
+    ivec2 size = textureSize(Cells, 0);
+    if (in_cell.x >= CellSize || in_cell.y >= CellSize ||
+            cell.x < 0 || cell.y < 0 || cell.x >= size.x || cell.y >= size.y) {
+        discard;
+    }
+
+    vec4 color = texelFetch(Cells, cell, 0);
+    if (UsePalette == 1) {
+        int index = int(color.r * 255.0 + 0.5);
+        color = texelFetch(Palette, ivec2(index, 0), 0);
+    }
+    if (color.a == 0.0) {
+        discard;
+    }
+    f_color = color;
+}
+"""
+
+_PALETTE_SIZE = 256
+
+
+class GridRenderer:
+    """
+    Draws a grid of cells with one call.
+
+    Row 0 is the bottom row, and column 0 the left column. ``cells`` holds
+    either an RGBA color for each cell, or with a palette, an index into the
+    palette for each cell.
+
+    Example::
+
+        grid = arcade.GridRenderer(15, 15, 30, margin=5,
+                                   palette=[arcade.color.WHITE, arcade.color.GREEN])
+        grid.update((row, column), 1)
+        grid.draw()
+    """
+    def __init__(self, rows: int, cols: int, cell_size: float, margin: float = 0,
+                 left: float = 0, bottom: float = 0, palette: Iterable[Color] = None):
+        """
+        Create a grid. All the cells start out transparent, or with the first
+        color of the palette.
+
+        :param rows: Number of rows.
+        :param cols: Number of columns.
+        :param cell_size: Width and height of each cell.
+        :param margin: Space between the cells, and around the grid.
+        :param left: x position of the left edge of the grid.
+        :param bottom: y position of the bottom edge of the grid.
+        :param palette: Up to 256 colors. If given, cells hold an index into it
+                        instead of a color.
+        """
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = cell_size
+        self.margin = margin
+        self.left = left
+        self.bottom = bottom
+
+        if palette is None:
+            self.palette = None
+            self.cells = np.zeros((rows, cols, 4), dtype=np.uint8)
+        else:
+            self.palette = np.zeros((_PALETTE_SIZE, 4), dtype=np.uint8)
+            self.set_palette(palette)
+            self.cells = np.zeros((rows, cols), dtype=np.uint8)
+
+        # Range of rows not sent to the graphics card yet
+        self._changed = ChangedRange(0, rows)
+        self._palette_changed = True
+
+        self.program = None
+        self.vbo_buf = None
+        self.vao = None
+        self.cell_texture = None
+        self.palette_texture = None
+
+    @property
+    def width(self) -> float:
+        """ Width of the grid, margins included. """
+        return self.cols * (self.cell_size + self.margin) + self.margin
+
+    @property
+    def height(self) -> float:
+        """ Height of the grid, margins included. """
+        return self.rows * (self.cell_size + self.margin) + self.margin
+
+    def get_cell(self, x: float, y: float) -> Tuple[int, int]:
+        """
+        Find the cell at a point, like where the mouse was clicked.
+
+        :param x: x position of the point.
+        :param y: y position of the point.
+        :return: Row and column of the cell, or None if the point isn't
+                 in a cell.
+        """
+        step = self.cell_size + self.margin
+        column, column_offset = divmod(x - self.left - self.margin, step)
+        row, row_offset = divmod(y - self.bottom - self.margin, step)
+        if not (0 <= row < self.rows and 0 <= column < self.cols):
+            return None
+        if column_offset >= self.cell_size or row_offset >= self.cell_size:
+            return None
+        return int(row), int(column)
+
+    def set_palette(self, palette: Iterable[Color]):
+        """
+        Change the colors of a grid made with a palette.
+
+        :param palette: Up to 256 colors.
+        :raises ValueError: If the grid has no palette, or there are too many colors.
+        """
+        if self.palette is None:
+            raise ValueError("This grid holds colors, not palette indices.")
+        colors = get_four_byte_colors(palette)
+        if len(colors) > _PALETTE_SIZE:
+            raise ValueError(f"A palette can't have more than {_PALETTE_SIZE} colors.")
+        self.palette[:len(colors)] = colors
+        self._palette_changed = True
+
+    def update(self, region, values):
+        """
+        Change cells. Only the rows that changed are sent to the graphics card.
+
+        :param region: Cells to change, indexed like a numpy array: a row,
+                       a (row, column) tuple where both can be a slice, or
+                       a boolean mask with the shape of the grid.
+        :param values: Palette indices, or colors in RGB or RGBA format. One
+                       for all the cells, or an array with one for each.
+        """
+        # Find the rows first, so a region that can't be used changes nothing
+        if isinstance(region, np.ndarray) and region.dtype == bool and region.ndim == 2:
+            changed_rows = np.nonzero(region.any(axis=1))[0]
+        else:
+            rows = region[0] if isinstance(region, tuple) else region
+            changed_rows = np.arange(self.rows)[rows]
+
+        if self.palette is None:
+            values = np.asarray(values, dtype=np.uint8)
+            if values.shape[-1] == 3:
+                values = np.concatenate((values, np.full(values.shape[:-1] + (1,), 255, dtype=np.uint8)),
+                                        axis=-1)
+        self.cells[region] = values
+
+        if np.size(changed_rows):
+            self.mark_changed(int(np.min(changed_rows)), int(np.max(changed_rows)) + 1)
+
+    def mark_changed(self, start: int = 0, end: int = None):
+        """
+        Send rows of ``cells`` that were changed in place to the graphics card
+        on the next draw.
+
+        :param start: First row that changed.
+        :param end: Row after the last one that changed, or None for the top row.
+        """
+        if end is None:
+            end = self.rows
+        self._changed.add(start, end)
+
+    def draw(self):
+        """ Draw the grid. """
+        flush_batched_draws()
+
+        if self.program is None:
+            self._create()
+
+        if self._changed:
+            start = self._changed.start
+            self.cell_texture.write(self.cells[start:self._changed.end], 0, start)
+            self._changed.clear()
+        if self.palette is not None and self._palette_changed:
+            self.palette_texture.write(self.palette[None])
+            self._palette_changed = False
+
+        state = shader.context_state()
+        state.enable(gl.GL_BLEND)
+        state.blend_func(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+
+        self.cell_texture.use(0)
+        if self.palette is not None:
+            self.palette_texture.use(1)
+
+        with self.vao:
+            self.program['Origin'] = self.left, self.bottom
+            self.program['Size'] = self.width, self.height
+            self.program['CellSize'] = self.cell_size
+            self.program['Margin'] = self.margin
+            self.program['Cells'] = 0
+            self.program['Palette'] = 1
+            self.program['UsePalette'] = 0 if self.palette is None else 1
+            self.vao.render(gl.GL_TRIANGLE_STRIP)
+
+    def _create(self):
+        self.program = shader.program(
+            vertex_shader=GRID_VERTEX_SHADER,
+            fragment_shader=GRID_FRAGMENT_SHADER
+        )
+        vertices = np.array([0.0, 0.0, 0.0, 1.0, 1.0, 0.0, 1.0, 1.0], dtype=np.float32)
+        self.vbo_buf = shader.buffer(vertices)
+        vbo_buf_desc = shader.BufferDescription(
+            self.vbo_buf,
+            '2f',
+            ('in_vert',)
+        )
+        self.vao = shader.vertex_array(self.program, [vbo_buf_desc])
+
+        # The textures start out with the cells and palette as they are now
+        component = 4 if self.palette is None else 1
+        self.cell_texture = shader.texture((self.cols, self.rows), component, self.cells, gl.GL_NEAREST)
+        self._changed.clear()
+        if self.palette is not None:
+            self.palette_texture = shader.texture((_PALETTE_SIZE, 1), 4, self.palette, gl.GL_NEAREST)
+            self._palette_changed = False
@@ -0,0 +1,184 @@
+"""
+Shared parts of the batches that draw many items with one instanced call.
+
+Each item of an ``InstancedBatch`` is one instance of a quad, with its data in
+a row of a numpy array. Only the rows that changed are sent to the graphics
+card, so drawing a batch that didn't change sends nothing.
+"""
+
+import numpy as np
+import pyglet.gl as gl
+
+from arcade.window_commands import flush_batched_draws
+from arcade import shader
+
+
+class ChangedRange:
+    """
+    Range of items, or rows, changed since they were last sent to the
+    graphics card. The range is empty when ``start`` equals ``end``.
+    """
+    def __init__(self, start: int = 0, end: int = 0):
+        """
+        :param start: First item that changed.
+        :param end: Item after the last one that changed.
+        """
+        self.start = start
+        self.end = end
+
+    def __bool__(self) -> bool:
+        return self.start < self.end
+
+    def add(self, start: int, end: int):
+        """
+        Grow the range to cover more items.
+
+        :param start: First item that changed.
+        :param end: Item after the last one that changed.
+        """
+        if self.start == self.end:
+            self.start, self.end = start, end
+        else:
+            self.start = min(self.start, start)
+            self.end = max(self.end, end)
+
+    def clear(self):
+        """ Empty the range, after the items were sent. """
+        self.start = self.end = 0
+
+
+class InstancedBatch:
+    """
+    Base of the batches drawing one quad instance for each item.
+
+    Subclasses set the shaders, the quad, and the type and format of the
+    per instance data. The ``data`` array is replaced when the batch grows.
+
+    With ``streaming`` set, each draw sends all the items to the next buffer
+    of a ``shader.StreamBuffer`` instead of sending only the changed ones.
+    Immediate mode batches, emptied after each draw, use it.
+    """
+    vertex_shader: str = None
+    fragment_shader: str = None
+    # Corners of the quad, drawn as a triangle strip
+    quad_vertices = (-0.5, -0.5, -0.5, 0.5, 0.5, -0.5, 0.5, 0.5)
+    instance_type: np.dtype = None
+    instance_format: str = None
+    instance_attributes = ()
+    streaming = False
+
+    def __init__(self, capacity: int = 256):
+        """
+        Create an empty batch.
+
+        :param capacity: Number of items there is room for at first.
+        """
+        self.data = np.zeros(capacity, dtype=self.instance_type)
+        self.count = 0
+        # Range of items not sent to the graphics card yet
+        self._changed = ChangedRange()
+
+        self.program = None
+        self.vbo_buf = None
+        self.instance_buf = None
+        self.stream = None
+        self._vaos = []
+        self._vao = None
+
+    def __len__(self) -> int:
+        """ Return the number of items in the batch. """
+        return self.count
+
+    def clear(self):
+        """ Remove all the items. """
+        self.count = 0
+        self._changed.clear()
+
+    def mark_changed(self, start: int = 0, end: int = None):
+        """
+        Send items changed in place to the graphics card on the next draw.
+
+        :param start: Index of the first item that changed.
+        :param end: Index after the last item that changed, or None for
+                    the end of the batch.
+        """
+        if end is None:
+            end = self.count
+        self._changed.add(start, end)
+
+    def draw(self):
+        """ Draw the items. """
+        flush_batched_draws()
+        self._render()
+
+    def _reserve(self, count: int) -> int:
+        """ Add room for items after the last one, and return the index of the first. """
+        first = self.count
+        self.count += count
+        if self.count > len(self.data):
+            self.data = np.resize(self.data, max(self.count, len(self.data) * 2))
+        return first
+
+    def _render(self):
+        if self.count == 0:
+            return
+
+        if self.program is None:
+            self.program = shader.program(
+                vertex_shader=self.vertex_shader,
+                fragment_shader=self.fragment_shader
+            )
+            self.vbo_buf = shader.buffer(np.array(self.quad_vertices, dtype=np.float32))
+
+        if self.streaming:
+            self._stream_data()
+        else:
+            self._upload_changed()
+
+        state = shader.context_state()
+        state.enable(gl.GL_BLEND)
+        state.blend_func(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+
+        with self._vao:
+            self._vao.render(gl.GL_TRIANGLE_STRIP, instances=self.count)
+
+        if self.streaming:
+            self.stream.fence()
+
+    def _upload_changed(self):
+        if self.instance_buf is None or self.instance_buf.size < self.data.nbytes:
+            self.instance_buf = shader.Buffer.create_with_size(self.data.nbytes, usage='dynamic')
+            self._vao = self._create_vao(self.instance_buf)
+            self._changed.add(0, self.count)
+
+        start = self._changed.start
+        end = min(self._changed.end, self.count)
+        if start < end:
+            if start == 0 and end == self.count:
+                # Nothing is kept, so let the driver give the buffer new memory
+                # instead of waiting for draws still reading the old one
+                self.instance_buf.orphan()
+            self.instance_buf.write(self.data[start:end], start * self.instance_type.itemsize)
+        self._changed.clear()
+
+    def _stream_data(self):
+        if self.stream is None or self.stream.size < self.data.nbytes:
+            self.stream = shader.stream_buffer(self.data.nbytes)
+            self._vaos = [self._create_vao(buffer) for buffer in self.stream.buffers]
+
+        slot = self.stream.write(self.data[:self.count])
+        self._vao = self._vaos[slot]
+        self._changed.clear()
+
+    def _create_vao(self, instance_buffer: shader.Buffer) -> shader.VertexArray:
+        vbo_buf_desc = shader.BufferDescription(
+            self.vbo_buf,
+            '2f',
+            ('in_vert',)
+        )
+        instance_buf_desc = shader.BufferDescription(
+            instance_buffer,
+            self.instance_format,
+            self.instance_attributes,
+            normalized=['in_color'], instanced=True)
+        return shader.vertex_array(self.program, [vbo_buf_desc, instance_buf_desc])
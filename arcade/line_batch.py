@@ -0,0 +1,197 @@
+"""
+Large sets of lines that change a few at a time.
+
+Each line in a ``LineBatch`` is one instance of a quad, stretched from its
+start to its end by the vertex shader. Lines are referred to by handles that
+stay the same while other lines are added and removed, and changing a line
+only sends the changed part of the batch to the graphics card.
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+from arcade.arcade_types import Color
+from arcade.arcade_types import Point
+from arcade.arcade_types import PointList
+from arcade.draw_commands import get_four_byte_colors
+from arcade.instanced_batch import InstancedBatch
+
+LINE_VERTEX_SHADER = """
+#version 330
+layout (std140) uniform Globals {
+    mat4 Projection;
+    float Time;
+};
+
+// per vertex. x goes along the line, y across it.
+in vec2 in_vert;
+
+// per instance
+in vec2 in_start;
+in vec2 in_end;
+in vec4 in_color;
+in float in_width;
+
+out vec4 v_color;
+
+void main() {
+    vec2 line = in_end - in_start;
+    float length = length(line);
+    vec2 direction = length > 0.0 ? line / length : vec2(1.0, 0.0);
+    vec2 normal = vec2(-direction.y, direction.x);
+    vec2 position = in_start + line * in_vert.x + normal * in_width * in_vert.y;
+    gl_Position = Projection * vec4(position, 0.0, 1.0);
+    v_color = in_color;
+}
+"""
+
+LINE_FRAGMENT_SHADER = """
+#version 330
+in vec4 v_color;
+out vec4 f_color;
+
+void main() {
+    f_color = v_color;
+}
+"""
+
+# Per line data sent to the vertex shader
+LINE_DATA_TYPE = np.dtype([('start', '2f4'), ('end', '2f4'), ('color', '4B'), ('width', 'f4')])
+
+
+class LineBatch(InstancedBatch):
+    """
+    Lines drawn with one instanced call.
+
+    ``add_line`` returns a handle for the line, used to change it with
+    ``set_line`` or remove it with ``remove_line``. Handles of removed lines
+    are given to lines added later.
+    """
+    vertex_shader = LINE_VERTEX_SHADER
+    fragment_shader = LINE_FRAGMENT_SHADER
+    # x goes along the line, y across it
+    quad_vertices = (0.0, -0.5, 0.0, 0.5, 1.0, -0.5, 1.0, 0.5)
+    instance_type = LINE_DATA_TYPE
+    instance_format = '2f 2f 4B 1f'
+    instance_attributes = ('in_start', 'in_end', 'in_color', 'in_width')
+
+    def __init__(self, capacity: int = 256):
+        """
+        Create an empty batch.
+
+        :param capacity: Number of lines there is room for at first.
+        """
+        super().__init__(capacity)
+        # Handles below count have been used. The free ones are in _free_handles.
+        self._free_handles = set()
+
+    def __len__(self) -> int:
+        """ Return the number of lines in the batch. """
+        return self.count - len(self._free_handles)
+
+    def clear(self):
+        """ Remove all the lines. """
+        super().clear()
+        self._free_handles = set()
+
+    def add_line(self, start: Point, end: Point, color: Color, width: float = 1) -> int:
+        """
+        Add a line.
+
+        :param start: Start point of the line.
+        :param end: End point of the line.
+        :param color: Color in RGB or RGBA format.
+        :param width: Width of the line in pixels.
+        :return: Handle of the line.
+        """
+        if self._free_handles:
+            handle = self._free_handles.pop()
+        else:
+            handle = self._reserve(1)
+        self.set_line(handle, start, end, color, width)
+        return handle
+
+    def add_lines(self, starts: PointList, ends: PointList, colors, widths=1) -> np.ndarray:
+        """
+        Add many lines at once, after the lines already in the batch.
+
+        :param starts: Start points, as a list or an array of shape (N, 2).
+        :param ends: End points, as a list or an array of shape (N, 2).
+        :param colors: One color for all the lines, or an array of shape
+                       (N, 3) or (N, 4) with a color for each line.
+        :param widths: One width in pixels for all the lines, or one for each.
+        :return: Array with the handles of the lines.
+        """
+        starts = np.asarray(starts, dtype=np.float32).reshape(-1, 2)
+        first = self._reserve(len(starts))
+        handles = np.arange(first, first + len(starts))
+        self.set_lines(handles, starts, ends, colors, widths)
+        return handles
+
+    def set_line(self, handle: int, start: Point, end: Point, color: Color, width: float = 1):
+        """
+        Change a line.
+
+        :param handle: Handle of the line.
+        :param start: New start point.
+        :param end: New end point.
+        :param color: New color in RGB or RGBA format.
+        :param width: New width in pixels.
+        :raises IndexError: If there is no line with the handle.
+        """
+        self._check_handle(handle)
+        self.data[handle] = start, end, get_four_byte_colors(color)[0], width
+        self.mark_changed(handle, handle + 1)
+
+    def set_lines(self, handles: Iterable[int], starts: PointList = None, ends: PointList = None,
+                  colors=None, widths=None):
+        """
+        Change many lines at once. Only the range from the lowest to the
+        highest handle is sent to the graphics card.
+
+        :param handles: Handles of the lines.
+        :param starts: New start points, or None to keep them.
+        :param ends: New end points, or None to keep them.
+        :param colors: New colors, one for all the lines or one for each,
+                       or None to keep them.
+        :param widths: New widths, one for all the lines or one for each,
+                       or None to keep them.
+        :raises IndexError: If there is no line with one of the handles.
+        """
+        handles = np.asarray(handles, dtype=np.int64).reshape(-1)
+        if len(handles) == 0:
+            return
+        low = int(handles.min())
+        high = int(handles.max())
+        self._check_handle(low)
+        self._check_handle(high)
+        if not self._free_handles.isdisjoint(handles.tolist()):
+            raise IndexError("Some of the lines were removed.")
+
+        if starts is not None:
+            self.data['start'][handles] = np.asarray(starts, dtype=np.float32).reshape(-1, 2)
+        if ends is not None:
+            self.data['end'][handles] = np.asarray(ends, dtype=np.float32).reshape(-1, 2)
+        if colors is not None:
+            self.data['color'][handles] = get_four_byte_colors(colors, len(handles))
+        if widths is not None:
+            self.data['width'][handles] = widths
+        self.mark_changed(low, high + 1)
+
+    def remove_line(self, handle: int):
+        """
+        Remove a line. Its handle may be given to a line added later.
+
+        :param handle: Handle of the line.
+        :raises IndexError: If there is no line with the handle.
+        """
+        self._check_handle(handle)
+        # A line with no width doesn't draw anything
+        self.data['width'][handle] = 0
+        self._free_handles.add(handle)
+        self.mark_changed(handle, handle + 1)
+
+    def _check_handle(self, handle: int):
+        if not 0 <= handle < self.count or handle in self._free_handles:
+            raise IndexError(f"There is no line with handle {handle}.")
@@ -0,0 +1,172 @@
+"""
+Large numbers of points drawn as instanced squares.
+
+A ``PointBatch`` keeps the position, color and size of every point in one
+numpy array, and sends only the part that changed to the graphics card.
+Drawing a batch that didn't change sends nothing. ``draw_points`` adds its
+points to a shared batch, drawn and emptied when something else is drawn.
+"""
+
+import numpy as np
+
+from arcade.arcade_types import Color
+from arcade.arcade_types import PointList
+from arcade.draw_commands import get_four_byte_colors
+from arcade.instanced_batch import InstancedBatch
+from arcade.window_commands import set_pending_batch
+
+POINT_VERTEX_SHADER = """
+#version 330
+layout (std140) uniform Globals {
+    mat4 Projection;
+    float Time;
+};
+
+// per vertex
+in vec2 in_vert;
+
+// per instance
+in vec2 in_position;
+in vec4 in_color;
+in float in_size;
+
+out vec4 v_color;
+
+void main() {
+    gl_Position = Projection * vec4(in_position + in_vert * in_size, 0.0, 1.0);
+    v_color = in_color;
+}
+"""
+
+POINT_FRAGMENT_SHADER = """
+#version 330
+in vec4 v_color;
+out vec4 f_color;
+
+void main() {
+    f_color = v_color;
+}
+"""
+
+# Per point data sent to the vertex shader
+POINT_DATA_TYPE = np.dtype([('position', '2f4'), ('color', '4B'), ('size', 'f4')])
+
+
+class PointBatch(InstancedBatch):
+    """
+    Points drawn as squares with one instanced call.
+
+    The ``positions``, ``colors`` and ``sizes`` arrays can be changed in place.
+    Call ``mark_changed`` with the range that changed afterwards, so it is
+    sent to the graphics card on the next draw. The arrays are replaced when
+    the batch grows, so get them again after adding points.
+    """
+    vertex_shader = POINT_VERTEX_SHADER
+    fragment_shader = POINT_FRAGMENT_SHADER
+    instance_type = POINT_DATA_TYPE
+    instance_format = '2f 4B 1f'
+    instance_attributes = ('in_position', 'in_color', 'in_size')
+
+    @property
+    def positions(self) -> np.ndarray:
+        """ Array of shape (N, 2) with the center of each point. """
+        return self.data['position'][:self.count]
+
+    @property
+    def colors(self) -> np.ndarray:
+        """ Array of shape (N, 4) with the RGBA color of each point. """
+        return self.data['color'][:self.count]
+
+    @property
+    def sizes(self) -> np.ndarray:
+        """ Array of shape (N,) with the width of each point in pixels. """
+        return self.data['size'][:self.count]
+
+    def append(self, x: float, y: float, color: Color, size: float = 1) -> int:
+        """
+        Add a point.
+
+        :param x: x position of the point.
+        :param y: y position of the point.
+        :param color: Color in RGB or RGBA format.
+        :param size: Width of the point in pixels.
+        :return: Index of the point.
+        """
+        return self.extend(((x, y),), color, size)
+
+    def extend(self, point_list: PointList, colors, sizes=1) -> int:
+        """
+        Add points.
+
+        :param point_list: List of points, or an array of shape (N, 2).
+        :param colors: One color for all the points, or an array of shape
+                       (N, 3) or (N, 4) with a color for each point.
+        :param sizes: One width in pixels for all the points, or one for each.
+        :return: Index of the first point added.
+        """
+        points = np.asarray(point_list, dtype=np.float32).reshape(-1, 2)
+        start = self._reserve(len(points))
+        self.set_points(start, points, colors, sizes)
+        return start
+
+    def set_points(self, start: int, point_list: PointList = None, colors=None, sizes=None):
+        """
+        Change points already in the batch.
+
+        :param start: Index of the first point to change.
+        :param point_list: New positions, or None to keep them.
+        :param colors: New colors, one for all the points or one for each,
+                       or None to keep them.
+        :param sizes: New widths, one for all the points or one for each,
+                      or None to keep them.
+        :raises ValueError: If only single colors or sizes are given.
+        :raises IndexError: If there aren't that many points.
+        """
+        count = None
+        if point_list is not None:
+            points = np.asarray(point_list, dtype=np.float32).reshape(-1, 2)
+            count = len(points)
+        elif isinstance(colors, np.ndarray) and colors.ndim == 2:
+            count = len(colors)
+        elif sizes is not None and np.ndim(sizes) == 1:
+            count = len(sizes)
+        if count is None:
+            raise ValueError("Can't tell how many points to change.")
+
+        end = start + count
+        if start < 0 or end > self.count:
+            raise IndexError(f"Points {start} to {end} aren't all in a batch of {self.count}.")
+
+        if point_list is not None:
+            self.data['position'][start:end] = points
+        if colors is not None:
+            self.data['color'][start:end] = get_four_byte_colors(colors, count)
+        if sizes is not None:
+            self.data['size'][start:end] = sizes
+        self.mark_changed(start, end)
+
+
+class _ImmediatePointBatch(PointBatch):
+    """ Points of ``draw_points``, drawn and removed when flushed. """
+    # Like the other immediate batches, send everything to the next buffer of a ring
+    streaming = True
+
+    def set_points(self, *args, **kwargs):
+        # Draws waiting in other batches go first
+        set_pending_batch(self)
+        super().set_points(*args, **kwargs)
+
+    def flush(self):
+        self._render()
+        self.clear()
+
+
+_point_batch = None
+
+
+def get_point_batch() -> PointBatch:
+    """ Return the batch used by ``draw_points``. """
+    global _point_batch
+    if _point_batch is None:
+        _point_batch = _ImmediatePointBatch(capacity=1024)
+    return _point_batch
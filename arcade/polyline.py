@@ -0,0 +1,241 @@
+"""
+Turn lines with a width into triangles.
+
+All the segments of a line strip, or a set of lines, are done at once with
+numpy. Strips get joins where segments meet, and open ends can be capped.
+"""
+
+import math
+
+import numpy as np
+
+from arcade.arcade_types import PointList
+
+LINE_JOIN_MITER = "miter"
+LINE_JOIN_BEVEL = "bevel"
+LINE_JOIN_ROUND = "round"
+
+LINE_CAP_BUTT = "butt"
+LINE_CAP_SQUARE = "square"
+LINE_CAP_ROUND = "round"
+
+_LINE_JOINS = (LINE_JOIN_MITER, LINE_JOIN_BEVEL, LINE_JOIN_ROUND)
+_LINE_CAPS = (LINE_CAP_BUTT, LINE_CAP_SQUARE, LINE_CAP_ROUND)
+
+_EMPTY = np.zeros((0, 2))
+
+
+def tessellate_line_strip(point_list: PointList, line_width: float,
+                          join: str = LINE_JOIN_MITER, cap: str = LINE_CAP_BUTT,
+                          closed: bool = False, miter_limit: float = 4) -> np.ndarray:
+    """
+    Get the triangles that make up a line strip with a width.
+
+    :param point_list: Points of the line strip.
+    :param line_width: Width of the line.
+    :param join: How segments are joined: ``LINE_JOIN_MITER``, ``LINE_JOIN_BEVEL``
+                 or ``LINE_JOIN_ROUND``.
+    :param cap: How open ends look: ``LINE_CAP_BUTT``, ``LINE_CAP_SQUARE``
+                or ``LINE_CAP_ROUND``.
+    :param closed: Join the last point back to the first, like a polygon outline.
+    :param miter_limit: Longest a miter can be, in line widths. Sharper corners
+                        are beveled instead.
+    :return: Array of shape (N * 3, 2), with the points of N triangles.
+    :raises ValueError: If the join or cap isn't one of the above.
+    """
+    _check_join(join)
+    _check_cap(cap)
+    points = np.asarray(point_list, dtype=np.float64).reshape(-1, 2)
+
+    # Repeated points have no direction
+    if len(points) > 1:
+        keep = np.ones(len(points), dtype=bool)
+        keep[1:] = (points[1:] != points[:-1]).any(axis=1)
+        points = points[keep]
+    if closed and len(points) > 1 and (points[0] == points[-1]).all():
+        points = points[:-1]
+    if len(points) < 2:
+        return _EMPTY
+
+    half_width = line_width / 2
+    closed = closed and len(points) > 2
+    if closed:
+        starts = points
+        ends = np.roll(points, -1, axis=0)
+    else:
+        starts = points[:-1]
+        ends = points[1:]
+    directions, normals = _get_segment_directions(starts, ends)
+
+    parts = []
+    if not closed:
+        starts, ends, cap_parts = _get_caps(starts, ends, directions, normals, half_width, cap)
+        parts.extend(cap_parts)
+    parts.append(_get_segment_triangles(starts, ends, normals * half_width))
+
+    # Fill the gaps where segments meet
+    if closed:
+        corners = points
+        in_directions = np.roll(directions, 1, axis=0)
+        in_normals = np.roll(normals, 1, axis=0)
+        out_directions = directions
+        out_normals = normals
+    else:
+        corners = points[1:-1]
+        in_directions = directions[:-1]
+        in_normals = normals[:-1]
+        out_directions = directions[1:]
+        out_normals = normals[1:]
+    if len(corners):
+        parts.append(_get_joins(corners, in_directions, out_directions, in_normals, out_normals,
+                                half_width, join, miter_limit))
+
+    return np.concatenate(parts)
+
+
+def tessellate_lines(point_list: PointList, line_width: float, cap: str = LINE_CAP_BUTT) -> np.ndarray:
+    """
+    Get the triangles that make up separate lines with a width, one line
+    between each pair of points.
+
+    :param point_list: Start and end points of the lines. A last point without
+                       a partner is left out.
+    :param line_width: Width of the lines.
+    :param cap: How the ends look: ``LINE_CAP_BUTT``, ``LINE_CAP_SQUARE`` or
+                ``LINE_CAP_ROUND``.
+    :return: Array of shape (N * 3, 2), with the points of N triangles.
+    :raises ValueError: If the cap isn't one of the above.
+    """
+    _check_cap(cap)
+    points = np.asarray(point_list, dtype=np.float64).reshape(-1, 2)
+    count = len(points) // 2 * 2
+    starts = points[0:count:2]
+    ends = points[1:count:2]
+
+    # Lines with no length have no direction
+    keep = (starts != ends).any(axis=1)
+    starts = starts[keep]
+    ends = ends[keep]
+    if len(starts) == 0:
+        return _EMPTY
+
+    half_width = line_width / 2
+    directions, normals = _get_segment_directions(starts, ends)
+    starts, ends, parts = _get_caps(starts, ends, directions, normals, half_width, cap, every_segment=True)
+    parts.append(_get_segment_triangles(starts, ends, normals * half_width))
+    return np.concatenate(parts)
+
+
+def _check_join(join: str):
+    if join not in _LINE_JOINS:
+        raise ValueError(f"join should be one of {', '.join(_LINE_JOINS)}. Not '{join}'")
+
+
+def _check_cap(cap: str):
+    if cap not in _LINE_CAPS:
+        raise ValueError(f"cap should be one of {', '.join(_LINE_CAPS)}. Not '{cap}'")
+
+
+def _get_segment_directions(starts, ends):
+    """ Unit direction of each segment, and its normal to the left. """
+    vectors = ends - starts
+    directions = vectors / np.hypot(vectors[:, 0], vectors[:, 1])[:, None]
+    normals = np.column_stack((-directions[:, 1], directions[:, 0]))
+    return directions, normals
+
+
+def _get_segment_triangles(starts, ends, offsets):
+    """ Two triangles for each segment. """
+    left_start = starts + offsets
+    right_start = starts - offsets
+    left_end = ends + offsets
+    right_end = ends - offsets
+    triangles = np.stack((left_start, right_start, left_end,
+                          right_start, right_end, left_end), axis=1)
+    return triangles.reshape(-1, 2)
+
+
+def _get_caps(starts, ends, directions, normals, half_width, cap, every_segment=False):
+    """
+    Return the starts and ends, moved out for square caps, and the triangles
+    of round caps. Only the first start and last end are capped unless
+    ``every_segment`` is set.
+    """
+    if cap == LINE_CAP_SQUARE:
+        starts = starts.copy()
+        ends = ends.copy()
+        if every_segment:
+            starts -= directions * half_width
+            ends += directions * half_width
+        else:
+            starts[0] -= directions[0] * half_width
+            ends[-1] += directions[-1] * half_width
+        return starts, ends, []
+
+    if cap == LINE_CAP_ROUND:
+        if every_segment:
+            starts_capped = starts
+            ends_capped = ends
+            start_normals = end_normals = normals
+        else:
+            starts_capped = starts[:1]
+            ends_capped = ends[-1:]
+            start_normals = normals[:1]
+            end_normals = normals[-1:]
+        # Half circles, from the left side back around to the right side at
+        # the start, and from the right side forward to the left at the end
+        start_angles = np.arctan2(start_normals[:, 1], start_normals[:, 0])
+        end_angles = np.arctan2(-end_normals[:, 1], -end_normals[:, 0])
+        centers = np.concatenate((starts_capped, ends_capped))
+        angles = np.concatenate((start_angles, end_angles))
+        sweeps = np.full(len(angles), math.pi)
+        return starts, ends, [_get_fans(centers, angles, sweeps, half_width)]
+
+    return starts, ends, []
+
+
+def _get_joins(corners, in_directions, out_directions, in_normals, out_normals,
+               half_width, join, miter_limit):
+    """ Triangles filling the gap on the outside of each turn. """
+    cross = in_directions[:, 0] * out_directions[:, 1] - in_directions[:, 1] * out_directions[:, 0]
+    side = np.where(cross > 0, -1.0, 1.0)[:, None]
+    in_edge = in_normals * side
+    out_edge = out_normals * side
+
+    if join == LINE_JOIN_ROUND:
+        start_angles = np.arctan2(in_edge[:, 1], in_edge[:, 0])
+        sweeps = np.arctan2(in_edge[:, 0] * out_edge[:, 1] - in_edge[:, 1] * out_edge[:, 0],
+                            (in_edge * out_edge).sum(axis=1))
+        return _get_fans(corners, start_angles, sweeps, half_width)
+
+    in_corner = corners + in_edge * half_width
+    out_corner = corners + out_edge * half_width
+
+    if join == LINE_JOIN_BEVEL:
+        return np.stack((corners, in_corner, out_corner), axis=1).reshape(-1, 2)
+
+    # The miter tip is where the outer edges of the two segments meet. Its
+    # distance from the corner is half_width / cos(turn / 2).
+    bisector = in_edge + out_edge
+    cos_half_turn = np.hypot(bisector[:, 0], bisector[:, 1]) / 2
+    in_limit = cos_half_turn * miter_limit > 1
+    cos_half_turn = np.where(in_limit, cos_half_turn, 1)
+    tips = corners + bisector * (half_width / (2 * cos_half_turn ** 2))[:, None]
+    # Past the limit the second triangle has no area, leaving a bevel
+    tips = np.where(in_limit[:, None], tips, out_corner)
+    triangles = np.stack((corners, in_corner, tips, corners, tips, out_corner), axis=1)
+    return triangles.reshape(-1, 2)
+
+
+def _get_fans(centers, start_angles, sweeps, radius):
+    """ Triangle fans covering circle sectors, all with the same number of triangles. """
+    segments = int(min(max(radius, 4), 32))
+    steps = np.linspace(0, 1, segments + 1)
+    angles = start_angles[:, None] + sweeps[:, None] * steps
+    rims = centers[:, None, :] + radius * np.stack((np.cos(angles), np.sin(angles)), axis=-1)
+
+    triangles = np.empty((len(centers), segments, 3, 2))
+    triangles[:, :, 0] = centers[:, None, :]
+    triangles[:, :, 1] = rims[:, :-1]
+    triangles[:, :, 2] = rims[:, 1:]
+    return triangles.reshape(-1, 2)
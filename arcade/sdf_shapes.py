@@ -0,0 +1,326 @@
+"""
+Circles, ellipses, rings, arcs and rounded rectangles drawn with signed
+distance functions.
+
+Each shape is one instance of a quad. The fragment shader works out how far
+each pixel is from the edge of the shape, which gives smooth edges at any size
+without tessellating the outline on the CPU.
+
+``SDFShapeList`` keeps shapes from frame to frame, like ``ShapeElementList``.
+The immediate mode ``draw_circle_*``, ``draw_ellipse_*`` and ``draw_arc_*``
+commands add their shapes to a shared batch, drawn before anything else is.
+"""
+
+import math
+
+import numpy as np
+
+from arcade.arcade_types import Color
+from arcade.draw_commands import get_four_byte_color
+from arcade.instanced_batch import InstancedBatch
+from arcade.window_commands import set_pending_batch
+
+SDF_VERTEX_SHADER = """
+#version 330
+layout (std140) uniform Globals {
+    mat4 Projection;
+    float Time;
+};
+
+// per vertex
+in vec2 in_vert;
+
+// per instance
+in vec2 in_center;
+in vec2 in_radii;
+in float in_angle;
+in float in_border_width;
+in float in_shape;
+in float in_corner_radius;
+in vec2 in_arc;
+in vec4 in_color;
+
+out vec2 v_local;
+flat out vec2 v_radii;
+flat out float v_border_width;
+flat out float v_shape;
+flat out float v_corner_radius;
+flat out vec2 v_arc;
+flat out vec4 v_color;
+
+void main() {
+    // Leave room for the outline, and for smoothing the edge
+    vec2 extent = abs(in_radii) + in_border_width / 2.0 + 2.0;
+    vec2 local = in_vert * extent;
+    mat2 rotate = mat2(
+                cos(in_angle), sin(in_angle),
+                -sin(in_angle), cos(in_angle)
+            );
+    gl_Position = Projection * vec4(in_center + rotate * local, 0.0, 1.0);
+
+    v_local = local;
+    v_radii = in_radii;
+    v_border_width = in_border_width;
+    v_shape = in_shape;
+    v_corner_radius = in_corner_radius;
+    v_arc = in_arc;
+    v_color = in_color;
+}
+"""
+
+SDF_FRAGMENT_SHADER = """
+#version 330
+const float PI = 3.14159265359;
+
+in vec2 v_local;
+flat in vec2 v_radii;
+flat in float v_border_width;
+flat in float v_shape;
+flat in float v_corner_radius;
+flat in vec2 v_arc;
+flat in vec4 v_color;
+
+out vec4 f_color;
+
+float ellipse_distance(vec2 p, vec2 radii) {
+    // Approximation that is exact for circles
+    float k1 = length(p / radii);
+    if (k1 < 0.0001) {
+        return -min(radii.x, radii.y);
+    }
+    float k2 = length(p / (radii * radii));
+    return k1 * (k1 - 1.0) / k2;
+}
+
+float rounded_rectangle_distance(vec2 p, vec2 radii, float corner_radius) {
+    corner_radius = min(corner_radius, min(radii.x, radii.y));
+    vec2 q = abs(p) - radii + corner_radius;
+    return length(max(q, 0.0)) + min(max(q.x, q.y), 0.0) - corner_radius;
+}
+
+void main() {
+    vec2 radii = abs(v_radii);
+    float distance;
+    if (v_shape == 1.0) {
+        distance = rounded_rectangle_distance(v_local, radii, v_corner_radius);
+    } else {
+        distance = ellipse_distance(v_local, radii);
+    }
+
+    // Outlines are centered on the edge
+    if (v_border_width > 0.0) {
+        distance = abs(distance) - v_border_width / 2.0;
+    }
+
+    // Arcs keep the part between their start and end angles. A negative
+    // radius mirrors the arc, like it does for a tessellated one.
+    float arc_length = v_arc.y - v_arc.x;
+    if (arc_length < 2.0 * PI - 0.0001) {
+        vec2 p = v_local / v_radii;
+        float offset = mod(atan(p.y, p.x) - v_arc.x, 2.0 * PI);
+        if (offset > arc_length) {
+            discard;
+        }
+    }
+
+    float alpha = clamp(0.5 - distance / max(fwidth(distance), 0.0001), 0.0, 1.0);
+    if (alpha == 0.0) {
+        discard;
+    }
+    f_color = vec4(v_color.rgb, v_color.a * alpha);
+}
+"""
+
+SDF_SHAPE_ELLIPSE = 0
+SDF_SHAPE_ROUNDED_RECTANGLE = 1
+
+# Per shape data sent to the vertex shader
+SDF_SHAPE_DATA_TYPE = np.dtype([('center', '2f4'), ('radii', '2f4'), ('angle', 'f4'), ('border_width', 'f4'),
+                                ('shape', 'f4'), ('corner_radius', 'f4'), ('arc', '2f4'), ('color', '4B')])
+
+_FULL_ARC = (0, 2 * math.pi)
+
+
+class SDFShapeList(InstancedBatch):
+    """
+    List of circles, ellipses, arcs and rounded rectangles, drawn with one
+    instanced call.
+
+    Only shapes that were added, changed or removed are sent to the graphics
+    card again. The ``data`` array can also be changed in place; call
+    ``mark_changed`` with the range that changed afterwards.
+    """
+    vertex_shader = SDF_VERTEX_SHADER
+    fragment_shader = SDF_FRAGMENT_SHADER
+    quad_vertices = (-1.0, -1.0, -1.0, 1.0, 1.0, -1.0, 1.0, 1.0)
+    instance_type = SDF_SHAPE_DATA_TYPE
+    instance_format = '2f 2f 1f 1f 1f 1f 2f 4B'
+    instance_attributes = ('in_center', 'in_radii', 'in_angle', 'in_border_width', 'in_shape',
+                           'in_corner_radius', 'in_arc', 'in_color')
+
+    def __init__(self, capacity: int = 64):
+        """
+        Create an empty list.
+
+        :param capacity: Number of shapes there is room for at first.
+        """
+        super().__init__(capacity)
+
+    def append_circle(self, center_x: float, center_y: float, radius: float,
+                      color: Color, border_width: float = 0) -> int:
+        """
+        Add a circle.
+
+        :param center_x: x position of the center.
+        :param center_y: y position of the center.
+        :param radius: Radius of the circle.
+        :param color: Color in RGB or RGBA format.
+        :param border_width: Width of the outline, or 0 to fill the circle.
+        :return: Index of the shape.
+        """
+        return self._append(SDF_SHAPE_ELLIPSE, center_x, center_y, radius, radius, 0,
+                            border_width, 0, _FULL_ARC, color)
+
+    def append_ellipse(self, center_x: float, center_y: float, width: float, height: float,
+                       color: Color, border_width: float = 0, tilt_angle: float = 0) -> int:
+        """
+        Add an ellipse.
+
+        :param center_x: x position of the center.
+        :param center_y: y position of the center.
+        :param width: Horizontal radius of the ellipse.
+        :param height: Vertical radius of the ellipse.
+        :param color: Color in RGB or RGBA format.
+        :param border_width: Width of the outline, or 0 to fill the ellipse.
+        :param tilt_angle: Angle in degrees to tilt the ellipse.
+        :return: Index of the shape.
+        """
+        return self._append(SDF_SHAPE_ELLIPSE, center_x, center_y, width, height, tilt_angle,
+                            border_width, 0, _FULL_ARC, color)
+
+    def append_arc(self, center_x: float, center_y: float, width: float, height: float,
+                   color: Color, start_angle: float, end_angle: float,
+                   border_width: float = 0, tilt_angle: float = 0) -> int:
+        """
+        Add an arc. Filled arcs are pie wedges.
+
+        :param center_x: x position of the center.
+        :param center_y: y position of the center.
+        :param width: Horizontal radius of the arc.
+        :param height: Vertical radius of the arc.
+        :param color: Color in RGB or RGBA format.
+        :param start_angle: Start angle of the arc in degrees.
+        :param end_angle: End angle of the arc in degrees.
+        :param border_width: Width of the curved line, or 0 to fill the arc.
+        :param tilt_angle: Angle in degrees to tilt the arc.
+        :return: Index of the shape.
+        """
+        arc = (math.radians(start_angle), math.radians(end_angle))
+        return self._append(SDF_SHAPE_ELLIPSE, center_x, center_y, width, height, tilt_angle,
+                            border_width, 0, arc, color)
+
+    def append_rounded_rectangle(self, center_x: float, center_y: float, width: float, height: float,
+                                 corner_radius: float, color: Color, border_width: float = 0,
+                                 tilt_angle: float = 0) -> int:
+        """
+        Add a rectangle with rounded corners.
+
+        :param center_x: x position of the center.
+        :param center_y: y position of the center.
+        :param width: Width of the rectangle.
+        :param height: Height of the rectangle.
+        :param corner_radius: Radius of the corners.
+        :param color: Color in RGB or RGBA format.
+        :param border_width: Width of the outline, or 0 to fill the rectangle.
+        :param tilt_angle: Angle in degrees to tilt the rectangle.
+        :return: Index of the shape.
+        """
+        return self._append(SDF_SHAPE_ROUNDED_RECTANGLE, center_x, center_y, width / 2, height / 2,
+                            tilt_angle, border_width, corner_radius, _FULL_ARC, color)
+
+    def set_center(self, index: int, center_x: float, center_y: float):
+        """
+        Move a shape.
+
+        :param index: Index of the shape.
+        :param center_x: New x position of the center.
+        :param center_y: New y position of the center.
+        :raises IndexError: If there is no shape with the index.
+        """
+        self._check_index(index)
+        self.data['center'][index] = center_x, center_y
+        self.mark_changed(index, index + 1)
+
+    def set_color(self, index: int, color: Color):
+        """
+        Change the color of a shape.
+
+        :param index: Index of the shape.
+        :param color: New color in RGB or RGBA format.
+        :raises IndexError: If there is no shape with the index.
+        """
+        self._check_index(index)
+        self.data['color'][index] = get_four_byte_color(color)
+        self.mark_changed(index, index + 1)
+
+    def set_tilt_angle(self, index: int, tilt_angle: float):
+        """
+        Change the tilt of a shape.
+
+        :param index: Index of the shape.
+        :param tilt_angle: New angle in degrees to tilt the shape.
+        :raises IndexError: If there is no shape with the index.
+        """
+        self._check_index(index)
+        self.data['angle'][index] = math.radians(tilt_angle)
+        self.mark_changed(index, index + 1)
+
+    def remove(self, index: int):
+        """
+        Remove a shape. The shapes after it move down by one index.
+
+        :param index: Index of the shape.
+        :raises IndexError: If there is no shape with the index.
+        """
+        self._check_index(index)
+        self.data[index:self.count - 1] = self.data[index + 1:self.count]
+        self.count -= 1
+        self.mark_changed(index, self.count)
+
+    def _check_index(self, index: int):
+        if not 0 <= index < self.count:
+            raise IndexError(f"There is no shape with index {index}.")
+
+    def _append(self, shape, center_x, center_y, radius_x, radius_y, tilt_angle,
+                border_width, corner_radius, arc, color) -> int:
+        index = self._reserve(1)
+        self.data[index] = ((center_x, center_y), (radius_x, radius_y), math.radians(tilt_angle),
+                            border_width, shape, corner_radius, arc, get_four_byte_color(color))
+        self.mark_changed(index, index + 1)
+        return index
+
+
+class _SDFShapeBatch(SDFShapeList):
+    """ Shapes of the immediate mode draw commands, drawn and removed when flushed. """
+    # Like the other immediate batches, send everything to the next buffer of a ring
+    streaming = True
+
+    def _append(self, *args) -> int:
+        # Draws waiting in other batches go first
+        set_pending_batch(self)
+        return super()._append(*args)
+
+    def flush(self):
+        self._render()
+        self.clear()
+
+
+_sdf_shape_batch = None
+
+
+def get_sdf_shape_batch() -> SDFShapeList:
+    """ Return the batch used by the immediate mode circle, ellipse and arc commands. """
+    global _sdf_shape_batch
+    if _sdf_shape_batch is None:
+        _sdf_shape_batch = _SDFShapeBatch(capacity=1024)
+    return _sdf_shape_batch
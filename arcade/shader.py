@@ -3,10 +3,15 @@
 
 from ctypes import *
 from collections import namedtuple
+import hashlib
+import os
+import struct
+import sys
 import weakref
 from typing import Type, Tuple, Iterable
 
 from pyglet.gl import *
+from pyglet.gl.lib import link_GL
 from pyglet import gl
 
 import numpy as np
@@ -16,6 +21,151 @@ class ShaderException(Exception):
     pass
 
 
+# Buffer storage is OpenGL 4.4 (or ARB_buffer_storage), newer than what
+# pyglet provides, so link it ourselves. Only called if the driver has it.
+GL_MAP_PERSISTENT_BIT = 0x0040
+GL_MAP_COHERENT_BIT = 0x0080
+glBufferStorage = link_GL('glBufferStorage', None, [GLenum, GLsizeiptr, POINTER(GLvoid), GLbitfield],
+                          requires='OpenGL 4.4')
+
+_have_buffer_storage = None
+
+
+def have_buffer_storage() -> bool:
+    """Return True if the current OpenGL context supports persistently mapped buffers."""
+    global _have_buffer_storage
+    if _have_buffer_storage is None:
+        major = GLint()
+        minor = GLint()
+        glGetIntegerv(GL_MAJOR_VERSION, byref(major))
+        glGetIntegerv(GL_MINOR_VERSION, byref(minor))
+        if (major.value, minor.value) >= (4, 4):
+            _have_buffer_storage = True
+        else:
+            num_extensions = GLint()
+            glGetIntegerv(GL_NUM_EXTENSIONS, byref(num_extensions))
+            extensions = (cast(glGetStringi(GL_EXTENSIONS, index), c_char_p).value
+                          for index in range(num_extensions.value))
+            _have_buffer_storage = b'GL_ARB_buffer_storage' in extensions
+    return _have_buffer_storage
+
+
+class ContextState:
+    """Tracks the OpenGL state set through it, and skips calls that would not
+    change anything.
+
+    Covers the bound program, vertex array and textures, the enabled
+    capabilities, and the blend, depth, line width, hint and primitive restart
+    settings. Only changes made through this object are known, so code that
+    sets these with OpenGL directly must call `invalidate()` afterwards.
+    """
+    def __init__(self):
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget everything, so the next call of each setter reaches OpenGL."""
+        self._program = None
+        self._vertex_array = None
+        self._active_texture = None
+        self._textures = {}
+        self._capabilities = {}
+        self._blend_func = None
+        self._depth_func = None
+        self._depth_mask = None
+        self._line_width = None
+        self._hints = {}
+        self._primitive_restart_index = None
+
+    def use_program(self, prog_id: int):
+        if self._program != prog_id:
+            glUseProgram(prog_id)
+            self._program = prog_id
+
+    def bind_vertex_array(self, vao_id: int):
+        if self._vertex_array != vao_id:
+            glBindVertexArray(vao_id)
+            self._vertex_array = vao_id
+
+    def bind_texture(self, texture_unit: int, target: GLenum, texture_id: int):
+        if self._active_texture != texture_unit:
+            glActiveTexture(GL_TEXTURE0 + texture_unit)
+            self._active_texture = texture_unit
+        key = (texture_unit, target)
+        if self._textures.get(key) != texture_id:
+            glBindTexture(target, texture_id)
+            self._textures[key] = texture_id
+
+    def forget_vertex_array(self, vao_id: int):
+        """Note a deleted vertex array. OpenGL unbinds it if it was bound."""
+        if self._vertex_array == vao_id:
+            self._vertex_array = 0
+
+    def forget_texture(self, texture_id: int):
+        """Note a deleted texture. OpenGL unbinds it where it was bound."""
+        for key, bound_id in self._textures.items():
+            if bound_id == texture_id:
+                self._textures[key] = 0
+
+    def enable(self, capability: GLenum):
+        if self._capabilities.get(capability) is not True:
+            glEnable(capability)
+            self._capabilities[capability] = True
+
+    def disable(self, capability: GLenum):
+        if self._capabilities.get(capability) is not False:
+            glDisable(capability)
+            self._capabilities[capability] = False
+
+    def blend_func(self, src: GLenum, dst: GLenum):
+        if self._blend_func != (src, dst):
+            glBlendFunc(src, dst)
+            self._blend_func = (src, dst)
+
+    def depth_func(self, func: GLenum):
+        if self._depth_func != func:
+            glDepthFunc(func)
+            self._depth_func = func
+
+    def depth_mask(self, flag: bool):
+        if self._depth_mask != flag:
+            glDepthMask(GL_TRUE if flag else GL_FALSE)
+            self._depth_mask = flag
+
+    def line_width(self, width: float):
+        if self._line_width != width:
+            glLineWidth(width)
+            self._line_width = width
+
+    def hint(self, target: GLenum, mode: GLenum):
+        if self._hints.get(target) != mode:
+            glHint(target, mode)
+            self._hints[target] = mode
+
+    def primitive_restart_index(self, index: int):
+        if self._primitive_restart_index != index:
+            glPrimitiveRestartIndex(index)
+            self._primitive_restart_index = index
+
+
+_context_states = weakref.WeakKeyDictionary()
+_no_context_state = ContextState()
+_last_context = None
+_last_state = _no_context_state
+
+
+def context_state() -> ContextState:
+    """Return the state tracker of the current OpenGL context."""
+    global _last_context, _last_state
+    context = gl.current_context
+    if context is not _last_context:
+        if context is None:
+            _last_state = _no_context_state
+        else:
+            _last_state = _context_states.setdefault(context, ContextState())
+        _last_context = context
+    return _last_state
+
+
 # Thank you Benjamin Moran for writing part of this code!
 # https://bitbucket.org/HigashiNoKaze/pyglet/src/shaders/pyglet/graphics/shader.py
 
@@ -37,6 +187,7 @@ class ShaderException(Exception):
     GL_FLOAT_VEC4: (GLfloat, glUniform4fv, 4, 1),
 
     GL_SAMPLER_2D: (GLint, glUniform1iv, 1, 1),
+    GL_SAMPLER_2D_ARRAY: (GLint, glUniform1iv, 1, 1),
 
     GL_FLOAT_MAT2: (GLfloat, glUniformMatrix2fv, 4, 1),
     GL_FLOAT_MAT3: (GLfloat, glUniformMatrix3fv, 6, 1),
@@ -69,18 +220,32 @@ def getter_func():
 
 
 def _create_setter_func(location, gl_setter, c_array, length, count, ptr, is_matrix):
+    # Value of the last upload. Setting the same value again is skipped,
+    # the program keeps it.
+    last = [None]
 
     if is_matrix:
         def setter_func(value):
+            value = tuple(value)
+            if value == last[0]:
+                return
+            last[0] = value
             c_array[:] = value
             gl_setter(location, count, GL_FALSE, ptr)
 
     elif length == 1 and count == 1:
         def setter_func(value):
+            if value == last[0]:
+                return
+            last[0] = value
             c_array[0] = value
             gl_setter(location, count, ptr)
     elif length > 1 and count == 1:
         def setter_func(values):
+            values = tuple(values)
+            if values == last[0]:
+                return
+            last[0] = values
             c_array[:] = values
             gl_setter(location, count, ptr)
 
@@ -91,6 +256,32 @@ def setter_func(values):
 
 
 Uniform = namedtuple('Uniform', 'getter, setter')
+
+# Binding points of the uniform blocks programs can share, by block name
+_uniform_block_bindings = {}
+
+# Block holding the globals of every arcade program:
+#
+#   layout (std140) uniform Globals {
+#       mat4 Projection;
+#       float Time;
+#   };
+GLOBALS_BLOCK = 'Globals'
+GLOBALS_BINDING = 0
+
+
+def set_uniform_block_binding(name: str, binding: int):
+    """Bind the uniform block `name` of programs linked from now on to a
+    uniform buffer binding point."""
+    _uniform_block_bindings[name] = binding
+
+
+def bind_uniform_buffer(buffer: 'Buffer', binding: int):
+    """Make a Buffer the uniform buffer of a binding point."""
+    glBindBufferBase(GL_UNIFORM_BUFFER, binding, buffer.buffer_id)
+
+
+set_uniform_block_binding(GLOBALS_BLOCK, GLOBALS_BINDING)
 ShaderCode = str
 ShaderType = GLuint
 Shader = type(Tuple[ShaderCode, ShaderType])
@@ -107,22 +298,39 @@ class Program:
         matrix = np.array([[...]])
         program['MyMatrix'] = matrix.flatten()
     """
-    def __init__(self, *shaders: Shader):
+    def __init__(self, *shaders: Shader, binary_cache: 'ProgramBinaryCache' = None):
         self.prog_id = prog_id = glCreateProgram()
         shaders_id = []
-        for shader_code, shader_type in shaders:
-            shader = compile_shader(shader_code, shader_type)
-            glAttachShader(self.prog_id, shader)
-            shaders_id.append(shader)
 
-        glLinkProgram(self.prog_id)
+        key = None
+        if binary_cache is not None:
+            key = binary_cache.key(shaders)
+        if key is None or not binary_cache.load(prog_id, key):
+            for shader_code, shader_type in shaders:
+                shader = compile_shader(shader_code, shader_type)
+                glAttachShader(self.prog_id, shader)
+                shaders_id.append(shader)
 
-        for shader in shaders_id:
-            # Flag shaders for deletion. Will only be deleted once detached from program.
-            glDeleteShader(shader)
+            if key is not None:
+                glProgramParameteri(prog_id, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+            glLinkProgram(self.prog_id)
+
+            for shader in shaders_id:
+                # Flag shaders for deletion. Will only be deleted once detached from program.
+                glDeleteShader(shader)
+
+            if not self.link_status():
+                raise ShaderException(f"Program link failure: {self.info_log()}")
+            if key is not None:
+                binary_cache.store(prog_id, key)
 
         self._uniforms = {}
         self._introspect_uniforms()
+        self._bind_uniform_blocks()
+        self._attributes = {}
+        self._introspect_attributes()
+        # Attribute pointer layouts of the buffer descriptions used with this program
+        self._layouts = {}
         weakref.finalize(self, Program._delete, shaders_id, prog_id)
 
     @staticmethod
@@ -137,6 +345,20 @@ def _delete(shaders_id, prog_id):
 
         glDeleteProgram(prog_id)
 
+    def link_status(self) -> bool:
+        """Return True if the program was linked successfully."""
+        status = GLint()
+        glGetProgramiv(self.prog_id, GL_LINK_STATUS, byref(status))
+        return status.value == GL_TRUE
+
+    def info_log(self) -> str:
+        """Return the information log of the last link."""
+        length = GLint()
+        glGetProgramiv(self.prog_id, GL_INFO_LOG_LENGTH, byref(length))
+        msg = create_string_buffer(max(length.value, 1))
+        glGetProgramInfoLog(self.prog_id, len(msg), None, msg)
+        return msg.value.decode('utf-8', 'replace')
+
     def release(self):
         if self.prog_id != 0:
             glDeleteProgram(self.prog_id)
@@ -159,10 +381,11 @@ def __setitem__(self, key, value):
         uniform.setter(value)
 
     def __enter__(self):
-        glUseProgram(self.prog_id)
+        context_state().use_program(self.prog_id)
 
     def __exit__(self, exception_type, exception_value, traceback):
-        glUseProgram(0)
+        # Left bound, the next user binds its own program if it differs
+        pass
 
     def get_num_active(self, variable_type: GLenum) -> int:
         """Get the number of active variables of the passed GL type.
@@ -203,6 +426,62 @@ def _introspect_uniforms(self):
 
             self._uniforms[uniform_name] = Uniform(getter, setter)
 
+    def _bind_uniform_blocks(self):
+        for index in range(self.get_num_active(GL_ACTIVE_UNIFORM_BLOCKS)):
+            buf_size = 192
+            name = create_string_buffer(buf_size)
+            glGetActiveUniformBlockName(self.prog_id, index, buf_size, None, name)
+            binding = _uniform_block_bindings.get(name.value.decode())
+            if binding is not None:
+                glUniformBlockBinding(self.prog_id, index, binding)
+
+    def _introspect_attributes(self):
+        for index in range(self.get_num_active(GL_ACTIVE_ATTRIBUTES)):
+            size = GLint()
+            attrib_type = GLenum()
+            buf_size = 192
+            name = create_string_buffer(buf_size)
+            glGetActiveAttrib(self.prog_id, index, buf_size, None, size, attrib_type, name)
+            loc = glGetAttribLocation(self.prog_id, name.value)
+            self._attributes[name.value.decode()] = loc
+
+    def attribute_location(self, name: str) -> int:
+        """Return the location of an active attribute, or -1 if the program
+        has no such attribute."""
+        return self._attributes.get(name, -1)
+
+    def attribute_layout(self, buf_desc: 'BufferDescription') -> Tuple[int, list]:
+        """Return the stride and the attribute pointers of a buffer description
+        as a list of (location, size, gl type, normalized, offset).
+
+        The layout only depends on the description's format and attributes, so
+        it is worked out once per program for each of them.
+        """
+        key = (tuple(buf_desc.formats), tuple(buf_desc.attributes), frozenset(buf_desc.normalized))
+        layout = self._layouts.get(key)
+        if layout is not None:
+            return layout
+
+        stride = sum(attribsize for _, attribsize, _ in buf_desc.formats)
+        pointers = []
+        offset = 0
+        attributes = iter(buf_desc.attributes)
+        for size, attribsize, gl_type_enum in buf_desc.formats:
+            if gl_type_enum is None:
+                offset += attribsize
+                continue
+            attrib = next(attributes)
+            loc = self.attribute_location(attrib)
+            if loc == -1:
+                raise ShaderException(f"Attribute {attrib} not found in shader program")
+            normalized = GL_TRUE if attrib in buf_desc.normalized else GL_FALSE
+            pointers.append((loc, size, gl_type_enum, normalized, offset))
+            offset += attribsize
+
+        layout = stride, pointers
+        self._layouts[key] = layout
+        return layout
+
     def query_uniform(self, index: int) -> Tuple[str, int, int]:
         """Retrieve Uniform information at given location.
 
@@ -218,13 +497,163 @@ def query_uniform(self, index: int) -> Tuple[str, int, int]:
         return uname.value.decode(), utype.value, usize.value
 
 
+class ProgramBinaryCache:
+    """Stores linked programs on disk with glGetProgramBinary, so later runs
+    can load them with glProgramBinary instead of compiling the GLSL code.
+
+    A binary is only valid for the driver that made it, so files are named by
+    a hash of the shader code and the OpenGL vendor, renderer and version.
+    Binaries the driver rejects, after an update for instance, are compiled
+    again and replaced. Problems reading or writing files are ignored.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.loaded = 0
+        self.stored = 0
+
+        num_formats = GLint()
+        glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS, byref(num_formats))
+        self.supported = num_formats.value > 0
+
+        driver = [cast(glGetString(name), c_char_p).value or b''
+                  for name in (GL_VENDOR, GL_RENDERER, GL_VERSION)]
+        self._driver = b'\0'.join(driver)
+
+    def key(self, shaders: Iterable[Shader]):
+        """Return the name of the cache entry for the given shaders, or None
+        if the driver can't save program binaries."""
+        if not self.supported:
+            return None
+        digest = hashlib.sha256(self._driver)
+        for shader_code, shader_type in shaders:
+            digest.update(b'\0%d\0' % shader_type)
+            digest.update(shader_code.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.bin')
+
+    def load(self, prog_id: GLuint, key: str) -> bool:
+        """Load a cached binary into the program. Returns False if there is
+        none, or the driver rejected it."""
+        try:
+            with open(self._path(key), 'rb') as file:
+                data = file.read()
+        except OSError:
+            return False
+        if len(data) <= 4:
+            return False
+
+        binary_format, = struct.unpack('<I', data[:4])
+        binary = data[4:]
+        try:
+            glProgramBinary(prog_id, binary_format, binary, len(binary))
+        except GLException:
+            return False
+
+        status = GLint()
+        glGetProgramiv(prog_id, GL_LINK_STATUS, byref(status))
+        if status.value != GL_TRUE:
+            return False
+        self.loaded += 1
+        return True
+
+    def store(self, prog_id: GLuint, key: str):
+        """Save the binary of a linked program."""
+        length = GLint()
+        glGetProgramiv(prog_id, GL_PROGRAM_BINARY_LENGTH, byref(length))
+        if length.value <= 0:
+            return
+        binary = create_string_buffer(length.value)
+        binary_format = GLenum()
+        written = GLsizei()
+        glGetProgramBinary(prog_id, length.value, byref(written), byref(binary_format), binary)
+
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, 'wb') as file:
+                file.write(struct.pack('<I', binary_format.value))
+                file.write(binary.raw[:written.value])
+            # Other processes never see a half written file
+            os.replace(temp_path, path)
+        except OSError:
+            return
+        self.stored += 1
+
+
+def default_program_cache_directory() -> str:
+    """Return the directory where program binaries are cached by default,
+    inside the user cache directory of the platform."""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'arcade', 'programs')
+
+
+_binary_cache = None
+_binary_cache_directory = None
+
+
+def enable_program_cache(directory: str = None):
+    """Cache linked programs on disk, so later runs start faster. Off by default.
+
+    `directory` defaults to `default_program_cache_directory()`.
+    """
+    global _binary_cache, _binary_cache_directory
+    _binary_cache_directory = directory or default_program_cache_directory()
+    _binary_cache = None
+
+
+def disable_program_cache():
+    """Stop using the on disk program cache."""
+    global _binary_cache, _binary_cache_directory
+    _binary_cache_directory = None
+    _binary_cache = None
+
+
+def get_program_cache() -> 'ProgramBinaryCache':
+    """Return the on disk program cache, or None if it isn't enabled."""
+    global _binary_cache
+    if _binary_cache is None and _binary_cache_directory is not None:
+        # Created on first use, it needs a context to query the driver
+        _binary_cache = ProgramBinaryCache(_binary_cache_directory)
+    return _binary_cache
+
+
+# Linked programs of each context, keyed by their shader sources
+_programs = weakref.WeakKeyDictionary()
+
+
 def program(vertex_shader: str, fragment_shader: str) -> Program:
     """Create a new program given the vertex_shader and fragment shader code.
+
+    Programs are shared: asking again for the same code in the same context
+    returns the program linked the first time. Uniform values belong to the
+    program, so users of a shared program set the ones they need before drawing.
     """
-    return Program(
-        (vertex_shader, GL_VERTEX_SHADER),
-        (fragment_shader, GL_FRAGMENT_SHADER)
-    )
+    context = gl.current_context
+    if context is None:
+        return Program(
+            (vertex_shader, GL_VERTEX_SHADER),
+            (fragment_shader, GL_FRAGMENT_SHADER)
+        )
+
+    programs = _programs.setdefault(context, {})
+    key = (vertex_shader, fragment_shader)
+    prog = programs.get(key)
+    if prog is None:
+        prog = Program(
+            (vertex_shader, GL_VERTEX_SHADER),
+            (fragment_shader, GL_FRAGMENT_SHADER),
+            binary_cache=get_program_cache()
+        )
+        programs[key] = prog
+    return prog
 
 
 def compile_shader(source: str, shader_type: GLenum) -> GLuint:
@@ -274,7 +703,8 @@ class Buffer:
 
     def __init__(self, data: bytes, usage: str = 'static'):
         self.buffer_id = buffer_id = GLuint()
-        self.size = len(data)
+        data, pointer, self.size = _get_data_pointer(data)
+        self.mapped_address = None
 
         glGenBuffers(1, byref(self.buffer_id))
         if self.buffer_id.value == 0:
@@ -282,7 +712,7 @@ def __init__(self, data: bytes, usage: str = 'static'):
 
         glBindBuffer(GL_ARRAY_BUFFER, self.buffer_id)
         self.usage = Buffer.usages[usage]
-        glBufferData(GL_ARRAY_BUFFER, self.size, data, self.usage)
+        glBufferData(GL_ARRAY_BUFFER, self.size, pointer, self.usage)
         weakref.finalize(self, Buffer.release, buffer_id)
 
     @classmethod
@@ -294,6 +724,25 @@ def create_with_size(cls, size: int, usage: str = 'static'):
         buffer.size = size
         return buffer
 
+    @classmethod
+    def create_persistent(cls, size: int):
+        """Create a Buffer storage of the given size, mapped for writing for its
+        whole life. Requires `have_buffer_storage()`.
+
+        Writes go straight to the mapped memory, so the caller must make sure
+        the GPU is done with a range before writing it again.
+        """
+        buffer = Buffer(b"", usage='stream')
+        glBindBuffer(GL_ARRAY_BUFFER, buffer.buffer_id)
+        flags = GL_MAP_WRITE_BIT | GL_MAP_PERSISTENT_BIT | GL_MAP_COHERENT_BIT
+        glBufferStorage(GL_ARRAY_BUFFER, size, None, flags)
+        ptr = glMapBufferRange(GL_ARRAY_BUFFER, GLintptr(0), size, flags)
+        buffer.mapped_address = cast(ptr, c_void_p).value
+        if not buffer.mapped_address:
+            raise ShaderException("Cannot map Buffer object.")
+        buffer.size = size
+        return buffer
+
     @staticmethod
     def release(buffer_id):
 
@@ -306,17 +755,37 @@ def release(buffer_id):
             buffer_id.value = 0
 
     def write(self, data: bytes, offset: int = 0):
+        """Write bytes, or a numpy array, at `offset` bytes into the buffer."""
+        data, pointer, size = _get_data_pointer(data)
+        if self.mapped_address is not None:
+            memmove(self.mapped_address + offset, pointer, size)
+            return
         glBindBuffer(GL_ARRAY_BUFFER, self.buffer_id)
-        glBufferSubData(GL_ARRAY_BUFFER, GLintptr(offset), len(data), data)
+        glBufferSubData(GL_ARRAY_BUFFER, GLintptr(offset), size, pointer)
         # print(f"Writing data:\n{data[:60]}")
         # ptr = glMapBufferRange(GL_ARRAY_BUFFER, GLintptr(0), 20, GL_MAP_READ_BIT)
         # print(f"Reading back from buffer:\n{string_at(ptr, size=60)}")
         # glUnmapBuffer(GL_ARRAY_BUFFER)
 
+    def copy(self, source: 'Buffer', size: int, source_offset: int = 0, offset: int = 0):
+        """Copy `size` bytes from another Buffer into this one, without going
+        through the CPU."""
+        glBindBuffer(GL_COPY_READ_BUFFER, source.buffer_id)
+        glBindBuffer(GL_COPY_WRITE_BUFFER, self.buffer_id)
+        glCopyBufferSubData(GL_COPY_READ_BUFFER, GL_COPY_WRITE_BUFFER,
+                            GLintptr(source_offset), GLintptr(offset), size)
+
     def orphan(self):
         glBindBuffer(GL_ARRAY_BUFFER, self.buffer_id)
         glBufferData(GL_ARRAY_BUFFER, self.size, None, self.usage)
 
+    def read(self, size: int, offset: int = 0) -> bytes:
+        """Read `size` bytes back from the buffer."""
+        data = create_string_buffer(size)
+        glBindBuffer(GL_ARRAY_BUFFER, self.buffer_id)
+        glGetBufferSubData(GL_ARRAY_BUFFER, GLintptr(offset), size, data)
+        return data.raw
+
     def _read(self, size):
         """ Debug method to read data from the buffer. """
 
@@ -326,12 +795,114 @@ def _read(self, size):
         glUnmapBuffer(GL_ARRAY_BUFFER)
 
 
+def _get_data_pointer(data):
+    """Return the data, something OpenGL can read it from, and its size in bytes.
+
+    Numpy arrays are read where they are, without copying them to bytes
+    first, unless they aren't contiguous. The returned data has to be kept
+    until OpenGL is done reading.
+    """
+    if isinstance(data, np.ndarray):
+        data = np.ascontiguousarray(data)
+        return data, data.ctypes.data_as(c_void_p), data.nbytes
+    return data, data, len(data)
+
+
 def buffer(data: bytes, usage: str = 'static') -> Buffer:
     """Create a new OpenGL Buffer object.
     """
     return Buffer(data, usage)
 
 
+class StreamBuffer:
+    """Ring of Buffers for data that is rewritten every frame.
+
+    Re-specifying a buffer the GPU is still reading from makes the driver
+    either stall or allocate new storage. Instead, each write goes to the next
+    of `frames` Buffers, and waits on a fence only if the GPU hasn't finished
+    with that one yet. With OpenGL 4.4 the Buffers are persistently mapped,
+    otherwise they are written with glBufferSubData.
+
+    A VertexArray is usually created for each of the Buffers, and the one
+    matching the slot returned by `write` is rendered. A write that doesn't
+    fit replaces the Buffers with larger ones, so make the VertexArrays again
+    when `size` changes.
+
+    Example:
+        stream = StreamBuffer(size)
+        vaos = [vertex_array(program, [BufferDescription(buf, ...)])
+                for buf in stream.buffers]
+        slot = stream.write(data)
+        with vaos[slot]:
+            vaos[slot].render(mode)
+        stream.fence()
+    """
+    def __init__(self, size: int, frames: int = 3):
+        self.frames = frames
+        self.persistent = have_buffer_storage()
+        self._fences = [None] * frames
+        self._create_buffers(size)
+        self.slot = frames - 1
+        weakref.finalize(self, StreamBuffer.release, self._fences)
+
+    def _create_buffers(self, size: int):
+        self.size = size
+        if self.persistent:
+            self.buffers = [Buffer.create_persistent(size) for _ in range(self.frames)]
+        else:
+            self.buffers = [Buffer.create_with_size(size, usage='stream') for _ in range(self.frames)]
+
+    def write(self, data: bytes) -> int:
+        """Write data to the next Buffer of the ring and return its slot.
+        The Buffers are replaced with larger ones if the data doesn't fit."""
+        size = data.nbytes if isinstance(data, np.ndarray) else len(data)
+        if size > self.size:
+            # The old Buffers are deleted once the GPU is done with them
+            StreamBuffer.release(self._fences)
+            self._create_buffers(max(size, self.size * 2))
+        self.slot = (self.slot + 1) % self.frames
+        self._wait(self.slot)
+        self.buffers[self.slot].write(data)
+        return self.slot
+
+    def fence(self):
+        """Mark the last written Buffer as in use by the commands issued so far.
+        Call after rendering from it."""
+        fence = self._fences[self.slot]
+        if fence is not None:
+            glDeleteSync(fence)
+        self._fences[self.slot] = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+
+    def _wait(self, slot: int):
+        fence = self._fences[slot]
+        if fence is None:
+            return
+        # The flush bit makes sure the fence is submitted, so this ends
+        while True:
+            result = glClientWaitSync(fence, GL_SYNC_FLUSH_COMMANDS_BIT, 1000000000)
+            if result != GL_TIMEOUT_EXPIRED:
+                break
+        glDeleteSync(fence)
+        self._fences[slot] = None
+
+    @staticmethod
+    def release(fences):
+        # If we have no context, then we are shutting down, so skip this
+        if gl.current_context is None:
+            return
+
+        for slot, fence in enumerate(fences):
+            if fence is not None:
+                glDeleteSync(fence)
+                fences[slot] = None
+
+
+def stream_buffer(size: int, frames: int = 3) -> StreamBuffer:
+    """Create a new ring of Buffers for streaming data.
+    """
+    return StreamBuffer(size, frames)
+
+
 class BufferDescription:
     """Vertex Buffer Object description, allowing easy use with VAOs.
 
@@ -340,7 +911,8 @@ class BufferDescription:
     vertex Buffer object.
 
     The formats is a string providing the number and type of each attribute. Currently
-    we only support f (float), i (integer) and B (unsigned byte).
+    we only support f (float), i (integer) and B (unsigned byte). A format with the
+    type x (padding), like `4x`, skips that many bytes and has no attribute.
 
     `normalized` enumerates the attributes which must have their values normalized.
     This is useful for instance for colors attributes given as unsigned byte and
@@ -376,18 +948,23 @@ def __init__(self,
             raise ShaderException("Normalized attribute not found in attributes.")
 
         formats = formats.split(" ")
+        attribute_formats = [fmt for fmt in formats if not fmt.endswith('x')]
 
-        if len(formats) != len(self.attributes):
+        if len(attribute_formats) != len(self.attributes):
             raise ShaderException(
-                f"Different lengths of formats ({len(formats)}) and "
+                f"Different lengths of formats ({len(attribute_formats)}) and "
                 f"attributes ({len(self.attributes)})"
             )
 
         self.formats = []
         for i, fmt in enumerate(formats):
-            size, type_ = fmt
+            size, type_ = fmt[:-1], fmt[-1]
+            if type_ == 'x' and size.isdigit():
+                # Padding, with no gl type
+                self.formats.append((0, int(size), None))
+                continue
             if size not in ('1234') or type_ not in 'fiB':
-                raise ShaderException("Wrong format {fmt}.")
+                raise ShaderException(f"Wrong format {fmt}.")
             size = int(size)
             gl_type_enum = BufferDescription.GL_TYPES_ENUM[type_]
             gl_type = BufferDescription.GL_TYPES[type_]
@@ -429,12 +1006,13 @@ def __init__(self,
                  content: Iterable[BufferDescription],
                  index_buffer: Buffer = None):
         self.program = program.prog_id
+        self._program = program
         self.vao = vao = GLuint()
         self.num_vertices = -1
         self.ibo = index_buffer
 
         glGenVertexArrays(1, byref(self.vao))
-        glBindVertexArray(self.vao)
+        context_state().bind_vertex_array(self.vao.value)
 
         for buffer_desc in content:
             self._enable_attrib(buffer_desc)
@@ -450,19 +1028,22 @@ def release(vao):
             return
 
         if vao.value != 0:
+            context_state().forget_vertex_array(vao.value)
             glDeleteVertexArrays(1, byref(vao))
             vao.value = 0
 
     def __enter__(self):
-        glBindVertexArray(self.vao)
-        glUseProgram(self.program)
+        state = context_state()
+        state.bind_vertex_array(self.vao.value)
+        state.use_program(self.program)
 
     def __exit__(self, exception_type, exception_value, traceback):
-        glUseProgram(0)
+        # Left bound, the next user binds its own if it differs
+        pass
 
     def _enable_attrib(self, buf_desc: BufferDescription):
         buffer = buf_desc.buffer
-        stride = sum(attribsize for _, attribsize, _ in buf_desc.formats)
+        stride, pointers = self._program.attribute_layout(buf_desc)
 
         if buf_desc.instanced:
             if self.num_vertices == -1:
@@ -474,28 +1055,26 @@ def _enable_attrib(self, buf_desc: BufferDescription):
             # print(f"Number of vertices: {self.num_vertices}")
 
         glBindBuffer(GL_ARRAY_BUFFER, buffer.buffer_id)
-        offset = 0
-        for (size, attribsize, gl_type_enum), attrib in zip(buf_desc.formats, buf_desc.attributes):
-            loc = glGetAttribLocation(self.program, attrib.encode('utf-8'))
-            if loc == -1:
-                raise ShaderException(f"Attribute {attrib} not found in shader program")
-            normalized = GL_TRUE if attrib in buf_desc.normalized else GL_FALSE
+        for loc, size, gl_type_enum, normalized, offset in pointers:
             glVertexAttribPointer(
                 loc, size, gl_type_enum,
                 normalized, stride, c_void_p(offset)
             )
-            # print(f"{attrib} of size {size} with stride {stride} and offset {offset}")
             if buf_desc.instanced:
                 glVertexAttribDivisor(loc, 1)
-            offset += attribsize
             glEnableVertexAttribArray(loc)
 
-    def render(self, mode: GLuint, instances: int = 1):
+    def render(self, mode: GLuint, instances: int = 1, vertices: int = None):
+        """Draw the Vertex Array. `vertices` limits how many of the vertices,
+        or indices if there is an index buffer, are drawn, for buffers that
+        are only partly filled."""
         if self.ibo is not None:
-            count = self.ibo.size // 4
+            count = self.ibo.size // 4 if vertices is None else vertices
             glDrawElementsInstanced(mode, count, GL_UNSIGNED_INT, None, instances)
         else:
-            glDrawArraysInstanced(mode, 0, self.num_vertices, instances)
+            if vertices is None:
+                vertices = self.num_vertices
+            glDrawArraysInstanced(mode, 0, vertices, instances)
 
 
 def vertex_array(program: GLuint, content, index_buffer = None):
@@ -505,18 +1084,17 @@ def vertex_array(program: GLuint, content, index_buffer = None):
 
 
 class Texture:
-    def __init__(self, size: Tuple[int, int], component: int, data: np.array):
+    def __init__(self, size: Tuple[int, int], component: int, data: np.array, filter: int = GL_LINEAR):
         self.width, self.height = size
         sized_format = (GL_R8, GL_RG8, GL_RGB8, GL_RGBA8)[component - 1]
-        self.format = (GL_R, GL_RG, GL_RGB, GL_RGBA)[component - 1]
-        glActiveTexture(GL_TEXTURE0 + 0)  # If we need other texture unit...
+        self.format = (GL_RED, GL_RG, GL_RGB, GL_RGBA)[component - 1]
         self.texture_id = texture_id = GLuint()
         glGenTextures(1, byref(self.texture_id))
 
         if self.texture_id.value == 0:
             raise ShaderException("Cannot create Texture.")
 
-        glBindTexture(GL_TEXTURE_2D, self.texture_id)
+        context_state().bind_texture(0, GL_TEXTURE_2D, self.texture_id.value)
         glPixelStorei(GL_PACK_ALIGNMENT, 1)
         glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
         try:
@@ -527,10 +1105,22 @@ def __init__(self, size: Tuple[int, int], component: int, data: np.array):
         except GLException as e:
             raise GLException(f"Unable to create texture. {GL_MAX_TEXTURE_SIZE} {size}")
 
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, filter)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, filter)
         weakref.finalize(self, Texture.release, texture_id)
 
+    def write(self, data: np.array, x: int = 0, y: int = 0):
+        """Write an image, given as a (height, width, component) array of bytes.
+        `x` and `y` give the position of its first pixel."""
+        data = np.ascontiguousarray(data, dtype=np.uint8)
+        height, width = data.shape[:2]
+        context_state().bind_texture(0, GL_TEXTURE_2D, self.texture_id.value)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexSubImage2D(
+            GL_TEXTURE_2D, 0, x, y, width, height,
+            self.format, GL_UNSIGNED_BYTE, data.ctypes.data_as(c_void_p)
+        )
+
     @staticmethod
     def release(texture_id):
         # If we have no context, then we are shutting down, so skip this
@@ -538,12 +1128,63 @@ def release(texture_id):
             return
 
         if texture_id.value != 0:
+            context_state().forget_texture(texture_id.value)
             glDeleteTextures(1, byref(texture_id))
 
     def use(self, texture_unit: int = 0):
-        glActiveTexture(GL_TEXTURE0 + texture_unit)
-        glBindTexture(GL_TEXTURE_2D, self.texture_id)
+        context_state().bind_texture(texture_unit, GL_TEXTURE_2D, self.texture_id.value)
+
+
+def texture(size: Tuple[int, int], component: int, data: np.array, filter: int = GL_LINEAR) -> Texture:
+    return Texture(size, component, data, filter)
+
+
+class TextureArray:
+    """OpenGL texture of type GL_TEXTURE_2D_ARRAY.
+
+    All the layers share the same size and format. Shaders sample it with a
+    `sampler2DArray` and a vec3 texture coordinate, where z is the layer.
+    """
+    def __init__(self, size: Tuple[int, int], layers: int, component: int = 4):
+        self.width, self.height = size
+        self.layers = layers
+        sized_format = (GL_R8, GL_RG8, GL_RGB8, GL_RGBA8)[component - 1]
+        self.format = (GL_RED, GL_RG, GL_RGB, GL_RGBA)[component - 1]
+        self.texture_id = texture_id = GLuint()
+        glGenTextures(1, byref(self.texture_id))
+
+        if self.texture_id.value == 0:
+            raise ShaderException("Cannot create TextureArray.")
+
+        context_state().bind_texture(0, GL_TEXTURE_2D_ARRAY, self.texture_id.value)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        try:
+            glTexImage3D(
+                GL_TEXTURE_2D_ARRAY, 0, sized_format, self.width, self.height, self.layers, 0,
+                self.format, GL_UNSIGNED_BYTE, None
+            )
+        except GLException as e:
+            raise GLException(f"Unable to create texture array. {size} with {layers} layers")
+
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        weakref.finalize(self, Texture.release, texture_id)
+
+    def write(self, layer: int, data: np.array, x: int = 0, y: int = 0):
+        """Write an image, given as a (height, width, component) array of bytes,
+        into a layer. `x` and `y` give the position of its first pixel."""
+        data = np.ascontiguousarray(data, dtype=np.uint8)
+        height, width = data.shape[:2]
+        context_state().bind_texture(0, GL_TEXTURE_2D_ARRAY, self.texture_id.value)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexSubImage3D(
+            GL_TEXTURE_2D_ARRAY, 0, x, y, layer, width, height, 1,
+            self.format, GL_UNSIGNED_BYTE, data.ctypes.data_as(c_void_p)
+        )
+
+    def use(self, texture_unit: int = 0):
+        context_state().bind_texture(texture_unit, GL_TEXTURE_2D_ARRAY, self.texture_id.value)
 
 
-def texture(size: Tuple[int, int], component: int, data: np.array) -> Texture:
-    return Texture(size, component, data)
+def texture_array(size: Tuple[int, int], layers: int, component: int = 4) -> TextureArray:
+    return TextureArray(size, layers, component)
@@ -23,6 +23,8 @@
 FACE_UP = 3
 FACE_DOWN = 4
 
+ALL_COLLISION_LAYERS = 0xFFFFFFFF
+
 
 class Sprite:
     """
@@ -43,9 +45,18 @@ class Sprite:
         :change_y: Movement vector, in the y direction.
         :change_angle: Change in rotation.
         :color: Color tint the sprite
+        :collision_layer: Bitfield of the collision layers this sprite is on. \
+        Defaults to layer 1.
+        :collision_mask: Bitfield of the collision layers this sprite checks \
+        against. Sprites whose ``collision_layer`` shares no bit with this mask \
+        are skipped by the list collision checks before any geometry is tested. \
+        Defaults to all layers.
         :collision_radius: Used as a fast-check to see if this item is close \
         enough to another item. If this check works, we do a slower more accurate check.
         :cur_texture_index: Index of current texture being used.
+        :depth: Layer of the sprite, between -100 and 1000. Sprites with a \
+        higher depth are drawn in front when the sprite list uses \
+        ``depth_test``. Also used when sorting sprites.
         :guid: Unique identifier for the sprite. Useful when debugging.
         :height: Height of the sprite.
         :force: Force being applied to the sprite. Useful when used with Pymunk \
@@ -131,6 +142,7 @@ def __init__(self,
         self._scale = scale
         self._position = [center_x, center_y]
         self._angle = 0.0
+        self._depth = 0.0
 
         self.velocity = [0, 0]
         self.change_angle = 0
@@ -142,6 +154,8 @@ def __init__(self,
 
         self._alpha = 255
         self._collision_radius = None
+        self.collision_layer = 1
+        self.collision_mask = ALL_COLLISION_LAYERS
         self._color = (255, 255, 255)
 
         self._points = None
@@ -279,7 +293,7 @@ def _get_collision_radius(self):
     collision_radius = property(_get_collision_radius, _set_collision_radius)
 
     def __lt__(self, other):
-        return self._texture.texture_id.value < other.texture.texture_id.value
+        return self._depth < other._depth
 
     def clear_spatial_hashes(self):
         for sprite_list in self.sprite_lists:
@@ -457,6 +471,20 @@ def _set_angle(self, new_value: float):
 
     angle = property(_get_angle, _set_angle)
 
+    def _get_depth(self) -> float:
+        """ Get the depth of the sprite. """
+        return self._depth
+
+    def _set_depth(self, new_value: float):
+        """ Set the depth of the sprite. """
+        if new_value != self._depth:
+            self._depth = new_value
+
+            for sprite_list in self.sprite_lists:
+                sprite_list.update_depth(self)
+
+    depth = property(_get_depth, _set_depth)
+
     def _get_left(self) -> float:
         """
         Left-most coordinate.
@@ -19,12 +19,17 @@
 from arcade.sprite import get_distance_between_sprites
 
 from arcade.draw_commands import rotate_point
-from arcade.window_commands import get_projection
+from arcade.texture_atlas import TextureArrayAtlas
+from arcade.window_commands import get_viewport
+from arcade.window_commands import flush_batched_draws
 from arcade import shader
 
 VERTEX_SHADER = """
 #version 330
-uniform mat4 Projection;
+layout (std140) uniform Globals {
+    mat4 Projection;
+    float Time;
+};
 
 // per vertex
 in vec2 in_vert;
@@ -33,11 +38,14 @@
 // per instance
 in vec2 in_pos;
 in float in_angle;
+in float in_depth;
 in vec2 in_scale;
 in vec4 in_sub_tex_coords;
+in float in_layer;
 in vec4 in_color;
 
 out vec2 v_texture;
+flat out float v_layer;
 out vec4 v_color;
 
 void main() {
@@ -47,12 +55,13 @@
             );
     vec2 pos;
     pos = in_pos + vec2(rotate * (in_vert * in_scale));
-    gl_Position = Projection * vec4(pos, 0.0, 1.0);
+    gl_Position = Projection * vec4(pos, in_depth, 1.0);
 
     vec2 tex_offset = in_sub_tex_coords.xy;
     vec2 tex_size = in_sub_tex_coords.zw;
 
     v_texture = (in_texture * tex_size + tex_offset) * vec2(1, -1);
+    v_layer = in_layer;
     v_color = in_color;
 }
 """
@@ -60,6 +69,7 @@
 FRAGMENT_SHADER = """
 #version 330
 uniform sampler2D Texture;
+uniform int DepthPass;
 
 in vec2 v_texture;
 in vec4 v_color;
@@ -72,10 +82,53 @@
     if (basecolor.a == 0.0){
         discard;
     }
+    // With depth testing, solid and translucent pixels are drawn in separate passes
+    if (DepthPass == 1 && basecolor.a < 1.0){
+        discard;
+    }
+    if (DepthPass == 2 && basecolor.a >= 1.0){
+        discard;
+    }
     f_color = basecolor;
 }
 """
 
+TEXTURE_ARRAY_FRAGMENT_SHADER = """
+#version 330
+uniform sampler2DArray Texture;
+uniform int DepthPass;
+
+in vec2 v_texture;
+flat in float v_layer;
+in vec4 v_color;
+
+out vec4 f_color;
+
+void main() {
+    vec4 basecolor = texture(Texture, vec3(v_texture, v_layer));
+    basecolor = basecolor * v_color;
+    if (basecolor.a == 0.0){
+        discard;
+    }
+    // With depth testing, solid and translucent pixels are drawn in separate passes
+    if (DepthPass == 1 && basecolor.a < 1.0){
+        discard;
+    }
+    if (DepthPass == 2 && basecolor.a >= 1.0){
+        discard;
+    }
+    f_color = basecolor;
+}
+"""
+
+DEPTH_PASS_NONE = 0
+DEPTH_PASS_OPAQUE = 1
+DEPTH_PASS_TRANSLUCENT = 2
+
+# Per sprite data sent to the vertex shader
+SPRITE_DATA_TYPE = np.dtype([('position', '2f4'), ('angle', 'f4'), ('depth', 'f4'), ('size', '2f4'),
+                             ('sub_tex_coords', '4f4'), ('texture_layer', 'f4'), ('color', '4B')])
+
 
 def _create_rects(rect_list: Iterable[Sprite]) -> List[float]:
     """
@@ -199,9 +252,13 @@ def remove_object(self, sprite_to_delete: Sprite):
                     print(f"Warning, tried to remove item {sprite_to_delete.guid} from spatial hash {i} {j} when "
                           f"it wasn't there. {min_point} {max_point}")
 
-    def get_objects_for_box(self, check_object: Sprite) -> List[Sprite]:
+    def get_objects_for_box(self, check_object: Sprite, collision_mask: int = None) -> List[Sprite]:
         """
         Returns colliding Sprites.
+
+        :param check_object: Sprite whose bounding box is checked.
+        :param collision_mask: If given, only sprites with a ``collision_layer``
+               that shares a bit with this mask are returned.
         """
         # Get the corners
         min_x = check_object.left
@@ -224,11 +281,23 @@ def get_objects_for_box(self, check_object: Sprite) -> List[Sprite]:
                 new_items = self.contents.setdefault((i, j), [])
                 # for item in new_items:
                 #     print(f"Found {item.guid} in {i}, {j}")
-                close_by_sprites.extend(new_items)
+                if collision_mask is None:
+                    close_by_sprites.extend(new_items)
+                else:
+                    close_by_sprites.extend(item for item in new_items
+                                            if item.collision_layer & collision_mask)
 
         return close_by_sprites
 
 
+# Sprite attributes that SpriteList.sort can read straight from the instance data
+_SORT_COLUMNS = {
+    'center_x': ('position', 0),
+    'center_y': ('position', 1),
+    'angle': ('angle', None),
+    'depth': ('depth', None),
+}
+
 T = TypeVar('T', bound=Sprite)
 
 
@@ -236,7 +305,8 @@ class SpriteList(Generic[T]):
 
     next_texture_id = 0
 
-    def __init__(self, use_spatial_hash=False, spatial_hash_cell_size=128, is_static=False):
+    def __init__(self, use_spatial_hash=False, spatial_hash_cell_size=128, is_static=False,
+                 cull_to_viewport=False, depth_test=False, texture_atlas: TextureArrayAtlas = None):
         """
         Initialize the sprite list
 
@@ -246,6 +316,17 @@ def __init__(self, use_spatial_hash=False, spatial_hash_cell_size=128, is_static
                with walls/platforms.
         :param spatial_hash_cell_size:
         :param is_static: Speeds drawing if this list won't change.
+        :param cull_to_viewport: If set to True, only sprites that overlap the
+               current viewport are sent to the graphics card when drawing. Great
+               for large scrolling levels where most sprites are off-screen.
+        :param depth_test: If set to True, the ``depth`` of each sprite decides
+               what is drawn on top instead of the order of the list. Sprites
+               with a higher depth are drawn in front. Translucent pixels are
+               drawn in a second pass, sorted by depth.
+        :param texture_atlas: A ``TextureArrayAtlas`` to keep the sprite images
+               in, instead of a texture built for this list alone. The atlas
+               can hold more images than fit in one texture, and can be
+               shared by many sprite lists.
         """
         # List of sprites in the sprite list
         self.sprite_list = []
@@ -256,13 +337,27 @@ def __init__(self, use_spatial_hash=False, spatial_hash_cell_size=128, is_static
 
         self.sprite_data = None
         self.sprite_data_buf = None
+        self.sprite_data_stream = None
         self.texture_id = None
         self._texture = None
         self.vao = None
+        self._vaos = []
         self.vbo_buf = None
 
         self.array_of_texture_names = []
         self.array_of_images = []
+        self.texture_atlas = texture_atlas
+
+        # Used in viewport culling
+        self.cull_to_viewport = cull_to_viewport
+        self.visible_count = 0
+        self.culled_count = 0
+        # What the static buffer holds: the visible sprites (None for all) and
+        # whether they are sorted by depth. None when it has to be uploaded.
+        self._static_upload = (None, False)
+
+        # Used in depth based layering
+        self.depth_test = depth_test
 
         # Used in collision detection optimization
         self.is_static = is_static
@@ -311,6 +406,50 @@ def remove(self, item: T):
         if self.use_spatial_hash:
             self.spatial_hash.remove_object(item)
 
+    def sort(self, key=None, reverse: bool = False):
+        """
+        Sort the sprites in the list, in place. The buffers on the graphics
+        card are reordered along with it, so nothing has to be rebuilt.
+
+        :param key: Either the name of a sprite attribute with a number value,
+               such as ``'depth'``, ``'center_x'`` or ``'center_y'``, or a
+               function that takes a sprite and returns a value to sort by.
+               Attribute names are sorted with numpy and are much faster.
+               Defaults to ``'depth'``.
+        :param reverse: If set to True, sort from highest to lowest.
+        """
+        if len(self.sprite_list) == 0:
+            return
+
+        if key is None:
+            key = 'depth'
+
+        if isinstance(key, str):
+            if self.vao is not None and key in _SORT_COLUMNS:
+                column, index = _SORT_COLUMNS[key]
+                values = self.sprite_data[column]
+                if index is not None:
+                    values = values[:, index]
+            else:
+                values = np.array([getattr(sprite, key) for sprite in self.sprite_list])
+
+            if reverse:
+                # Sort the reversed values so equal items keep their order
+                order = len(values) - 1 - np.argsort(values[::-1], kind='stable')[::-1]
+            else:
+                order = np.argsort(values, kind='stable')
+        else:
+            values = [key(sprite) for sprite in self.sprite_list]
+            order = sorted(range(len(values)), key=values.__getitem__, reverse=reverse)
+
+        self.sprite_list = [self.sprite_list[i] for i in order]
+        self.sprite_idx = {sprite: idx for idx, sprite in enumerate(self.sprite_list)}
+
+        if self.vao is not None:
+            self.sprite_data = self.sprite_data[order]
+            # Dynamic lists upload the sprite data on every draw anyway
+            self._static_upload = None
+
     def update(self):
         """
         Call the update() method on each sprite in the list.
@@ -349,15 +488,96 @@ def _calculate_sprite_buffer(self):
         array_of_sizes = []
         array_of_colors = []
         array_of_angles = []
+        array_of_depths = []
 
         for sprite in self.sprite_list:
             array_of_positions.append([sprite.center_x, sprite.center_y])
             array_of_angles.append(math.radians(sprite.angle))
+            array_of_depths.append(sprite.depth)
             size_h = sprite.height / 2
             size_w = sprite.width / 2
             array_of_sizes.append([size_w, size_h])
             array_of_colors.append(sprite.color + (sprite.alpha, ))
 
+        if self.texture_atlas is None:
+            array_of_sub_tex_coords = self._calculate_texture()
+            array_of_layers = [0] * len(self.sprite_list)
+        else:
+            array_of_sub_tex_coords = []
+            array_of_layers = []
+            for sprite in self.sprite_list:
+                if sprite._texture is None:
+                    raise Exception("Error: Attempt to draw a sprite without a texture set.")
+                region = self.texture_atlas.add(sprite._texture)
+                array_of_sub_tex_coords.append(region.sub_tex_coords)
+                array_of_layers.append(region.layer)
+
+        # Create numpy array with info on location and such
+        self.sprite_data = np.zeros(len(self.sprite_list), dtype=SPRITE_DATA_TYPE)
+        self.sprite_data['position'] = array_of_positions
+        self.sprite_data['angle'] = array_of_angles
+        self.sprite_data['depth'] = array_of_depths
+        self.sprite_data['size'] = array_of_sizes
+        self.sprite_data['sub_tex_coords'] = array_of_sub_tex_coords
+        self.sprite_data['texture_layer'] = array_of_layers
+        self.sprite_data['color'] = array_of_colors
+
+        if self.is_static:
+            self.sprite_data_buf = shader.buffer(
+                self.sprite_data.tobytes(),
+                usage='static'
+            )
+            self.sprite_data_stream = None
+            instance_buffers = [self.sprite_data_buf]
+        else:
+            # Each draw writes to the next buffer of the ring, so it never
+            # waits on the GPU still drawing the previous frame
+            self.sprite_data_stream = shader.stream_buffer(self.sprite_data.nbytes)
+            self.sprite_data_buf = None
+            instance_buffers = self.sprite_data_stream.buffers
+        self._static_upload = (None, False)
+
+        vertices = np.array([
+            #  x,    y,   u,   v
+            -1.0, -1.0, 0.0, 0.0,
+            -1.0, 1.0, 0.0, 1.0,
+            1.0, -1.0, 1.0, 0.0,
+            1.0, 1.0, 1.0, 1.0,
+        ], dtype=np.float32
+        )
+        self.vbo_buf = shader.buffer(vertices.tobytes())
+        vbo_buf_desc = shader.BufferDescription(
+            self.vbo_buf,
+            '2f 2f',
+            ('in_vert', 'in_texture')
+        )
+        if self.texture_atlas is None:
+            # The single texture has no layers, so skip over the layer column
+            instance_format = '2f 1f 1f 2f 4f 4x 4B'
+            instance_attributes = ('in_pos', 'in_angle', 'in_depth', 'in_scale', 'in_sub_tex_coords', 'in_color')
+        else:
+            instance_format = '2f 1f 1f 2f 4f 1f 4B'
+            instance_attributes = ('in_pos', 'in_angle', 'in_depth', 'in_scale', 'in_sub_tex_coords', 'in_layer',
+                                   'in_color')
+
+        # One vertex array per instance buffer
+        self._vaos = []
+        for instance_buffer in instance_buffers:
+            pos_angle_scale_buf_desc = shader.BufferDescription(
+                instance_buffer,
+                instance_format,
+                instance_attributes,
+                normalized=['in_color'], instanced=True)
+
+            vao_content = [vbo_buf_desc, pos_angle_scale_buf_desc]
+
+            # Can add buffer to index vertices
+            self._vaos.append(shader.vertex_array(self.program, vao_content))
+        self.vao = self._vaos[0]
+
+    def _calculate_texture(self) -> List[List[float]]:
+        """ Build the texture holding the images of all the sprites, side by
+        side. Returns the sub-texture coordinates of each sprite. """
         new_array_of_texture_names = []
         new_array_of_images = []
         new_texture = False
@@ -449,50 +669,7 @@ def _calculate_sprite_buffer(self):
             index = self.array_of_texture_names.index(sprite._texture.name)
             array_of_sub_tex_coords.append(tex_coords[index])
 
-        # Create numpy array with info on location and such
-        buffer_type = np.dtype([('position', '2f4'), ('angle', 'f4'), ('size', '2f4'),
-                                ('sub_tex_coords', '4f4'), ('color', '4B')])
-        self.sprite_data = np.zeros(len(self.sprite_list), dtype=buffer_type)
-        self.sprite_data['position'] = array_of_positions
-        self.sprite_data['angle'] = array_of_angles
-        self.sprite_data['size'] = array_of_sizes
-        self.sprite_data['sub_tex_coords'] = array_of_sub_tex_coords
-        self.sprite_data['color'] = array_of_colors
-
-        if self.is_static:
-            usage = 'static'
-        else:
-            usage = 'stream'
-
-        self.sprite_data_buf = shader.buffer(
-            self.sprite_data.tobytes(),
-            usage=usage
-        )
-
-        vertices = np.array([
-            #  x,    y,   u,   v
-            -1.0, -1.0, 0.0, 0.0,
-            -1.0, 1.0, 0.0, 1.0,
-            1.0, -1.0, 1.0, 0.0,
-            1.0, 1.0, 1.0, 1.0,
-        ], dtype=np.float32
-        )
-        self.vbo_buf = shader.buffer(vertices.tobytes())
-        vbo_buf_desc = shader.BufferDescription(
-            self.vbo_buf,
-            '2f 2f',
-            ('in_vert', 'in_texture')
-        )
-        pos_angle_scale_buf_desc = shader.BufferDescription(
-            self.sprite_data_buf,
-            '2f 1f 2f 4f 4B',
-            ('in_pos', 'in_angle', 'in_scale', 'in_sub_tex_coords', 'in_color'),
-            normalized=['in_color'], instanced=True)
-
-        vao_content = [vbo_buf_desc, pos_angle_scale_buf_desc]
-
-        # Can add buffer to index vertices
-        self.vao = shader.vertex_array(self.program, vao_content)
+        return array_of_sub_tex_coords
 
     def _update_positions(self):
         """ Called by the Sprite class to update position, angle, size and color
@@ -505,6 +682,7 @@ def _update_positions(self):
         for i, sprite in enumerate(self.sprite_list):
             self.sprite_data[i]['position'] = [sprite.center_x, sprite.center_y]
             self.sprite_data[i]['angle'] = math.radians(sprite.angle)
+            self.sprite_data[i]['depth'] = sprite.depth
             self.sprite_data[i]['size'] = [sprite.width / 2, sprite.height / 2]
             self.sprite_data[i]['color'] = sprite.color + (sprite.alpha, )
 
@@ -514,7 +692,16 @@ def update_texture(self, sprite):
         if self.vao is None:
             return
 
-        self._calculate_sprite_buffer()
+        if self.texture_atlas is None:
+            self._calculate_sprite_buffer()
+        else:
+            # The shared atlas only needs the new image, if it isn't there yet
+            region = self.texture_atlas.add(sprite._texture)
+            i = self.sprite_idx[sprite]
+            self.sprite_data[i]['sub_tex_coords'] = region.sub_tex_coords
+            self.sprite_data[i]['texture_layer'] = region.layer
+            # Static lists only upload again when told to
+            self._static_upload = None
 
     def update_position(self, sprite):
         """ Called by the Sprite class to update position, angle, size and color
@@ -549,39 +736,138 @@ def update_angle(self, sprite):
         i = self.sprite_idx[sprite]
         self.sprite_data[i]['angle'] = math.radians(sprite.angle)
 
+    def update_depth(self, sprite):
+        """ Called by the Sprite class to update the depth in this sprite.
+        Necessary for batch drawing of items. """
+        if self.vao is None:
+            return
+
+        i = self.sprite_idx[sprite]
+        self.sprite_data[i]['depth'] = sprite.depth
+
+    def _calculate_visible_sprites(self) -> np.ndarray:
+        """ Return an array of booleans flagging the sprites whose bounding box
+        overlaps the current viewport. """
+        left, right, bottom, top = get_viewport()
+        left, right = min(left, right), max(left, right)
+        bottom, top = min(bottom, top), max(bottom, top)
+
+        position = self.sprite_data['position']
+        size = self.sprite_data['size']
+        cos = np.abs(np.cos(self.sprite_data['angle']))
+        sin = np.abs(np.sin(self.sprite_data['angle']))
+
+        # Half extents of the axis aligned box around each rotated sprite
+        extent_x = size[:, 0] * cos + size[:, 1] * sin
+        extent_y = size[:, 0] * sin + size[:, 1] * cos
+
+        return ((position[:, 0] + extent_x >= left) &
+                (position[:, 0] - extent_x <= right) &
+                (position[:, 1] + extent_y >= bottom) &
+                (position[:, 1] - extent_y <= top))
+
+    def _upload_sprite_data(self) -> int:
+        """ Send the instance data that will be drawn to the graphics card.
+        Culled sprites are left out and, when depth testing, the rows are sorted
+        back to front. Returns the number of sprites to draw. """
+        if self.cull_to_viewport:
+            visible = self._calculate_visible_sprites()
+            self.visible_count = int(np.count_nonzero(visible))
+        else:
+            visible = None
+            self.visible_count = len(self.sprite_list)
+        self.culled_count = len(self.sprite_list) - self.visible_count
+
+        # Static lists only need a new upload when what is drawn changes
+        if self.is_static and self._static_upload is not None:
+            uploaded_visible, uploaded_sorted = self._static_upload
+            if uploaded_sorted == self.depth_test:
+                if visible is None and uploaded_visible is None:
+                    return self.visible_count
+                if visible is not None and uploaded_visible is not None \
+                        and np.array_equal(visible, uploaded_visible):
+                    return self.visible_count
+        if self.is_static:
+            self._static_upload = (visible, self.depth_test)
+
+        data = self.sprite_data
+        if visible is not None:
+            data = data[visible]
+        if self.depth_test:
+            # The translucent pass needs back to front order. The opaque pass
+            # doesn't care, so both passes share this order.
+            data = data[np.argsort(data['depth'], kind='stable')]
+
+        if len(data) > 0:
+            if self.is_static:
+                self.sprite_data_buf.write(data)
+            else:
+                slot = self.sprite_data_stream.write(data)
+                self.vao = self._vaos[slot]
+        return self.visible_count
+
     def draw(self):
         """ Draw this list of sprites. """
         if self.program is None:
             # Used in drawing optimization via OpenGL
+            if self.texture_atlas is None:
+                fragment_shader = FRAGMENT_SHADER
+            else:
+                fragment_shader = TEXTURE_ARRAY_FRAGMENT_SHADER
             self.program = shader.program(
                 vertex_shader=VERTEX_SHADER,
-                fragment_shader=FRAGMENT_SHADER
+                fragment_shader=fragment_shader
             )
 
         if len(self.sprite_list) == 0:
             return
 
+        flush_batched_draws()
+
         if self.vao is None:
             self._calculate_sprite_buffer()
 
-        self._texture.use(0)
+        if self.texture_atlas is None:
+            self._texture.use(0)
+            texture_unit = self.texture_id
+        else:
+            self.texture_atlas.use(0)
+            texture_unit = 0
 
-        gl.glEnable(gl.GL_BLEND)
-        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+        state = shader.context_state()
+        state.enable(gl.GL_BLEND)
+        state.blend_func(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
         # gl.glTexParameterf(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_NEAREST)
         # gl.glTexParameterf(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST)
 
+        # Upload first, dynamic lists then draw from the buffer just written
+        instances = self._upload_sprite_data()
+
         with self.vao:
-            self.program['Texture'] = self.texture_id
-            self.program['Projection'] = get_projection().flatten()
+            self.program['Texture'] = texture_unit
 
-            if not self.is_static:
-                self.sprite_data_buf.write(self.sprite_data.tobytes())
+            if instances > 0:
+                if self.depth_test:
+                    state.enable(gl.GL_DEPTH_TEST)
+                    state.depth_func(gl.GL_LEQUAL)
 
-            self.vao.render(gl.GL_TRIANGLE_STRIP, instances=len(self.sprite_list))
+                    # Solid pixels write depth, so their order doesn't matter
+                    self.program['DepthPass'] = DEPTH_PASS_OPAQUE
+                    self.vao.render(gl.GL_TRIANGLE_STRIP, instances=instances)
+
+                    # Blended pixels are drawn back to front on top of them
+                    state.depth_mask(False)
+                    self.program['DepthPass'] = DEPTH_PASS_TRANSLUCENT
+                    self.vao.render(gl.GL_TRIANGLE_STRIP, instances=instances)
+
+                    state.depth_mask(True)
+                    state.disable(gl.GL_DEPTH_TEST)
+                else:
+                    self.program['DepthPass'] = DEPTH_PASS_NONE
+                    self.vao.render(gl.GL_TRIANGLE_STRIP, instances=instances)
 
-            if not self.is_static:
-                self.sprite_data_buf.orphan()
+            if not self.is_static and instances > 0:
+                self.sprite_data_stream.fence()
 
     def __len__(self) -> int:
         """ Return the length of the sprite list. """
@@ -1,19 +1,298 @@
 # --- BEGIN TEXT FUNCTIONS # # #
 
+"""
+Text drawn from a glyph atlas.
+
+Each character of a font is rasterized once, into the atlas of a texture
+batch used only for text. Strings are laid out into one textured rectangle
+per character, and all the text drawn in a frame goes out in one instanced
+draw call.
+"""
+
+import math
+import os
+from collections import OrderedDict
+from typing import Dict
+from typing import Tuple
+
+import numpy as np
 import PIL.Image
 import PIL.ImageDraw
 import PIL.ImageFont
 
-from arcade.sprite import Sprite
 from arcade.arcade_types import Color
 from arcade.draw_commands import Texture
+from arcade.draw_commands import get_four_byte_color
+from arcade.sprite_list import SPRITE_DATA_TYPE
+from arcade.texture_atlas import TextureArrayAtlas
+from arcade.texture_batch import TextureBatch
+from arcade.window_commands import flush_batched_draws
+
+
+class Glyph:
+    """
+    Image and metrics of one character of a font.
+
+    Attributes:
+        :texture: White image of the character, with its coverage in the
+         alpha channel. None for characters that draw nothing, like spaces.
+        :left: Distance from the pen position to the left of the image.
+        :top: Distance from the baseline up to the top of the image.
+        :advance: Distance to move the pen to the next character.
+    """
+    def __init__(self, texture: Texture, left: int, top: int, advance: float):
+        self.texture = texture
+        self.left = left
+        self.top = top
+        self.advance = advance
+
+
+class GlyphSet:
+    """ The glyphs of one font at one size, rasterized when first used. """
+    def __init__(self, name: str, font):
+        """
+        :param name: Name of the font and size, used to name the glyph textures.
+        :param font: PIL font to rasterize with.
+        """
+        self.name = name
+        self.font = font
+        self.glyphs: Dict[str, Glyph] = {}
+        self.advances: Dict[str, float] = {}
+        # Memory used by the glyph images
+        self.bytes = 0
+        try:
+            self.ascent, self.descent = font.getmetrics()
+        except AttributeError:
+            # Bitmap fonts don't know their metrics
+            self.ascent, self.descent = _get_bbox(font, "Ay")[3], 0
+        self.line_height = self.ascent + self.descent
+
+    def get(self, char: str) -> Glyph:
+        """ Return the glyph of a character, rasterizing it if needed. """
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            glyph = self._rasterize(char)
+            self.glyphs[char] = glyph
+        return glyph
+
+    def get_advance(self, char: str) -> float:
+        """ Return the distance to move the pen past a character, without rasterizing it. """
+        advance = self.advances.get(char)
+        if advance is None:
+            advance = _get_length(self.font, char)
+            self.advances[char] = advance
+        return advance
+
+    def _rasterize(self, char: str) -> Glyph:
+        left, top, right, bottom = _get_bbox(self.font, char)
+        advance = self.get_advance(char)
+        if right <= left or bottom <= top:
+            return Glyph(None, 0, 0, advance)
+
+        # The font draws from the top of the ascent, so the bbox is relative to it
+        coverage = PIL.Image.new("L", (right - left, bottom - top))
+        PIL.ImageDraw.Draw(coverage).text((-left, -top), char, fill=255, font=self.font)
+        image = PIL.Image.new("RGBA", coverage.size, (255, 255, 255, 0))
+        image.putalpha(coverage)
+        texture = Texture(f"{self.name}:{char}", image)
+        self.bytes += image.width * image.height * 4
+        return Glyph(texture, left, self.ascent - top, advance)
+
+
+def _get_bbox(font, text: str) -> Tuple[int, int, int, int]:
+    try:
+        return font.getbbox(text)
+    except AttributeError:
+        # Pillow before 9.2
+        width, height = font.getsize(text)
+        return 0, 0, width, height
+
+
+def _get_length(font, text: str) -> float:
+    try:
+        return font.getlength(text)
+    except AttributeError:
+        # Pillow before 8.0
+        return font.getsize(text)[0]
 
 
 class Text:
-    """ Class used for managing text. """
+    """
+    String laid out into one rectangle for each character.
+
+    Attributes:
+        :size: Width and height of the text.
+        :instances: Rectangles of the characters in ``SPRITE_DATA_TYPE``
+         format, with positions relative to the bottom left of the text.
+        :bytes: Memory used by the text, counted by the ``TextCache``.
+    """
     def __init__(self):
         self.size = (0, 0)
-        self.text_sprite_list = None
+        self.instances = np.zeros(0, dtype=SPRITE_DATA_TYPE)
+        self.bytes = 0
+
+
+# Rough memory used by the key and objects of a cached text, besides its arrays
+_TEXT_OVERHEAD = 512
+
+
+class TextCache:
+    """
+    Least recently used cache of laid out text, and of the glyphs and atlas
+    the text is drawn from.
+
+    Memory is counted for the laid out text, the glyph images, and the atlas
+    pages both in memory and on the graphics card. When it goes over
+    ``max_bytes``, the least recently drawn text is removed first. If the
+    glyphs alone are over the budget, the glyphs of fonts no cached text uses
+    are released. If that isn't enough, all of them are released along with
+    the atlas texture and the text using them, as the atlas can't free single
+    images.
+
+    Attributes:
+        :max_bytes: Memory budget in bytes.
+        :hits: Number of times text was found in the cache.
+        :misses: Number of times text had to be laid out.
+        :evictions: Number of texts removed to stay in the budget.
+    """
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Create an empty cache.
+
+        :param max_bytes: Memory budget in bytes.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._texts: OrderedDict = OrderedDict()
+        self._text_bytes = 0
+        self._glyph_sets: Dict[tuple, GlyphSet] = {}
+        # Number of cached texts using each glyph set
+        self._glyph_set_texts: Dict[tuple, int] = {}
+        self._glyph_image_bytes = 0
+        self._batch = None
+
+    def __len__(self) -> int:
+        """ Return the number of texts in the cache. """
+        return len(self._texts)
+
+    def __contains__(self, key) -> bool:
+        return key in self._texts
+
+    @property
+    def bytes(self) -> int:
+        """ Memory used by the cached text, glyphs and atlas. """
+        return self._text_bytes + self.glyph_bytes
+
+    @property
+    def glyph_bytes(self) -> int:
+        """ Memory used by the glyph images and the atlas. """
+        glyph_bytes = self._glyph_image_bytes
+        if self._batch is not None:
+            glyph_bytes += self._batch.texture_atlas.bytes
+        return glyph_bytes
+
+    @property
+    def batch(self) -> TextureBatch:
+        """ Batch the text is drawn with. Its atlas holds the glyph images. """
+        if self._batch is None:
+            self._batch = TextureBatch(TextureArrayAtlas(1024, 1024))
+        return self._batch
+
+    def get_stats(self) -> dict:
+        """ Return the counters and memory use of the cache. """
+        return {
+            'texts': len(self._texts),
+            'bytes': self.bytes,
+            'glyph_bytes': self.glyph_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def get_glyph_set(self, font_name, font_size: float, bold: bool = False,
+                      italic: bool = False) -> GlyphSet:
+        """ Return the glyphs of a font at a size. """
+        key = (font_name, font_size, bold, italic)
+        glyph_set = self._glyph_sets.get(key)
+        if glyph_set is None:
+            font = _load_font(font_name, int(font_size), bold, italic)
+            glyph_set = GlyphSet(f"{font_name}:{font_size}:{bold}:{italic}", font)
+            self._glyph_sets[key] = glyph_set
+        return glyph_set
+
+    def get_text(self, text: str, font_size: float, width: float, align: str, font_name,
+                 bold: bool, italic: bool) -> Text:
+        """ Return laid out text, laying it out if it isn't cached. """
+        key = (text, font_size, width, align, font_name, bold, italic)
+        label = self._texts.get(key)
+        if label is not None:
+            self._texts.move_to_end(key)
+            self.hits += 1
+            return label
+
+        self.misses += 1
+        if self.glyph_bytes > self.max_bytes:
+            self._release_unused_glyphs()
+        if self.glyph_bytes > self.max_bytes:
+            self._release_glyphs()
+
+        glyph_set_key = _get_glyph_set_key(key)
+        glyph_set = self.get_glyph_set(*glyph_set_key)
+        glyph_set_bytes = glyph_set.bytes
+        label = _layout_text(text, glyph_set, width, align, self.batch.texture_atlas)
+        self._glyph_image_bytes += glyph_set.bytes - glyph_set_bytes
+        self._texts[key] = label
+        self._text_bytes += label.bytes
+        self._glyph_set_texts[glyph_set_key] = self._glyph_set_texts.get(glyph_set_key, 0) + 1
+
+        # Keep the text just laid out, even if it doesn't fit on its own
+        text_budget = self.max_bytes - self.glyph_bytes
+        while self._text_bytes > text_budget and len(self._texts) > 1:
+            evicted_key, evicted = self._texts.popitem(last=False)
+            self._text_bytes -= evicted.bytes
+            glyph_set_key = _get_glyph_set_key(evicted_key)
+            self._glyph_set_texts[glyph_set_key] -= 1
+            if self._glyph_set_texts[glyph_set_key] == 0:
+                del self._glyph_set_texts[glyph_set_key]
+            self.evictions += 1
+        return label
+
+    def clear(self):
+        """ Remove all the text and glyphs, release the atlas texture and reset the counters. """
+        self._release_glyphs()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _release_unused_glyphs(self):
+        # Their images stay in the atlas, but aren't kept twice anymore
+        for glyph_set_key in list(self._glyph_sets):
+            if glyph_set_key not in self._glyph_set_texts:
+                del self._glyph_sets[glyph_set_key]
+        self._glyph_image_bytes = sum(glyph_set.bytes for glyph_set in self._glyph_sets.values())
+
+    def _release_glyphs(self):
+        # Text waiting to be drawn still needs the atlas
+        if self._batch is not None:
+            flush_batched_draws()
+        self.evictions += len(self._texts)
+        self._texts.clear()
+        self._text_bytes = 0
+        self._glyph_sets.clear()
+        self._glyph_set_texts.clear()
+        self._glyph_image_bytes = 0
+        # Dropping the atlas deletes its texture
+        self._batch = None
+
+
+def _get_glyph_set_key(text_key: tuple) -> tuple:
+    """ Return the font name, size, bold and italic of a ``TextCache`` key. """
+    _, font_size, _, _, font_name, bold, italic = text_key
+    return font_name, font_size, bold, italic
 
 
 class CreateText:
@@ -90,200 +369,203 @@ def draw_text(text: str,
               rotation: float = 0
               ):
     """
+    Draw text. The characters are added to the text batch, and drawn together
+    with the text drawn after them.
 
     Args:
-        text: Text to draw
-        start_x:
-        start_y:
-        color:
-        font_size:
-        width:
-        align:
-        font_name:
+        text: Text to draw. Lines are separated with ``\\n``.
+        start_x: x position of the anchor point.
+        start_y: y position of the anchor point.
+        color: Color of the text.
+        font_size: Size of the font.
+        width: Width to align the lines in, or 0 for the width of the
+         longest line.
+        align: How lines are aligned: 'left', 'center' or 'right'.
+        font_name: Name or file name of the font, or a list of them in
+         order of preference.
         bold:
         italic:
-        anchor_x:
-        anchor_y:
-        rotation:
+        anchor_x: Which side of the text is at start_x: 'left', 'center'
+         or 'right'.
+        anchor_y: Which side of the text is at start_y: 'top', 'center',
+         'bottom' or 'baseline'.
+        rotation: Angle in degrees to rotate the text around its center.
 
     Returns:
 
     """
-
-
-
     # Scale the font up, so it matches with the sizes of the old code back
     # when Pyglet drew the text.
     font_size *= 1.25
 
-    # Text isn't anti-aliased, so we'll draw big, and then shrink
-    scale_up = 5
-    scale_down = 5
-
-    font_size *= scale_up
+    # Color and position are applied when drawing, so they aren't cached
+    cache = draw_text.cache
+    label = cache.get_text(text, font_size, width, align, _get_font_names(font_name), bold, italic)
+
+    text_width, text_height = label.size
+    if anchor_x == "left":
+        left = start_x
+    elif anchor_x == "center":
+        left = start_x - text_width / 2
+    elif anchor_x == "right":
+        left = start_x - text_width
+    else:
+        raise ValueError(f"anchor_x should be 'left', 'center', or 'right'. Not '{anchor_x}'")
+
+    if anchor_y == "top":
+        bottom = start_y - text_height
+    elif anchor_y == "center":
+        bottom = start_y - text_height / 2
+    elif anchor_y == "bottom" or anchor_y == "baseline":
+        bottom = start_y
+    else:
+        raise ValueError(f"anchor_y should be 'top', 'center', 'bottom', or 'baseline'. Not '{anchor_y}'")
+
+    instances = label.instances.copy()
+    if rotation:
+        # Turn the characters around the center of the text
+        angle = math.radians(rotation)
+        offsets = instances['position'] - (text_width / 2, text_height / 2)
+        cos, sin = math.cos(angle), math.sin(angle)
+        instances['position'][:, 0] = offsets[:, 0] * cos - offsets[:, 1] * sin
+        instances['position'][:, 1] = offsets[:, 0] * sin + offsets[:, 1] * cos
+        instances['position'] += (left + text_width / 2, bottom + text_height / 2)
+        instances['angle'] = angle
+    else:
+        # Whole pixels keep the glyph images sharp
+        instances['position'] += (round(left), round(bottom))
+    instances['color'] = get_four_byte_color(color)
 
-    # If the cache gets too large, dump it and start over.
-    if len(draw_text.cache) > 5000:
-        draw_text.cache = {}
+    cache.batch.add_instances(instances)
 
-    key = f"{text}{color}{font_size}{width}{align}{font_name}{bold}{italic}"
-    if key in draw_text.cache:
-        label = draw_text.cache[key]
-        text_sprite = label.text_sprite_list[0]
 
-        if anchor_x == "left":
-            text_sprite.center_x = start_x + text_sprite.width / 2
-        elif anchor_x == "center":
-            text_sprite.center_x = start_x
-        elif anchor_x == "right":
-            text_sprite.right = start_x
-        else:
-            raise ValueError(f"anchor_x should be 'left', 'center', or 'right'. Not '{anchor_x}'")
-
-        if anchor_y == "top":
-            text_sprite.center_y = start_y - text_sprite.height / 2
-        elif anchor_y == "center":
-            text_sprite.center_y = start_y
-        elif anchor_y == "bottom" or anchor_y == "baseline":
-            text_sprite.bottom = start_y
-        else:
-            raise ValueError(f"anchor_x should be 'left', 'center', or 'right'. Not '{anchor_y}'")
+draw_text.cache = TextCache()
 
-        text_sprite.angle = rotation
-    else:
-        label = Text()
 
-        # Figure out the font to use
-        font = None
+def _layout_text(text: str, glyph_set: GlyphSet, width: float, align: str,
+                 atlas: TextureArrayAtlas) -> Text:
+    """ Place the characters of a string, and add their images to the atlas. """
+    lines = text.split("\n")
+    line_widths = [sum(glyph_set.get(char).advance for char in line) for line in lines]
+    text_width = max(width, max(line_widths))
+    text_height = len(lines) * glyph_set.line_height
 
-        # Font was specified with a string
-        if isinstance(font_name, str):
+    instances = []
+    for line_number, (line, line_width) in enumerate(zip(lines, line_widths)):
+        if align == "center":
+            pen_x = (text_width - line_width) / 2
+        elif align == "right":
+            pen_x = text_width - line_width
+        else:
+            pen_x = 0
+        baseline = text_height - glyph_set.ascent - line_number * glyph_set.line_height
+
+        for char in line:
+            glyph = glyph_set.get(char)
+            if glyph.texture is not None:
+                region = atlas.add(glyph.texture)
+                glyph_width = glyph.texture.width
+                glyph_height = glyph.texture.height
+                center_x = round(pen_x) + glyph.left + glyph_width / 2
+                center_y = baseline + glyph.top - glyph_height / 2
+                instances.append(((center_x, center_y), 0, 0, (glyph_width / 2, glyph_height / 2),
+                                  region.sub_tex_coords, region.layer, (255, 255, 255, 255)))
+            pen_x += glyph.advance
+
+    label = Text()
+    label.size = (text_width, text_height)
+    label.instances = np.array(instances, dtype=SPRITE_DATA_TYPE)
+    label.bytes = label.instances.nbytes + len(text) + _TEXT_OVERHEAD
+    return label
+
+
+_fonts: Dict[tuple, object] = {}
+
+# File name endings of the styles, like arialbd.ttf or DejaVuSans-Bold.ttf
+_STYLE_SUFFIXES = {
+    (True, False): ("bd", "b", "-Bold"),
+    (False, True): ("i", "-Italic", "-Oblique"),
+    (True, True): ("bi", "z", "-BoldItalic", "-BoldOblique"),
+}
+
+
+def _get_font_names(font_name) -> tuple:
+    """ Return the font names to try as a tuple, which can be used as a key. """
+    if isinstance(font_name, str):
+        return (font_name,)
+    return tuple(font_name)
+
+
+def _load_font(font_name, font_size: int, bold: bool = False, italic: bool = False):
+    """
+    Find a font by name, falling back to a default one. Found fonts are
+    cached, so each is only looked for once.
+    """
+    key = (_get_font_names(font_name), font_size, bold, italic)
+    font = _fonts.get(key)
+    if font is None:
+        font = _find_font(key[0], font_size, bold, italic)
+        _fonts[key] = font
+    return font
+
+
+def _find_font(font_names: tuple, font_size: int, bold: bool, italic: bool):
+    # Names in order of preference, each tried with the style first
+    for font_name in font_names:
+        for file_name in _get_font_file_names(font_name, bold, italic):
             try:
-                font = PIL.ImageFont.truetype(font_name, int(font_size))
+                return PIL.ImageFont.truetype(file_name, font_size)
             except OSError:
-                # print(f"1 Can't find font: {font_name}")
                 pass
 
-            if font is None:
-                try:
-                    temp_font_name = f"{font_name}.ttf"
-                    font = PIL.ImageFont.truetype(temp_font_name, int(font_size))
-                except OSError:
-                    # print(f"2 Can't find font: {temp_font_name}")
-                    pass
-
-        # We were instead given a list of font names, in order of preference
-        else:
-            for font_string_name in font_name:
-                try:
-                    font = PIL.ImageFont.truetype(font_string_name, int(font_size))
-                    # print(f"3 Found font: {font_string_name}")
-                except OSError:
-                    # print(f"3 Can't find font: {font_string_name}")
-                    pass
-
-                if font is None:
-                    try:
-                        temp_font_name = f"{font_name}.ttf"
-                        font = PIL.ImageFont.truetype(temp_font_name, int(font_size))
-                    except OSError:
-                        # print(f"4 Can't find font: {temp_font_name}")
-                        pass
-
-                if font is not None:
-                    break
-
-        # Default font if no font
-        if font is None:
-            font_names = ("arial.ttf",
+    # Default font if no font
+    default_font_names = ("arial.ttf",
                           "/usr/share/fonts/truetype/freefont/FreeMono.ttf",
                           '/System/Library/Fonts/SFNSDisplay.ttf')
-            for font_string_name in font_names:
-                try:
-                    font = PIL.ImageFont.truetype(font_string_name, int(font_size))
-                    break
-                except OSError:
-                    # print(f"5 Can't find font: {font_string_name}")
-                    pass
-
-        # This is stupid. We have to have an image to figure out what size
-        # the text will be when we draw it. Of course, we don't know how big
-        # to make the image. Catch-22. So we just make a small image we'll trash
-        text_image_size = (10, 10)
-        image = PIL.Image.new("RGBA", text_image_size)
-        draw = PIL.ImageDraw.Draw(image)
-
-        # Get size the text will be
-        text_image_size = draw.multiline_textsize(text, font=font)
-
-        # Create image of proper size
-        text_height = text_image_size[1]
-        text_width = text_image_size[0]
-
-        image_start_x = 0
-        if width == 0:
-            width = text_image_size[0]
-        else:
-            # Wait! We were given a field width.
-            if align == "center":
-                # Center text on given field width
-                field_width = width * scale_up
-                text_image_size = field_width, text_height
-                image_start_x = (field_width - text_width) // 2
-                width = field_width
-            else:
-                image_start_x = 0
-
-        # If we draw a y at 0, then the text is drawn with a baseline of 0,
-        # cutting off letters that drop below the baseline. This shoves it
-        # up a bit.
-        image_start_y = - font_size * scale_up * 0.02
-        image = PIL.Image.new("RGBA", text_image_size)
-        draw = PIL.ImageDraw.Draw(image)
-
-        # Convert to tuple if needed, because the multiline_text does not take a
-        # list for a color
-        if isinstance(color, list):
-            color = tuple(color)
-        draw.multiline_text((image_start_x, image_start_y), text, color, align=align, font=font)
-        image = image.resize((width // scale_down, text_height // scale_down), resample=PIL.Image.LANCZOS)
-
-        text_sprite = Sprite()
-        text_sprite._texture = Texture(key)
-        text_sprite._texture.image = image
-
-        text_sprite.image = image
-        text_sprite.texture_name = key
-        text_sprite.width = image.width
-        text_sprite.height = image.height
-
-        if anchor_x == "left":
-            text_sprite.center_x = start_x + text_sprite.width / 2
-        elif anchor_x == "center":
-            text_sprite.center_x = start_x
-        elif anchor_x == "right":
-            text_sprite.right = start_x
-        else:
-            raise ValueError(f"anchor_x should be 'left', 'center', or 'right'. Not '{anchor_x}'")
-
-        if anchor_y == "top":
-            text_sprite.center_y = start_y + text_sprite.height / 2
-        elif anchor_y == "center":
-            text_sprite.center_y = start_y
-        elif anchor_y == "bottom" or anchor_y == "baseline":
-            text_sprite.bottom = start_y
-        else:
-            raise ValueError(f"anchor_x should be 'top', 'center', 'bottom', or 'baseline'. Not '{anchor_y}'")
+    for file_name in default_font_names:
+        try:
+            return PIL.ImageFont.truetype(file_name, font_size)
+        except OSError:
+            pass
+
+    try:
+        return PIL.ImageFont.load_default(font_size)
+    except TypeError:
+        # Pillow before 10.1 only has a small bitmap font
+        return PIL.ImageFont.load_default()
 
-        text_sprite.angle = rotation
 
-        from arcade.sprite_list import SpriteList
-        label.text_sprite_list = SpriteList()
-        label.text_sprite_list.append(text_sprite)
+def _get_font_file_names(font_name: str, bold: bool, italic: bool) -> list:
+    base_name, extension = os.path.splitext(font_name)
+    if extension.lower() not in (".ttf", ".otf", ".ttc"):
+        base_name, extension = font_name, ".ttf"
 
-        draw_text.cache[key] = label
+    file_names = [base_name + suffix + extension for suffix in _STYLE_SUFFIXES.get((bold, italic), ())]
+    file_names.append(font_name)
+    if font_name != base_name + extension:
+        file_names.append(base_name + extension)
+    return file_names
 
-    label.text_sprite_list.draw()
 
+def measure_text(text: str, font_name=('calibri', 'arial'), font_size: float = 12,
+                 bold: bool = False, italic: bool = False) -> Tuple[float, float]:
+    """
+    Get the size text has when drawn with ``draw_text``, without drawing it.
+
+    Args:
+        text: Text to measure. Lines are separated with ``\\n``.
+        font_name: Name or file name of the font, or a list of them in
+         order of preference.
+        font_size: Size of the font.
+        bold:
+        italic:
 
-draw_text.cache = {}
+    Returns:
+        Width and height of the text.
+    """
+    # Same scale as draw_text
+    font_size *= 1.25
+    glyph_set = draw_text.cache.get_glyph_set(_get_font_names(font_name), font_size, bold, italic)
+    lines = text.split("\n")
+    text_width = max(sum(glyph_set.get_advance(char) for char in line) for line in lines)
+    return text_width, len(lines) * glyph_set.line_height
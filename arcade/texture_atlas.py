@@ -0,0 +1,227 @@
+"""
+Texture atlas stored in the layers of an OpenGL texture array.
+
+Sprite lists that share a ``TextureArrayAtlas`` can use any number of atlas
+pages, still draw in one call, and don't need a texture of their own.
+"""
+
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import numpy as np
+
+from arcade.draw_commands import Texture
+from arcade import shader
+
+# Empty pixels left between images, so linear filtering doesn't bleed
+# neighbouring images into each other.
+_PADDING = 1
+
+
+class TextureRegion:
+    """
+    Location of one image inside a ``TextureArrayAtlas``.
+
+    Attributes:
+        :layer: Index of the atlas page holding the image.
+        :x: Left pixel of the image on the page.
+        :y: Top pixel of the image on the page.
+        :width: Width of the image in pixels.
+        :height: Height of the image in pixels.
+        :sub_tex_coords: Offset and size of the image, in the format the
+         sprite shader expects.
+    """
+    def __init__(self, layer: int, x: int, y: int, width: int, height: int,
+                 page_width: int, page_height: int):
+        self.layer = layer
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+        # The sprite shader flips the y coordinate, and relies on the texture
+        # wrapping around, like the sub-texture coordinates of the single
+        # image atlas.
+        self.sub_tex_coords = (x / page_width,
+                               1 - (y + height) / page_height,
+                               width / page_width,
+                               height / page_height)
+
+
+class TextureArrayAtlas:
+    """
+    Packs the images of textures into pages of a fixed size. Each page is one
+    layer of a ``shader.TextureArray``. Pages are added as needed.
+
+    Images are only uploaded once. Adding an image uploads just that image,
+    and adding a page uploads just that page. The texture array has room for
+    more pages than are used, so it only has to be made again, with twice the
+    pages, when it is full.
+
+    With ``max_pages`` the atlas can only hold so many pages. Check
+    ``has_room`` before adding, and ``clear`` the atlas when it is full.
+    """
+    def __init__(self, page_width: int = 2048, page_height: int = 2048, max_pages: int = None):
+        """
+        Create an empty atlas.
+
+        :param page_width: Width in pixels of each page.
+        :param page_height: Height in pixels of each page.
+        :param max_pages: Most pages the atlas can have, or None for no limit.
+        """
+        self.page_width = page_width
+        self.page_height = page_height
+        self.max_pages = max_pages
+
+        self.regions: Dict[str, TextureRegion] = {}
+        self.pages: List[np.ndarray] = []
+
+        # Shelf packing state of the last page: position of the next image
+        # and height of the current row of images.
+        self._shelf_x = 0
+        self._shelf_y = 0
+        self._shelf_height = 0
+
+        self._texture = None
+        # Pages below this are in the texture array
+        self._uploaded_pages = 0
+        self._pending_uploads: List[Tuple[int, int, int, np.ndarray]] = []
+
+    def __len__(self) -> int:
+        """ Return the number of images in the atlas. """
+        return len(self.regions)
+
+    def __contains__(self, texture: Texture) -> bool:
+        return texture.name in self.regions
+
+    @property
+    def bytes(self) -> int:
+        """ Memory used by the pages, and by the texture array on the graphics card. """
+        layers = len(self.pages)
+        if self._texture is not None:
+            layers = max(layers, self._texture.layers)
+        return (len(self.pages) + layers) * self.page_width * self.page_height * 4
+
+    def has_room(self, texture: Texture) -> bool:
+        """
+        Return True if the image of a texture is in the atlas, or can be added.
+
+        :param texture: Texture to check.
+        """
+        if texture.name in self.regions or texture.image is None:
+            # add tells why an image without a page can't be added
+            return True
+        if self.max_pages is None or len(self.pages) < self.max_pages:
+            return True
+        return self._fits_on_last_page(*texture.image.size)
+
+    def clear(self):
+        """
+        Remove all the images. Regions given out before can't be used anymore.
+        The texture array is kept, to be filled again.
+        """
+        self.regions.clear()
+        self.pages.clear()
+        self._shelf_x = 0
+        self._shelf_y = 0
+        self._shelf_height = 0
+        self._uploaded_pages = 0
+        self._pending_uploads.clear()
+
+    def add(self, texture: Texture) -> TextureRegion:
+        """
+        Add the image of a texture to the atlas, if it isn't there already.
+        Images are identified by the texture name.
+
+        :param texture: Texture to add.
+        :return: Location of the image in the atlas.
+        :raises ValueError: If the image is too large for a page, or the
+                            atlas has ``max_pages`` pages and no room left.
+        """
+        region = self.regions.get(texture.name)
+        if region is not None:
+            return region
+
+        image = texture.image
+        if image is None:
+            raise ValueError(f"Texture {texture.name} has no image to add to the atlas.")
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
+
+        width, height = image.size
+        if width > self.page_width or height > self.page_height:
+            raise ValueError(f"Texture {texture.name} is {width}x{height}, which doesn't fit "
+                             f"in atlas pages of {self.page_width}x{self.page_height}.")
+        if not self.has_room(texture):
+            raise ValueError(f"Texture {texture.name} doesn't fit in the {self.max_pages} pages of the atlas.")
+
+        layer, x, y = self._allocate(width, height)
+        data = np.asarray(image, dtype=np.uint8)
+        self.pages[layer][y:y + height, x:x + width] = data
+        self._pending_uploads.append((layer, x, y, data))
+
+        region = TextureRegion(layer, x, y, width, height, self.page_width, self.page_height)
+        self.regions[texture.name] = region
+        return region
+
+    def _allocate(self, width: int, height: int) -> Tuple[int, int, int]:
+        """ Find a free spot for an image, adding a page if needed. """
+        if not self._fits_on_last_page(width, height):
+            self._add_page()
+        elif self._shelf_x + width > self.page_width:
+            # Start a new row of images, as this one doesn't fit on the current row
+            self._shelf_x = 0
+            self._shelf_y += self._shelf_height
+            self._shelf_height = 0
+
+        x = self._shelf_x
+        y = self._shelf_y
+        self._shelf_x += width + _PADDING
+        self._shelf_height = max(self._shelf_height, height + _PADDING)
+        return len(self.pages) - 1, x, y
+
+    def _fits_on_last_page(self, width: int, height: int) -> bool:
+        if not self.pages:
+            return False
+        shelf_y = self._shelf_y
+        if self._shelf_x + width > self.page_width:
+            shelf_y += self._shelf_height
+        return shelf_y + height <= self.page_height
+
+    def _add_page(self):
+        self.pages.append(np.zeros((self.page_height, self.page_width, 4), dtype=np.uint8))
+        self._shelf_x = 0
+        self._shelf_y = 0
+        self._shelf_height = 0
+
+    def use(self, texture_unit: int = 0):
+        """
+        Bind the texture array to a texture unit. Images added since the last
+        call are uploaded first.
+
+        :param texture_unit: Texture unit to bind to.
+        """
+        if not self.pages:
+            self._add_page()
+
+        if self._texture is None or self._texture.layers < len(self.pages):
+            # Leave room for more pages, up to the limit
+            layers = max(len(self.pages), 2 * self._texture.layers if self._texture is not None else 1)
+            if self.max_pages is not None:
+                layers = max(len(self.pages), min(layers, self.max_pages))
+            self._texture = shader.texture_array((self.page_width, self.page_height), layers)
+            self._uploaded_pages = 0
+
+        # New pages are uploaded whole, images on them included
+        uploaded_pages = self._uploaded_pages
+        for layer in range(uploaded_pages, len(self.pages)):
+            self._texture.write(layer, self.pages[layer])
+        self._uploaded_pages = len(self.pages)
+
+        for layer, x, y, data in self._pending_uploads:
+            if layer < uploaded_pages:
+                self._texture.write(layer, data, x, y)
+        self._pending_uploads.clear()
+
+        self._texture.use(texture_unit)
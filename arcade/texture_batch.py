@@ -0,0 +1,190 @@
+"""
+Batching for immediate mode texture drawing.
+
+``draw_texture_rectangle``, ``Texture.draw`` and ``Sprite.draw`` add an
+instance to a shared ``TextureBatch`` instead of drawing right away. The batch
+is drawn with one call when something else is drawn, when the viewport changes
+or when the frame is finished, so the draw order doesn't change.
+"""
+
+import math
+import weakref
+
+import numpy as np
+import pyglet.gl as gl
+
+from arcade.draw_commands import Texture
+from arcade.sprite_list import VERTEX_SHADER
+from arcade.sprite_list import TEXTURE_ARRAY_FRAGMENT_SHADER
+from arcade.sprite_list import DEPTH_PASS_NONE
+from arcade.sprite_list import SPRITE_DATA_TYPE
+from arcade.texture_atlas import TextureArrayAtlas
+from arcade.window_commands import set_pending_batch
+from arcade import shader
+
+_WHITE = (255, 255, 255, 255)
+
+# Pages of the atlas used by immediate mode drawing. Each one takes 16 MB in
+# memory and as much on the graphics card.
+_MAX_IMMEDIATE_PAGES = 2
+
+
+class TextureBatch:
+    """
+    Collects textured rectangles and draws them in one instanced call.
+
+    Images are packed into a ``TextureArrayAtlas``, and the instance data is
+    written to a ``shader.StreamBuffer``, which grows when a frame draws more
+    rectangles than it has room for. When an atlas with ``max_pages`` is full,
+    the waiting rectangles are drawn and the atlas is cleared.
+    """
+    def __init__(self, texture_atlas: TextureArrayAtlas = None, capacity: int = 256):
+        """
+        Create an empty batch.
+
+        :param texture_atlas: Atlas holding the images. A new one is made if None.
+        :param capacity: Number of rectangles there is room for at first.
+        """
+        if texture_atlas is None:
+            texture_atlas = TextureArrayAtlas()
+        self.texture_atlas = texture_atlas
+
+        self.data = np.zeros(capacity, dtype=SPRITE_DATA_TYPE)
+        self.count = 0
+
+        self.program = None
+        self.vbo_buf = None
+        self.stream = None
+        self._vaos = []
+
+    def __len__(self) -> int:
+        """ Return the number of rectangles waiting to be drawn. """
+        return self.count
+
+    def add(self, texture: Texture, center_x: float, center_y: float,
+            width: float, height: float, angle: float = 0, color=_WHITE):
+        """
+        Add a textured rectangle to the batch.
+
+        :param texture: Texture to draw.
+        :param center_x: x coordinate of the rectangle center.
+        :param center_y: y coordinate of the rectangle center.
+        :param width: Width of the rectangle.
+        :param height: Height of the rectangle.
+        :param angle: Rotation in degrees.
+        :param color: RGBA color the texture is multiplied with.
+        :raises ValueError: If the image doesn't fit in the atlas.
+        """
+        if not self.texture_atlas.has_room(texture):
+            # Draw what uses the full atlas, then start it over
+            self.flush()
+            self.texture_atlas.clear()
+        region = self.texture_atlas.add(texture)
+
+        # Draws waiting in other batches go first
+        set_pending_batch(self)
+
+        if self.count == len(self.data):
+            self.data = np.resize(self.data, len(self.data) * 2)
+
+        self.data[self.count] = ((center_x, center_y), math.radians(angle), 0,
+                                 (width / 2, height / 2), region.sub_tex_coords,
+                                 region.layer, color)
+        self.count += 1
+
+    def add_instances(self, data: np.ndarray):
+        """
+        Add rectangles that are already in the ``SPRITE_DATA_TYPE`` format,
+        with their images in the atlas of this batch.
+
+        :param data: Array of rectangles.
+        """
+        # Draws waiting in other batches go first
+        set_pending_batch(self)
+
+        end = self.count + len(data)
+        if end > len(self.data):
+            self.data = np.resize(self.data, max(end, len(self.data) * 2))
+        self.data[self.count:end] = data
+        self.count = end
+
+    def flush(self):
+        """ Draw the waiting rectangles and empty the batch. """
+        if self.count == 0:
+            return
+
+        if self.program is None:
+            self.program = shader.program(
+                vertex_shader=VERTEX_SHADER,
+                fragment_shader=TEXTURE_ARRAY_FRAGMENT_SHADER
+            )
+            vertices = np.array([
+                #  x,    y,   u,   v
+                -1.0, -1.0, 0.0, 0.0,
+                -1.0, 1.0, 0.0, 1.0,
+                1.0, -1.0, 1.0, 0.0,
+                1.0, 1.0, 1.0, 1.0,
+            ], dtype=np.float32
+            )
+            self.vbo_buf = shader.buffer(vertices.tobytes())
+
+        if self.stream is None or self.stream.size < self.data.nbytes:
+            self._create_stream()
+
+        instances = self.count
+        self.count = 0
+        slot = self.stream.write(self.data[:instances])
+        vao = self._vaos[slot]
+
+        self.texture_atlas.use(0)
+        state = shader.context_state()
+        state.enable(gl.GL_BLEND)
+        state.blend_func(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+
+        with vao:
+            self.program['Texture'] = 0
+            self.program['DepthPass'] = DEPTH_PASS_NONE
+            vao.render(gl.GL_TRIANGLE_STRIP, instances=instances)
+
+        self.stream.fence()
+
+    def _create_stream(self):
+        self.stream = shader.stream_buffer(self.data.nbytes)
+        vbo_buf_desc = shader.BufferDescription(
+            self.vbo_buf,
+            '2f 2f',
+            ('in_vert', 'in_texture')
+        )
+        self._vaos = []
+        for instance_buffer in self.stream.buffers:
+            instance_buf_desc = shader.BufferDescription(
+                instance_buffer,
+                '2f 1f 1f 2f 4f 1f 4B',
+                ('in_pos', 'in_angle', 'in_depth', 'in_scale', 'in_sub_tex_coords', 'in_layer', 'in_color'),
+                normalized=['in_color'], instanced=True)
+            self._vaos.append(shader.vertex_array(self.program, [vbo_buf_desc, instance_buf_desc]))
+
+
+# Buffers and textures belong to a context, so each context has its own batch
+_texture_batches = weakref.WeakKeyDictionary()
+_texture_batch = None
+
+
+def get_texture_batch() -> TextureBatch:
+    """ Return the batch used by immediate mode texture drawing in the current context. """
+    global _texture_batch
+    context = gl.current_context
+    if context is None:
+        if _texture_batch is None:
+            _texture_batch = _create_immediate_batch()
+        return _texture_batch
+
+    batch = _texture_batches.get(context)
+    if batch is None:
+        batch = _create_immediate_batch()
+        _texture_batches[context] = batch
+    return batch
+
+
+def _create_immediate_batch() -> TextureBatch:
+    return TextureBatch(TextureArrayAtlas(max_pages=_MAX_IMMEDIATE_PAGES))
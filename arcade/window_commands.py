@@ -16,6 +16,7 @@
 from typing import Callable
 from typing import Union
 from arcade.arcade_types import Color
+from arcade import shader
 
 _left = -1
 _right = 1
@@ -28,6 +29,16 @@
 _projection = None
 _opengl_context = None
 
+# Immediate mode batch holding draws that haven't been sent to OpenGL yet
+_pending_batch = None
+
+# Contents of the uniform buffer shared by the programs with a Globals block:
+# the projection matrix, then the time in seconds, padded to std140 size
+_globals = np.zeros(20, dtype=np.float32)
+_globals_buffer = None
+_globals_context = None
+_start_time = time.perf_counter()
+
 
 def get_projection():
     """
@@ -39,6 +50,56 @@ def get_projection():
     return _projection
 
 
+def _write_globals():
+    """ Send the globals to the uniform buffer all programs read them from. """
+    global _globals_buffer
+    global _globals_context
+
+    if _projection is not None:
+        _globals[:16] = _projection.ravel()
+    _globals[16] = time.perf_counter() - _start_time
+
+    # A new window has a new context, which needs its own buffer
+    if _globals_buffer is None or _globals_context is not gl.current_context:
+        _globals_buffer = shader.buffer(_globals.tobytes(), usage='dynamic')
+        _globals_context = gl.current_context
+        shader.bind_uniform_buffer(_globals_buffer, shader.GLOBALS_BINDING)
+    else:
+        _globals_buffer.write(_globals.tobytes())
+
+
+def set_pending_batch(batch):
+    """
+    Note that a batch has draws waiting to be flushed. Draws waiting in a
+    different batch are flushed first, so everything is drawn in the order it
+    was submitted.
+
+    Args:
+        :batch: Object with a ``flush()`` method that draws what it holds.
+    """
+    global _pending_batch
+
+    if _pending_batch is not batch:
+        flush_batched_draws()
+        _pending_batch = batch
+
+
+def flush_batched_draws():
+    """
+    Draw everything waiting in the immediate mode batches.
+
+    This is done automatically before any other drawing, when the viewport
+    changes and when the frame is finished. It is only needed before drawing
+    with OpenGL directly.
+    """
+    global _pending_batch
+
+    batch = _pending_batch
+    _pending_batch = None
+    if batch is not None:
+        batch.flush()
+
+
 def create_orthogonal_projection(
         left,
         right,
@@ -172,6 +233,9 @@ def set_viewport(left: Number, right: Number, bottom: Number, top: Number):
     global _projection
     global _scaling
 
+    # Waiting draws use the projection they were made with
+    flush_batched_draws()
+
     _left = left
     _right = right
     _bottom = bottom
@@ -192,6 +256,7 @@ def set_viewport(left: Number, right: Number, bottom: Number, top: Number):
     _projection = create_orthogonal_projection(left=_left, right=_right,
                                                bottom=_bottom, top=_top,
                                                near=-1000, far=100, dtype=np.float32)
+    _write_globals()
 
 
 def get_viewport() -> (float, float, float, float):
@@ -233,6 +298,7 @@ def finish_render():
     """
     global _window
 
+    flush_batched_draws()
     _window.flip()
 
 
@@ -265,7 +331,10 @@ def start_render():
     Get set up to render. Required to be called before drawing anything to the
     screen.
     """
+    flush_batched_draws()
     gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
+    # Update the time for this frame
+    _write_globals()
     # gl.glMatrixMode(gl.GL_MODELVIEW)
     # gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
 
@@ -1,7 +1,10 @@
 import sys
 
+import numpy as np
 import pytest
 
+from arcade import shader
+
 
 class MockWindow:
     """ Replace the pyglet base class with something we control """
@@ -28,3 +31,48 @@ def mock_window(monkeypatch):
 @pytest.fixture
 def pyglet_clock(mocker):
     yield mocker.patch('pyglet.clock')
+
+
+class FakeBuffer:
+    """ Buffer kept in memory, so what is sent to it can be read back. """
+    def __init__(self, data=b'', usage='static'):
+        self.data = bytearray(np.asarray(data).tobytes())
+        # Everything written after the buffer was made
+        self.writes = []
+
+    @property
+    def size(self):
+        return len(self.data)
+
+    def write(self, data, offset=0):
+        self.writes.append(data)
+        data = np.asarray(data).tobytes()
+        self.data[offset:offset + len(data)] = data
+
+    def copy(self, source, size, source_offset=0, offset=0):
+        self.data[offset:offset + size] = source.data[source_offset:source_offset + size]
+
+    def read(self, size, offset=0):
+        return bytes(self.data[offset:offset + size])
+
+    def orphan(self):
+        pass
+
+
+class FakeVertexArray:
+    def __init__(self, program, content, index_buffer=None):
+        self.num_vertices = -1
+        for buffer_description in content:
+            if not buffer_description.instanced:
+                stride = sum(attribute_size for _, attribute_size, _ in buffer_description.formats)
+                self.num_vertices = max(self.num_vertices, buffer_description.buffer.size // stride)
+
+
+@pytest.fixture
+def fake_gl(monkeypatch):
+    """ Replace the buffers and vertex arrays with ones that need no graphics card """
+    monkeypatch.setattr(shader, 'program', lambda **kwargs: object())
+    monkeypatch.setattr(shader, 'buffer', FakeBuffer)
+    monkeypatch.setattr(shader.Buffer, 'create_with_size', lambda size, usage='static': FakeBuffer(bytes(size)))
+    monkeypatch.setattr(shader, 'have_buffer_storage', lambda: False)
+    monkeypatch.setattr(shader, 'vertex_array', FakeVertexArray)
@@ -0,0 +1,141 @@
+"""
+Unit tests for buffered_draw_commands.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_buffered_draw_commands.py
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+import arcade
+from arcade.buffered_draw_commands import TRANSFORM_DATA_TYPE
+from arcade.buffered_draw_commands import VERTEX_DATA_TYPE
+from arcade.buffered_draw_commands import _get_strip_order
+
+
+def _read(buffer, dtype, start, count):
+    return np.frombuffer(buffer.read(count * dtype.itemsize, start * dtype.itemsize), dtype=dtype)
+
+
+def test_range_allocator_reuses_and_merges_free_ranges():
+    allocator = arcade.RangeAllocator()
+
+    assert allocator.allocate(4) == 0
+    assert allocator.allocate(2) == 4
+    assert allocator.allocate(3) == 6
+    assert allocator.end == 9
+    assert allocator.capacity >= 9
+
+    allocator.free(0, 4)
+    assert allocator.allocate(3) == 0
+    assert allocator.free_ranges == [(3, 1)]
+
+    # Freeing the last range moves the end back
+    allocator.free(6, 3)
+    assert allocator.end == 6
+
+    # Free neighbours are merged, back to an empty allocator
+    allocator.free(0, 3)
+    assert allocator.free_ranges == [(0, 4)]
+    allocator.free(4, 2)
+    assert allocator.free_ranges == []
+    assert allocator.end == 0
+
+
+def test_range_allocator_grows_capacity():
+    allocator = arcade.RangeAllocator(capacity=4)
+
+    allocator.allocate(3)
+    assert allocator.capacity == 4
+    allocator.allocate(3)
+    assert allocator.capacity == 8
+    allocator.allocate(20)
+    assert allocator.capacity == 26
+
+
+def test_strip_order():
+    assert list(_get_strip_order(4)) == [0, 3, 1, 2]
+    assert list(_get_strip_order(5)) == [0, 4, 1, 3, 2]
+
+
+def test_set_shape_transform(fake_gl):
+    shapes = arcade.ShapeElementList()
+    first = arcade.create_rectangle_filled(0, 0, 10, 10, (255, 0, 0))
+    second = arcade.create_line(0, 0, 10, 10, (0, 255, 0))
+    shapes.append(first)
+    shapes.append(second)
+
+    shapes.set_shape_transform(second, 5, 6, 90, 1, 2)
+    start, count = shapes._vertex_ranges[second]
+    transforms = _read(shapes.transform_vbo, TRANSFORM_DATA_TYPE, start, count)
+    assert transforms['offset'].tolist() == [[5, 6]] * count
+    assert transforms['pivot'].tolist() == [[1, 2]] * count
+    assert np.allclose(transforms['angle'], math.pi / 2)
+
+    # The other shape is left where it was
+    start, count = shapes._vertex_ranges[first]
+    assert not _read(shapes.transform_vbo, TRANSFORM_DATA_TYPE, start, count)['offset'].any()
+
+
+def test_update_shape(fake_gl):
+    shapes = arcade.ShapeElementList()
+    line = arcade.create_line(0, 0, 10, 10, (0, 255, 0))
+    shapes.append(arcade.create_rectangle_filled(0, 0, 10, 10, (255, 0, 0)))
+    shapes.append(line)
+    old_data = line.data
+
+    shapes.update_shape(line, points=[(1, 2), (3, 4)])
+    start, count = shapes._vertex_ranges[line]
+    assert count == 2
+    vertices = _read(shapes.vbo, VERTEX_DATA_TYPE, start, count)
+    assert vertices['vertex'].tolist() == [[1, 2], [3, 4]]
+    assert vertices['color'].tolist() == [[0, 255, 0, 255]] * 2
+    assert old_data['vertex'].tolist() == [[0, 0], [10, 10]]
+    assert line.data['vertex'].tolist() == [[1, 2], [3, 4]]
+
+    # More points move the shape to a range of the new size
+    shapes.update_shape(line, points=[(0, 0), (1, 1), (2, 2)], colors=[(1, 2, 3)] * 3)
+    start, count = shapes._vertex_ranges[line]
+    assert count == 3
+    vertices = _read(shapes.vbo, VERTEX_DATA_TYPE, start, count)
+    assert vertices['vertex'].tolist() == [[0, 0], [1, 1], [2, 2]]
+    assert vertices['color'].tolist() == [[1, 2, 3, 255]] * 3
+
+    with pytest.raises(ValueError):
+        shapes.update_shape(line, points=[(0, 0)])
+
+
+def _draw_order(shapes, batch):
+    """ Shapes in the order the batch draws them. """
+    indices = np.frombuffer(batch.ibo.read(batch.end * 4), dtype=np.uint32)
+    first_vertices = [int(index) for previous, index in zip(np.r_[2 ** 32 - 1, indices], indices)
+                      if previous == 2 ** 32 - 1 and index != 2 ** 32 - 1]
+    shape_by_vertex = {start: item for item, (start, count) in shapes._vertex_ranges.items()}
+    return [shape_by_vertex[vertex] for vertex in first_vertices]
+
+
+def test_appended_shapes_draw_last(fake_gl):
+    shapes = arcade.ShapeElementList()
+    lines = [arcade.create_line(0, 0, i, i, (255, 255, 255)) for i in range(4)]
+    for line in lines[:3]:
+        shapes.append(line)
+    batch = next(iter(shapes.batches.values()))
+
+    # The new shape takes the removed one's vertices, but is drawn on top
+    shapes.remove(lines[0])
+    shapes.append(lines[3])
+    assert shapes._vertex_ranges[lines[3]][0] == 0
+    assert _draw_order(shapes, batch) == lines[1:]
+
+    # Changing the number of points keeps the place of a shape
+    shapes.update_shape(lines[1], points=[(0, 0), (1, 1), (2, 2)], colors=[(1, 2, 3)] * 3)
+    assert _draw_order(shapes, batch) == lines[1:]
+
+    # Gaps are closed once they are most of the indices
+    shapes.remove(lines[1])
+    shapes.remove(lines[2])
+    assert batch.end == 3
+    assert _draw_order(shapes, batch) == [lines[3]]
@@ -0,0 +1,51 @@
+"""
+Unit tests for draw_commands.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_draw_commands.py
+"""
+
+import arcade
+import numpy as np
+from arcade.draw_commands import _get_primitive_indices
+from arcade.draw_commands import gl
+
+
+def test_triangle_strip_indices():
+    assert list(_get_primitive_indices(gl.GL_TRIANGLE_STRIP, 4)) == [0, 1, 2, 1, 2, 3]
+
+
+def test_triangle_fan_indices():
+    assert list(_get_primitive_indices(gl.GL_TRIANGLE_FAN, 5)) == [0, 1, 2, 0, 2, 3, 0, 3, 4]
+
+
+def test_line_indices():
+    assert list(_get_primitive_indices(gl.GL_LINE_STRIP, 3)) == [0, 1, 1, 2]
+    assert list(_get_primitive_indices(gl.GL_LINE_LOOP, 3)) == [0, 1, 1, 2, 2, 0]
+
+
+def test_ellipse_points_match_rotate_point():
+    points = arcade.get_ellipse_points(10, 20, 6, 3, 30, 8)
+
+    assert points.shape == (8, 2)
+    assert not points.flags.writeable
+    assert arcade.get_ellipse_points(10, 20, 6, 3, 30, 8) is points
+
+    for (x, y), (cos, sin) in zip(points, arcade.get_unit_circle(8)):
+        expected = arcade.rotate_point(10 + 6 * cos, 20 + 3 * sin, 10, 20, 30)
+        assert abs(x - expected[0]) < 0.01
+        assert abs(y - expected[1]) < 0.01
+
+
+def test_four_byte_colors():
+    colors = arcade.get_four_byte_colors((1, 2, 3), 2)
+    assert colors.dtype == np.uint8
+    assert colors.tolist() == [[1, 2, 3, 255], [1, 2, 3, 255]]
+
+    assert arcade.get_four_byte_colors([(1, 2, 3), (4, 5, 6, 7)]).tolist() == [[1, 2, 3, 255], [4, 5, 6, 7]]
+    assert arcade.get_four_byte_colors(np.array([[1, 2, 3]])).tolist() == [[1, 2, 3, 255]]
+
+
+def test_four_byte_colors_are_not_copied():
+    colors = np.zeros((5, 4), dtype=np.uint8)
+    assert arcade.get_four_byte_colors(colors) is colors
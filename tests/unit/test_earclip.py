@@ -0,0 +1,41 @@
+"""
+Unit tests for earclip.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_earclip.py
+"""
+
+import arcade
+from arcade.earclip import earclip
+from arcade.earclip import triangulate
+
+
+def _area(triangle):
+    (ax, ay), (bx, by), (cx, cy) = triangle
+    return abs((bx - ax) * (cy - ay) - (cx - ax) * (by - ay)) / 2
+
+
+def test_concave_polygon():
+    polygon = [(0, 0), (10, 0), (10, 10), (5, 3), (0, 10)]
+    triangles = earclip(polygon)
+
+    assert len(triangles) == 3
+    assert sum(_area(triangle) for triangle in triangles) == 65
+
+
+def test_polygon_with_hole():
+    outline = [(0, 0), (10, 0), (10, 10), (0, 10)]
+    hole = [(3, 3), (7, 3), (7, 7), (3, 7)]
+    points = triangulate(outline, [hole])
+
+    assert points.shape == (24, 2)
+    triangles = points.reshape(-1, 3, 2)
+    assert sum(_area(triangle) for triangle in triangles) == 100 - 16
+
+
+def test_triangulation_is_cached():
+    polygon = [(0, 0), (10, 0), (10, 10), (5, 3), (0, 10)]
+
+    first = triangulate(polygon)
+    assert triangulate(list(polygon)) is first
+    assert not first.flags.writeable
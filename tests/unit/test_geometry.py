@@ -0,0 +1,74 @@
+"""
+Unit tests for geometry.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_geometry.py
+"""
+
+import arcade
+
+
+def _make_sprite(center_x, center_y, layer=1, mask=arcade.ALL_COLLISION_LAYERS):
+    sprite = arcade.Sprite(center_x=center_x, center_y=center_y)
+    sprite.width = 10
+    sprite.height = 10
+    sprite.collision_layer = layer
+    sprite.collision_mask = mask
+    return sprite
+
+
+def test_default_layers_collide():
+    player = _make_sprite(0, 0)
+    wall = _make_sprite(5, 0)
+    sprite_list = arcade.SpriteList()
+    sprite_list.append(wall)
+    assert arcade.check_for_collision_with_list(player, sprite_list) == [wall]
+
+
+def test_mask_rejects_other_layers():
+    for use_spatial_hash in (False, True):
+        player = _make_sprite(0, 0, layer=1, mask=0b10)
+        wall = _make_sprite(5, 0, layer=0b10)
+        coin = _make_sprite(-5, 0, layer=0b100)
+        sprite_list = arcade.SpriteList(use_spatial_hash=use_spatial_hash)
+        sprite_list.append(wall)
+        sprite_list.append(coin)
+
+        hit_list = arcade.check_for_collision_with_list(player, sprite_list)
+        assert hit_list == [wall]
+
+        player.collision_mask = 0b110
+        hit_list = arcade.check_for_collision_with_list(player, sprite_list)
+        assert set(hit_list) == {wall, coin}
+
+        player.collision_mask = 0
+        assert arcade.check_for_collision_with_list(player, sprite_list) == []
+
+
+def test_collision_between_lists():
+    for use_spatial_hash in (False, True):
+        bullets = arcade.SpriteList()
+        enemies = arcade.SpriteList(use_spatial_hash=use_spatial_hash)
+
+        bullet = _make_sprite(0, 0, layer=0b1, mask=0b10)
+        enemy = _make_sprite(5, 0, layer=0b10)
+        friend = _make_sprite(-5, 0, layer=0b100)
+        far_enemy = _make_sprite(500, 0, layer=0b10)
+        bullets.append(bullet)
+        enemies.append(enemy)
+        enemies.append(friend)
+        enemies.append(far_enemy)
+
+        assert arcade.check_for_collision_between_lists(bullets, enemies) == [(bullet, enemy)]
+
+
+def test_collision_within_list_reports_pair_once():
+    sprite_list = arcade.SpriteList(use_spatial_hash=True, spatial_hash_cell_size=4)
+    sprite_a = _make_sprite(0, 0)
+    sprite_b = _make_sprite(5, 0)
+    sprite_list.append(sprite_a)
+    sprite_list.append(sprite_b)
+
+    pairs = arcade.check_for_collision_between_lists(sprite_list, sprite_list)
+    assert len(pairs) == 1
+    assert set(pairs[0]) == {sprite_a, sprite_b}
@@ -0,0 +1,60 @@
+"""
+Unit tests for grid_renderer.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_grid_renderer.py
+"""
+
+import numpy as np
+import pytest
+
+import arcade
+
+
+def test_update_marks_changed_rows():
+    grid = arcade.GridRenderer(10, 5, 20, palette=[(0, 0, 0), (255, 255, 255)])
+    grid._changed.clear()
+
+    grid.update((4, 2), 1)
+    assert grid.cells[4, 2] == 1
+    assert (grid._changed.start, grid._changed.end) == (4, 5)
+
+    grid.update(np.s_[7:9, :], np.ones((2, 5)))
+    assert (grid._changed.start, grid._changed.end) == (4, 9)
+
+
+def test_update_mask():
+    grid = arcade.GridRenderer(6, 4, 20, palette=[(0, 0, 0), (255, 255, 255)])
+    grid._changed.clear()
+
+    mask = np.zeros((6, 4), dtype=bool)
+    mask[2, 1] = mask[4, 3] = True
+    grid.update(mask, 1)
+    assert grid.cells.sum() == 2
+    assert grid.cells[2, 1] == grid.cells[4, 3] == 1
+    assert (grid._changed.start, grid._changed.end) == (2, 5)
+
+    grid.update(np.zeros((6, 4), dtype=bool), 1)
+    assert (grid._changed.start, grid._changed.end) == (2, 5)
+
+
+def test_update_colors():
+    grid = arcade.GridRenderer(3, 3, 20)
+    grid.update((0, slice(None)), (1, 2, 3))
+    grid.update((1, 1), (4, 5, 6, 7))
+    assert grid.cells[0].tolist() == [[1, 2, 3, 255]] * 3
+    assert grid.cells[1, 1].tolist() == [4, 5, 6, 7]
+    assert grid.cells[2, 2].tolist() == [0, 0, 0, 0]
+
+    with pytest.raises(ValueError):
+        grid.set_palette([(0, 0, 0)])
+
+
+def test_get_cell():
+    grid = arcade.GridRenderer(15, 10, 30, margin=5, left=100)
+    assert grid.width == 355
+    assert grid.height == 530
+    assert grid.get_cell(100 + 5 + 35 * 3 + 1, 5 + 35 * 7 + 29) == (7, 3)
+    # In a margin, and past the edge
+    assert grid.get_cell(100 + 2, 20) is None
+    assert grid.get_cell(100 + 360, 20) is None
@@ -0,0 +1,32 @@
+"""
+Unit tests for instanced_batch.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_instanced_batch.py
+"""
+
+import arcade
+
+
+def test_changed_range():
+    changed = arcade.ChangedRange()
+    assert not changed
+
+    changed.add(4, 6)
+    assert (changed.start, changed.end) == (4, 6)
+    changed.add(1, 2)
+    assert (changed.start, changed.end) == (1, 6)
+    assert changed
+
+    changed.clear()
+    assert not changed
+    changed.add(7, 9)
+    assert (changed.start, changed.end) == (7, 9)
+
+
+def test_reserve_grows_data():
+    points = arcade.PointBatch(capacity=2)
+    assert points._reserve(3) == 0
+    assert len(points.data) >= 3
+    assert points._reserve(1) == 3
+    assert len(points) == 4
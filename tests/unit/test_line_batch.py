@@ -0,0 +1,75 @@
+"""
+Unit tests for line_batch.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_line_batch.py
+"""
+
+import pytest
+
+import arcade
+
+
+def test_handles_are_reused():
+    lines = arcade.LineBatch(capacity=1)
+    first = lines.add_line((0, 0), (10, 0), (255, 0, 0))
+    second = lines.add_line((0, 0), (0, 10), (0, 255, 0), 3)
+    assert (first, second) == (0, 1)
+    assert len(lines) == 2
+
+    lines.remove_line(first)
+    assert len(lines) == 1
+    assert lines.data['width'][first] == 0
+
+    assert lines.add_line((1, 1), (2, 2), (0, 0, 255)) == first
+    assert lines.data[first]['start'].tolist() == [1, 1]
+    assert lines.data[first]['color'].tolist() == [0, 0, 255, 255]
+    assert len(lines) == 2
+
+
+def test_set_lines_marks_changed_range():
+    lines = arcade.LineBatch()
+    handles = lines.add_lines([(0, 0)] * 10, [(1, 1)] * 10, (255, 255, 255))
+    assert handles.tolist() == list(range(10))
+    assert (lines._changed.start, lines._changed.end) == (0, 10)
+
+    lines._changed.clear()
+    lines.set_lines([7, 3], ends=[(5, 5), (6, 6)], widths=[2, 4])
+    assert (lines._changed.start, lines._changed.end) == (3, 8)
+    assert lines.data['end'][3].tolist() == [6, 6]
+    assert lines.data['width'][7] == 2
+
+    lines.set_line(9, (0, 0), (2, 2), (1, 2, 3, 4), 5)
+    assert (lines._changed.start, lines._changed.end) == (3, 10)
+
+
+def test_unknown_handle():
+    lines = arcade.LineBatch()
+    with pytest.raises(IndexError):
+        lines.set_line(0, (0, 0), (1, 1), (255, 255, 255))
+
+
+def test_double_remove():
+    lines = arcade.LineBatch()
+    handle = lines.add_line((0, 0), (1, 1), (255, 255, 255))
+    lines.add_line((0, 0), (2, 2), (255, 255, 255))
+    lines.remove_line(handle)
+    with pytest.raises(IndexError):
+        lines.remove_line(handle)
+    assert len(lines) == 1
+
+    # The handle is only given out once
+    assert lines.add_line((0, 0), (3, 3), (255, 255, 255)) == handle
+    assert lines.add_line((0, 0), (4, 4), (255, 255, 255)) == 2
+    assert len(lines) == 3
+
+
+def test_removed_handle():
+    lines = arcade.LineBatch()
+    handles = lines.add_lines([(0, 0)] * 3, [(1, 1)] * 3, (255, 255, 255))
+    lines.remove_line(1)
+    with pytest.raises(IndexError):
+        lines.set_line(1, (0, 0), (1, 1), (255, 255, 255))
+    with pytest.raises(IndexError):
+        lines.set_lines(handles, widths=2)
+    assert lines.data['width'].tolist()[:3] == [1, 0, 1]
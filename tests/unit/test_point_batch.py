@@ -0,0 +1,48 @@
+"""
+Unit tests for point_batch.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_point_batch.py
+"""
+
+import numpy as np
+import pytest
+
+import arcade
+
+
+def test_extend_fills_point_data():
+    points = arcade.PointBatch(capacity=1)
+
+    assert points.append(1, 2, (1, 2, 3)) == 0
+    colors = np.array([[4, 5, 6, 7], [8, 9, 10, 11]], dtype=np.uint8)
+    assert points.extend(np.array([[3, 4], [5, 6]]), colors, [2, 3]) == 1
+    assert len(points) == 3
+
+    assert points.positions.tolist() == [[1, 2], [3, 4], [5, 6]]
+    assert points.colors.tolist() == [[1, 2, 3, 255], [4, 5, 6, 7], [8, 9, 10, 11]]
+    assert points.sizes.tolist() == [1, 2, 3]
+
+
+def test_changed_range_grows():
+    points = arcade.PointBatch()
+    points.extend([(0, 0)] * 10, (255, 0, 0))
+    points.clear()
+    points.extend([(0, 0)] * 10, (255, 0, 0))
+    assert (points._changed.start, points._changed.end) == (0, 10)
+
+    points._changed.clear()
+    points.set_points(6, sizes=[4, 4])
+    points.positions[2] = 5, 5
+    points.mark_changed(2, 3)
+    assert (points._changed.start, points._changed.end) == (2, 8)
+    assert points.positions[2].tolist() == [5, 5]
+
+
+def test_set_points_checks_range():
+    points = arcade.PointBatch()
+    points.extend([(0, 0)] * 3, (255, 0, 0))
+    with pytest.raises(IndexError):
+        points.set_points(2, [(1, 1), (2, 2)])
+    with pytest.raises(ValueError):
+        points.set_points(0, colors=(255, 255, 255))
@@ -0,0 +1,60 @@
+"""
+Unit tests for polyline.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_polyline.py
+"""
+
+import math
+
+import pytest
+
+import arcade
+
+
+def _area(point_list):
+    triangles = point_list.reshape(-1, 3, 2)
+    total = 0
+    for (ax, ay), (bx, by), (cx, cy) in triangles:
+        total += abs((bx - ax) * (cy - ay) - (cx - ax) * (by - ay)) / 2
+    return total
+
+
+def test_straight_strip_has_no_overlap():
+    points = arcade.tessellate_line_strip([(0, 0), (50, 0), (50, 0), (100, 0)], 10)
+    assert math.isclose(_area(points), 1000)
+
+
+def test_caps():
+    square = arcade.tessellate_line_strip([(0, 0), (100, 0)], 10, cap=arcade.LINE_CAP_SQUARE)
+    assert math.isclose(_area(square), 1100)
+
+    rounded = arcade.tessellate_line_strip([(0, 0), (100, 0)], 10, cap=arcade.LINE_CAP_ROUND)
+    assert 1000 + math.pi * 25 * 0.9 < _area(rounded) < 1000 + math.pi * 25
+
+
+def test_miter_join_fills_corner():
+    points = arcade.tessellate_line_strip([(0, 0), (100, 0), (100, 100)], 10)
+    # Two 100 x 10 segments and the 5 x 5 outer corner
+    assert math.isclose(_area(points), 2000 + 25)
+
+    beveled = arcade.tessellate_line_strip([(0, 0), (100, 0), (100, 100)], 10, arcade.LINE_JOIN_BEVEL)
+    assert math.isclose(_area(beveled), 2000 + 12.5)
+
+
+def test_closed_strip_and_lines():
+    square = [(0, 0), (100, 0), (100, 100), (0, 100)]
+    outline = arcade.tessellate_line_strip(square, 2, closed=True)
+    assert len(outline) == 4 * 6 + 4 * 6
+
+    lines = arcade.tessellate_lines(square + [(5, 5)], 2)
+    assert len(lines) == 2 * 6
+
+
+def test_unknown_join_or_cap():
+    with pytest.raises(ValueError):
+        arcade.tessellate_line_strip([(0, 0), (100, 0)], 10, join="mitre")
+    with pytest.raises(ValueError):
+        arcade.tessellate_line_strip([(0, 0), (100, 0)], 10, cap="flat")
+    with pytest.raises(ValueError):
+        arcade.tessellate_lines([(0, 0), (100, 0)], 10, cap="flat")
@@ -0,0 +1,72 @@
+"""
+Unit tests for sdf_shapes.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_sdf_shapes.py
+"""
+
+import math
+
+import pytest
+
+import arcade
+
+
+def test_append_fills_shape_data():
+    shapes = arcade.SDFShapeList(capacity=1)
+
+    assert shapes.append_circle(10, 20, 5, (1, 2, 3)) == 0
+    assert shapes.append_arc(0, 0, 4, 2, (1, 2, 3, 4), 90, 180, border_width=2, tilt_angle=45) == 1
+    assert shapes.append_rounded_rectangle(0, 0, 30, 10, 3, (1, 2, 3)) == 2
+    assert len(shapes) == 3
+
+    circle, arc, rectangle = shapes.data[:3]
+    assert tuple(circle['center']) == (10, 20)
+    assert tuple(circle['radii']) == (5, 5)
+    assert tuple(circle['color']) == (1, 2, 3, 255)
+
+    assert math.isclose(arc['angle'], math.pi / 4, rel_tol=1e-6)
+    assert math.isclose(arc['arc'][0], math.pi / 2, rel_tol=1e-6)
+    assert math.isclose(arc['arc'][1], math.pi, rel_tol=1e-6)
+    assert arc['border_width'] == 2
+
+    assert rectangle['shape'] == arcade.SDF_SHAPE_ROUNDED_RECTANGLE
+    assert tuple(rectangle['radii']) == (15, 5)
+    assert rectangle['corner_radius'] == 3
+
+    shapes.clear()
+    assert len(shapes) == 0
+
+
+def test_set_marks_changed_range():
+    shapes = arcade.SDFShapeList()
+    for i in range(5):
+        shapes.append_circle(i, 0, 5, (255, 255, 255))
+    assert (shapes._changed.start, shapes._changed.end) == (0, 5)
+
+    shapes._changed.clear()
+    shapes.set_center(3, 10, 20)
+    shapes.set_color(1, (1, 2, 3))
+    shapes.set_tilt_angle(2, 90)
+    assert (shapes._changed.start, shapes._changed.end) == (1, 4)
+    assert tuple(shapes.data['center'][3]) == (10, 20)
+    assert tuple(shapes.data['color'][1]) == (1, 2, 3, 255)
+    assert math.isclose(shapes.data['angle'][2], math.pi / 2, rel_tol=1e-6)
+
+    with pytest.raises(IndexError):
+        shapes.set_color(5, (1, 2, 3))
+
+
+def test_remove():
+    shapes = arcade.SDFShapeList()
+    for i in range(4):
+        shapes.append_circle(i, 0, 5, (255, 255, 255))
+    shapes._changed.clear()
+
+    shapes.remove(1)
+    assert len(shapes) == 3
+    assert shapes.data['center'][:3, 0].tolist() == [0, 2, 3]
+    assert (shapes._changed.start, shapes._changed.end) == (1, 3)
+
+    with pytest.raises(IndexError):
+        shapes.remove(3)
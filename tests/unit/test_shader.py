@@ -0,0 +1,113 @@
+"""
+Unit tests for shader.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_shader.py
+"""
+
+import os
+import sys
+
+import numpy as np
+
+from arcade import shader
+
+
+def test_program_cache_directory_follows_xdg(monkeypatch):
+    monkeypatch.setattr(sys, 'platform', 'linux')
+    monkeypatch.setenv('XDG_CACHE_HOME', '/tmp/cache_home')
+    assert shader.default_program_cache_directory() == os.path.join('/tmp/cache_home', 'arcade', 'programs')
+
+
+def test_program_cache_is_off_by_default():
+    assert shader.get_program_cache() is None
+    shader.enable_program_cache('/tmp/unused')
+    shader.disable_program_cache()
+    assert shader.get_program_cache() is None
+
+
+def test_uniform_setter_skips_same_value():
+    calls = []
+    c_array = (shader.GLfloat * 2)()
+
+    def gl_setter(location, count, ptr):
+        calls.append(tuple(c_array))
+
+    setter = shader._create_setter_func(0, gl_setter, c_array, 2, 1, None, False)
+    setter((1.0, 2.0))
+    setter([1.0, 2.0])
+    assert calls == [(1.0, 2.0)]
+    setter((3.0, 2.0))
+    assert calls == [(1.0, 2.0), (3.0, 2.0)]
+
+
+def test_context_state_skips_redundant_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(shader, 'glEnable', lambda cap: calls.append(('enable', cap)))
+    monkeypatch.setattr(shader, 'glDisable', lambda cap: calls.append(('disable', cap)))
+    monkeypatch.setattr(shader, 'glBlendFunc', lambda src, dst: calls.append(('blend', src, dst)))
+
+    state = shader.ContextState()
+    state.enable(shader.GL_BLEND)
+    state.enable(shader.GL_BLEND)
+    state.blend_func(shader.GL_SRC_ALPHA, shader.GL_ONE_MINUS_SRC_ALPHA)
+    state.blend_func(shader.GL_SRC_ALPHA, shader.GL_ONE_MINUS_SRC_ALPHA)
+    assert len(calls) == 2
+
+    state.disable(shader.GL_BLEND)
+    state.invalidate()
+    state.disable(shader.GL_BLEND)
+    assert calls[2:] == [('disable', shader.GL_BLEND), ('disable', shader.GL_BLEND)]
+
+
+def test_stream_buffer_rotates_and_grows(fake_gl):
+
+    stream = shader.stream_buffer(16)
+    buffers = stream.buffers
+    data = np.zeros(4, dtype=np.float32)
+    assert [stream.write(data) for _ in range(4)] == [0, 1, 2, 0]
+    assert [len(buffer.writes) for buffer in buffers] == [2, 1, 1]
+
+    # The buffers are replaced with ones the data fits in
+    larger = np.zeros(6, dtype=np.float32)
+    assert stream.write(larger) == 1
+    assert stream.size == 32
+    assert [buffer.size for buffer in stream.buffers] == [32] * 3
+    assert stream.buffers[1].writes == [larger]
+    assert not set(stream.buffers) & set(buffers)
+
+    much_larger = np.zeros(100, dtype=np.float32)
+    stream.write(much_larger)
+    assert stream.size == much_larger.nbytes
+
+
+class _FakeContext:
+    pass
+
+
+def test_program_is_shared_for_same_sources(monkeypatch):
+    linked = []
+    monkeypatch.setattr(shader.gl, 'current_context', _FakeContext())
+    monkeypatch.setattr(shader, 'Program', lambda *shaders, **kwargs: linked.append(shaders) or object())
+
+    first = shader.program(vertex_shader="vertex", fragment_shader="fragment")
+    assert shader.program(vertex_shader="vertex", fragment_shader="fragment") is first
+    assert shader.program(vertex_shader="vertex", fragment_shader="other") is not first
+    assert len(linked) == 2
+
+    # Another context links its own
+    monkeypatch.setattr(shader.gl, 'current_context', _FakeContext())
+    assert shader.program(vertex_shader="vertex", fragment_shader="fragment") is not first
+
+
+def test_attribute_layout_skips_padding():
+    prog = shader.Program.__new__(shader.Program)
+    prog._attributes = {'in_pos': 0, 'in_color': 3}
+    prog._layouts = {}
+    buf_desc = shader.BufferDescription(None, '2f 4x 4B 2x', ('in_pos', 'in_color'), normalized=['in_color'])
+
+    stride, pointers = prog.attribute_layout(buf_desc)
+    assert stride == 8 + 4 + 4 + 2
+    assert pointers == [(0, 2, shader.GL_FLOAT, shader.GL_FALSE, 0),
+                        (3, 4, shader.GL_UNSIGNED_BYTE, shader.GL_TRUE, 12)]
+    assert prog.attribute_layout(buf_desc) is prog.attribute_layout(buf_desc)
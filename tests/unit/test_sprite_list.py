@@ -0,0 +1,109 @@
+"""
+Unit tests for sprite_list.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_sprite_list.py
+"""
+
+import numpy as np
+import PIL.Image
+
+import arcade
+
+
+def _make_list(depths):
+    sprite_list = arcade.SpriteList()
+    for index, depth in enumerate(depths):
+        sprite = arcade.Sprite(center_x=index, center_y=-index)
+        sprite.depth = depth
+        sprite_list.append(sprite)
+    return sprite_list
+
+
+def test_sort_by_depth():
+    sprite_list = _make_list([3, 1, 2, 1])
+    sprite_list.sort()
+    assert [sprite.depth for sprite in sprite_list] == [1, 1, 2, 3]
+    # Equal depths keep their original order
+    assert [sprite.center_x for sprite in sprite_list] == [1, 3, 2, 0]
+    for index, sprite in enumerate(sprite_list):
+        assert sprite_list.sprite_idx[sprite] == index
+
+
+def test_sort_reverse_is_stable():
+    sprite_list = _make_list([3, 1, 2, 1])
+    sprite_list.sort(key='depth', reverse=True)
+    assert [sprite.center_x for sprite in sprite_list] == [0, 2, 1, 3]
+
+
+def test_sort_with_function():
+    sprite_list = _make_list([0, 0, 0])
+    sprite_list.sort(key=lambda sprite: sprite.center_y)
+    assert [sprite.center_x for sprite in sprite_list] == [2, 1, 0]
+
+
+def test_sorted_sprites_use_depth():
+    sprite_list = _make_list([5, -1, 2])
+    assert [sprite.depth for sprite in sorted(sprite_list)] == [-1, 2, 5]
+
+
+def _make_texture(name, color):
+    return arcade.Texture(name, PIL.Image.new("RGBA", (4, 4), color))
+
+
+def test_texture_change_reaches_static_list(fake_gl):
+    atlas = arcade.TextureArrayAtlas(64, 64)
+    sprite_list = arcade.SpriteList(is_static=True, texture_atlas=atlas)
+    sprite = arcade.Sprite()
+    sprite.texture = _make_texture("red", (255, 0, 0, 255))
+    sprite_list.append(sprite)
+
+    sprite_list._calculate_sprite_buffer()
+    sprite_list._upload_sprite_data()
+    writes = len(sprite_list.sprite_data_buf.writes)
+    sprite_list._upload_sprite_data()
+    assert len(sprite_list.sprite_data_buf.writes) == writes
+
+    sprite.texture = _make_texture("blue", (0, 0, 255, 255))
+    sprite_list._upload_sprite_data()
+    assert len(sprite_list.sprite_data_buf.writes) == writes + 1
+    uploaded = sprite_list.sprite_data_buf.writes[-1]
+    region = atlas.add(sprite.texture)
+    assert np.allclose(uploaded['sub_tex_coords'][0], region.sub_tex_coords)
+
+
+def test_sort_reaches_static_list(fake_gl):
+    sprite_list = arcade.SpriteList(is_static=True, texture_atlas=arcade.TextureArrayAtlas(64, 64))
+    for depth in (2, 1):
+        sprite = arcade.Sprite()
+        sprite.texture = _make_texture("red", (255, 0, 0, 255))
+        sprite.depth = depth
+        sprite_list.append(sprite)
+    sprite_list._calculate_sprite_buffer()
+
+    sprite_list.sort()
+    sprite_list._upload_sprite_data()
+    assert sprite_list.sprite_data_buf.writes[-1]['depth'].tolist() == [1, 2]
+
+
+def test_viewport_culling(fake_gl, monkeypatch):
+    monkeypatch.setattr(arcade.sprite_list, 'get_viewport', lambda: (0, 200, 0, 200))
+    sprite_list = arcade.SpriteList(cull_to_viewport=True, texture_atlas=arcade.TextureArrayAtlas(64, 64))
+    # Inside, straddling the left edge, outside, straddling the top edge, far outside
+    for x, y in ((100, 100), (-1, 100), (-10, 100), (50, 201), (300, 300)):
+        sprite = arcade.Sprite(center_x=x, center_y=y)
+        sprite.texture = _make_texture("red", (255, 0, 0, 255))
+        sprite_list.append(sprite)
+    sprite_list._calculate_sprite_buffer()
+
+    assert sprite_list._calculate_visible_sprites().tolist() == [True, True, False, True, False]
+    assert sprite_list._upload_sprite_data() == 3
+    assert (sprite_list.visible_count, sprite_list.culled_count) == (3, 2)
+    stream = sprite_list.sprite_data_stream
+    uploaded = stream.buffers[stream.slot].writes[-1]
+    assert uploaded['position'].tolist() == [[100, 100], [-1, 100], [50, 201]]
+
+    # Everything is drawn without culling
+    sprite_list.cull_to_viewport = False
+    assert sprite_list._upload_sprite_data() == 5
+    assert (sprite_list.visible_count, sprite_list.culled_count) == (5, 0)
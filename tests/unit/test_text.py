@@ -0,0 +1,122 @@
+"""
+Unit tests for text.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_text.py
+"""
+
+import arcade
+from arcade import text
+
+FONT = ('no such font',)
+
+
+def test_glyphs_are_rasterized_once():
+    glyph_set = arcade.TextCache().get_glyph_set(FONT, 15)
+    glyph = glyph_set.get("A")
+    assert glyph_set.get("A") is glyph
+    assert glyph.texture.image.mode == "RGBA"
+    assert glyph.advance > 0
+    assert glyph_set.bytes == glyph.texture.width * glyph.texture.height * 4
+
+    space = glyph_set.get(" ")
+    assert space.texture is None
+    assert space.advance > 0
+
+
+def test_layout_aligns_lines():
+    cache = arcade.TextCache()
+    glyph_set = cache.get_glyph_set(FONT, 15)
+    atlas = cache.batch.texture_atlas
+    label = text._layout_text("AA\nA", glyph_set, 0, "right", atlas)
+
+    assert len(label.instances) == 3
+    text_width, text_height = label.size
+    assert text_height == 2 * glyph_set.line_height
+
+    first, second, third = label.instances['position']
+    # The second line is lower, and pushed right to line up with the first
+    assert third[1] < first[1]
+    assert third[0] == second[0]
+    assert glyph_set.get("A").texture in atlas
+
+
+def test_cache_counts_hits_and_misses():
+    cache = arcade.TextCache()
+    label = cache.get_text("Score", 15, 0, "left", FONT, False, False)
+    assert cache.get_text("Score", 15, 0, "left", FONT, False, False) is label
+    cache.get_text("Score", 15, 0, "left", FONT, True, False)
+
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 2, 0)
+    assert stats['texts'] == 2
+    assert stats['bytes'] == stats['glyph_bytes'] + 2 * label.bytes
+
+
+def test_cache_evicts_least_recently_used():
+    # The texts share their glyphs, so only the texts count against the budget
+    cache = arcade.TextCache()
+    left = cache.get_text("1", 15, 0, "left", FONT, False, False)
+    cache.max_bytes = cache.glyph_bytes + left.bytes * 2 + 10
+
+    cache.get_text("1", 15, 0, "center", FONT, False, False)
+    cache.get_text("1", 15, 0, "left", FONT, False, False)
+    cache.get_text("1", 15, 0, "right", FONT, False, False)
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert ("1", 15, 0, "center", FONT, False, False) not in cache
+    assert ("1", 15, 0, "left", FONT, False, False) in cache
+
+
+def test_cache_releases_glyphs_over_budget():
+    cache = arcade.TextCache(max_bytes=1)
+    cache.get_text("A", 15, 0, "left", FONT, False, False)
+    atlas = cache.batch.texture_atlas
+
+    cache.get_text("B", 15, 0, "left", FONT, False, False)
+    assert cache.batch.texture_atlas is not atlas
+    assert len(cache) == 1
+    assert cache.evictions == 1
+
+
+def test_cache_releases_unused_glyphs_first():
+    cache = arcade.TextCache()
+    cache.get_text("W", 40, 0, "left", FONT, False, False)
+    label = cache.get_text("A", 15, 0, "left", FONT, False, False)
+    big_glyphs = cache.get_glyph_set(FONT, 40)
+    assert cache.glyph_bytes == (big_glyphs.bytes + cache.get_glyph_set(FONT, 15).bytes +
+                                 len(cache.batch.texture_atlas.pages) * 1024 * 1024 * 8)
+
+    # Only the text in the smaller font is left
+    cache.max_bytes = cache.glyph_bytes + label.bytes + 10
+    cache.get_text("A", 15, 0, "center", FONT, False, False)
+    assert len(cache) == 1
+
+    # Releasing the glyphs of the larger font is enough to get in the budget
+    atlas = cache.batch.texture_atlas
+    cache.max_bytes = cache.glyph_bytes - big_glyphs.bytes + label.bytes * 3
+    cache.get_text("A", 15, 0, "right", FONT, False, False)
+    assert cache.batch.texture_atlas is atlas
+    assert (FONT, 40, False, False) not in cache._glyph_sets
+    assert (FONT, 15, False, False) in cache._glyph_sets
+    assert len(cache) == 2
+
+
+def test_fonts_are_looked_for_once():
+    font = text._load_font(['no such font', 'nor this one'], 20)
+    assert text._load_font(('no such font', 'nor this one'), 20) is font
+    assert text._load_font(('no such font', 'nor this one'), 20, bold=True) is not font
+
+
+def test_font_file_names():
+    assert text._get_font_file_names("arial", False, False) == ["arial", "arial.ttf"]
+    assert text._get_font_file_names("arial.ttf", True, False) == ["arialbd.ttf", "arialb.ttf", "arial-Bold.ttf",
+                                                                   "arial.ttf"]
+
+
+def test_measure_text_matches_layout(monkeypatch):
+    cache = arcade.TextCache()
+    monkeypatch.setattr(arcade.draw_text, 'cache', cache)
+    label = cache.get_text("Hello\nWorld!", 15, 0, "left", FONT, False, False)
+    assert arcade.measure_text("Hello\nWorld!", FONT, 12) == label.size
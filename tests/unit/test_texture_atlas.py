@@ -0,0 +1,104 @@
+"""
+Unit tests for texture_atlas.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_texture_atlas.py
+"""
+
+import PIL.Image
+import pytest
+
+import arcade
+
+
+def _make_texture(name, width, height, color=(255, 0, 0, 255)):
+    return arcade.Texture(name, PIL.Image.new("RGBA", (width, height), color))
+
+
+def test_add_same_texture_once():
+    atlas = arcade.TextureArrayAtlas(64, 64)
+    texture = _make_texture("a", 10, 10)
+    region_1 = atlas.add(texture)
+    region_2 = atlas.add(texture)
+    assert region_1 is region_2
+    assert len(atlas) == 1
+    assert texture in atlas
+
+
+def test_pages_are_added_when_full():
+    atlas = arcade.TextureArrayAtlas(64, 64)
+    regions = [atlas.add(_make_texture(str(i), 30, 30)) for i in range(5)]
+    assert [region.layer for region in regions] == [0, 0, 0, 0, 1]
+    assert [(region.x, region.y) for region in regions[:4]] == [(0, 0), (31, 0), (0, 31), (31, 31)]
+    assert len(atlas.pages) == 2
+
+
+def test_image_is_copied_to_page():
+    atlas = arcade.TextureArrayAtlas(64, 64)
+    atlas.add(_make_texture("a", 4, 4))
+    region = atlas.add(_make_texture("b", 4, 2, (0, 0, 255, 255)))
+    page = atlas.pages[region.layer]
+    assert tuple(page[region.y, region.x]) == (0, 0, 255, 255)
+    assert tuple(page[region.y + 2, region.x]) == (0, 0, 0, 0)
+    assert region.sub_tex_coords == pytest.approx((5 / 64, 1 - 2 / 64, 4 / 64, 2 / 64))
+
+
+def test_texture_too_large():
+    atlas = arcade.TextureArrayAtlas(64, 64)
+    with pytest.raises(ValueError):
+        atlas.add(_make_texture("a", 65, 10))
+
+
+def test_max_pages():
+    atlas = arcade.TextureArrayAtlas(64, 64, max_pages=1)
+    for i in range(4):
+        atlas.add(_make_texture(str(i), 30, 30))
+    assert atlas.has_room(_make_texture("0", 30, 30))
+    assert not atlas.has_room(_make_texture("4", 30, 30))
+    with pytest.raises(ValueError):
+        atlas.add(_make_texture("4", 30, 30))
+
+    atlas.clear()
+    assert len(atlas) == 0
+    assert atlas.add(_make_texture("4", 30, 30)).layer == 0
+
+
+class _FakeTextureArray:
+    def __init__(self, size, layers):
+        self.layers = layers
+        self.writes = []
+
+    def write(self, layer, data, x=0, y=0):
+        self.writes.append((layer, data.shape[:2]))
+
+    def use(self, texture_unit=0):
+        pass
+
+
+def test_only_new_pages_are_uploaded(monkeypatch):
+    monkeypatch.setattr(arcade.shader, 'texture_array', _FakeTextureArray)
+    atlas = arcade.TextureArrayAtlas(64, 64)
+    for i in range(4):
+        atlas.add(_make_texture(str(i), 30, 30))
+    atlas.use()
+    first_texture = atlas._texture
+    assert first_texture.writes == [(0, (64, 64))]
+
+    atlas.add(_make_texture("4", 30, 30))
+    atlas.use()
+    # The texture array is made again with room for two pages
+    second_texture = atlas._texture
+    assert second_texture.layers == 2
+    assert second_texture.writes == [(0, (64, 64)), (1, (64, 64))]
+
+    # A third page makes room for four, and later images on the page go alone
+    for i in range(5, 9):
+        atlas.add(_make_texture(str(i), 30, 30))
+    atlas.use()
+    assert atlas._texture.layers == 4
+    atlas.add(_make_texture("9", 30, 30))
+    atlas.add(_make_texture("10", 30, 30))
+    atlas._texture.writes.clear()
+    atlas.use()
+    assert atlas._texture.writes == [(2, (30, 30)), (2, (30, 30))]
+    assert atlas.bytes == (3 + 4) * 64 * 64 * 4
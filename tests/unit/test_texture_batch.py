@@ -0,0 +1,38 @@
+"""
+Unit tests for texture_batch.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_texture_batch.py
+"""
+
+import PIL.Image
+
+import arcade
+from arcade import window_commands
+from arcade.texture_batch import TextureBatch
+
+
+def _make_texture(name, width, height):
+    return arcade.Texture(name, PIL.Image.new("RGBA", (width, height), (255, 0, 0, 255)))
+
+
+def test_full_atlas_is_drawn_and_cleared(monkeypatch):
+    monkeypatch.setattr(window_commands, '_pending_batch', None)
+    batch = TextureBatch(arcade.TextureArrayAtlas(64, 64, max_pages=1))
+    flushed = []
+
+    def flush():
+        flushed.append(len(batch))
+        batch.count = 0
+    monkeypatch.setattr(batch, 'flush', flush)
+
+    for i in range(4):
+        batch.add(_make_texture(str(i), 30, 30), 0, 0, 30, 30)
+    assert flushed == []
+
+    # The rectangles using the old images are drawn before they are gone
+    batch.add(_make_texture("4", 30, 30), 0, 0, 30, 30)
+    assert flushed == [4]
+    assert len(batch) == 1
+    assert len(batch.texture_atlas) == 1
+    assert batch.data[0]['texture_layer'] == 0
@@ -0,0 +1,34 @@
+"""
+Unit tests for window_commands.py
+
+Can run these tests individually with:
+python -m pytest tests/unit/test_window_commands.py
+"""
+
+import arcade
+
+
+class _RecordingBatch:
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+
+    def flush(self):
+        self.log.append(self.name)
+
+
+def test_switching_batches_flushes_previous():
+    log = []
+    batch_a = _RecordingBatch("a", log)
+    batch_b = _RecordingBatch("b", log)
+
+    arcade.set_pending_batch(batch_a)
+    arcade.set_pending_batch(batch_a)
+    assert log == []
+
+    arcade.set_pending_batch(batch_b)
+    assert log == ["a"]
+
+    arcade.flush_batched_draws()
+    arcade.flush_batched_draws()
+    assert log == ["a", "b"]